@@ -1,8 +1,10 @@
 import os
 from datetime import datetime
 
+from arknights_mower import models
 from arknights_mower.solvers.base_schedule import BaseSchedulerSolver
 from arknights_mower.solvers.reclamation_algorithm import ReclamationAlgorithm
+from arknights_mower.solvers.record import checkpoint_state
 from arknights_mower.solvers.secret_front import SecretFront
 from arknights_mower.utils import config, path, rapidocr
 from arknights_mower.utils.csleep import MowerExit
@@ -23,6 +25,7 @@ base_scheduler = None
 # 执行自动排班
 def main(saved_state):
     logger.info("开始运行Mower")
+    preload_models()
     rapidocr.initialize_ocr()
     data = None
     if saved_state != {}:
@@ -30,6 +33,22 @@ def main(saved_state):
     simulate(data)
 
 
+def preload_models():
+    """按启用的功能在后台预加载模型，其余模型第一次使用时再加载"""
+    names = [
+        "svm",
+        "operator_select",
+        "operator_train",
+        "operator_room",
+        "riic_base_digits",
+    ]
+    if config.conf.recruit_enable:
+        names += ["recruit", "recruit_result", "noto_sans"]
+    if config.conf.SF:
+        names.append("secret_front")
+    models.preload(names)
+
+
 def initialize(
     tasks: list, scheduler: BaseSchedulerSolver | None = None
 ) -> BaseSchedulerSolver:
@@ -318,6 +337,7 @@ def simulate(saved):
                     base_scheduler.check_current_focus()
 
             base_scheduler.run()
+            checkpoint_state(base_scheduler)
             reconnect_tries = 0
         except MowerExit:
             return
@@ -1,95 +1,190 @@
+import hashlib
+import inspect
 import json
+import marshal
+import pickle
 from pathlib import Path
+from threading import Lock
+from typing import Any, Callable, Optional
 
 from .. import __rootdir__
 
-# agents list in Arknights
-agent_list = json.loads(Path(f"{__rootdir__}/data/agent.json").read_text("utf-8"))
-
-agent_profession = json.loads(
-    Path(f"{__rootdir__}/data/agent_profession.json").read_text("utf-8")
-)
-workshop_formula = json.loads(
-    Path(f"{__rootdir__}/data/workshop_formula.json").read_text("utf-8")
-)
-stage_data_full = json.loads(
-    Path(f"{__rootdir__}/data/stage_data_full.json").read_text("utf-8")
-)
-
-stage_order = json.loads(
-    Path(f"{__rootdir__}/data/stage_order.json").read_text("utf-8")
-)
-
-# # agents base skills
-# agent_base_config = json.loads(
-#     Path(f'{__rootdir__}/data/agent-base.json').read_text('utf-8'))
-
-# name of each room in the basement
-base_room_list = json.loads(Path(f"{__rootdir__}/data/base.json").read_text("utf-8"))
-
-# the camps to which the clue belongs
-clue_name = json.loads(Path(f"{__rootdir__}/data/clue.json").read_text("utf-8"))
-
-# goods sold in shop
-shop_items = json.loads(Path(f"{__rootdir__}/data/shop.json").read_text("utf-8"))
-
-# collection of the obtained ocr error
-ocr_error = json.loads(Path(f"{__rootdir__}/data/ocr.json").read_text("utf-8"))
+# 数据集名称与 json 文件名，首次访问时才读取
+DATASETS = {
+    # agents list in Arknights
+    "agent_list": "agent.json",
+    "agent_profession": "agent_profession.json",
+    "workshop_formula": "workshop_formula.json",
+    "stage_data_full": "stage_data_full.json",
+    "stage_order": "stage_order.json",
+    # name of each room in the basement
+    "base_room_list": "base.json",
+    # the camps to which the clue belongs
+    "clue_name": "clue.json",
+    # goods sold in shop
+    "shop_items": "shop.json",
+    # collection of the obtained ocr error
+    "ocr_error": "ocr.json",
+    "agent_arrange_order": "arrange_order.json",
+    # chapter name in English
+    "chapter_list": "chapter.json",
+    # list of supported levels
+    "level_list": "level.json",
+    # open zones
+    "zone_list": "zone.json",
+    # list of supported weekly levels
+    "weekly_zones": "weekly.json",
+    # list of scene defined
+    "scene_list": "scene.json",
+    # recruit database
+    "recruit_agent": "recruit.json",
+    "recruit_result": "recruit_result.json",
+    "key_mapping": "key_mapping.json",
+}
+
+# 由数据集计算出的索引：名称 -> (依赖的数据集, 计算函数)
+INDEXES: dict[str, tuple[tuple[str, ...], Callable[..., Any]]] = {}
+
+_loaded: dict[str, Any] = {}
+_locks: dict[str, Lock] = {}
+
+
+def index(*sources: str):
+    """注册一个索引，计算结果按源文件和计算代码的哈希缓存到 @app/tmp/data"""
+
+    def decorator(func):
+        INDEXES[func.__name__.lstrip("_")] = (sources, func)
+        return func
+
+    return decorator
+
+
+def source_digest(sources: tuple[str, ...]) -> str:
+    h = hashlib.blake2b(digest_size=16)
+    for source in sources:
+        h.update(Path(f"{__rootdir__}/data/{DATASETS[source]}").read_bytes())
+    return h.hexdigest()
+
+
+def code_digest(func: Callable[..., Any]) -> str:
+    """计算函数所在模块的源码哈希，同模块中被调用的辅助函数改动时缓存也会失效
+
+    打包后没有源码时退回到函数自身的字节码
+    """
+    h = hashlib.blake2b(digest_size=8)
+    try:
+        h.update(Path(inspect.getsourcefile(func)).read_bytes())
+    except (OSError, TypeError):
+        h.update(marshal.dumps(func.__code__))
+    return h.hexdigest()
+
+
+def build_index(name: str) -> Any:
+    from arknights_mower.utils.path import get_path
+
+    sources, func = INDEXES[name]
+    key = f"{source_digest(sources)}-{code_digest(func)}"
+    cache = get_path(f"@app/tmp/data/{name}-{key}.pkl")
+    try:
+        with cache.open("rb") as f:
+            return pickle.load(f)
+    except Exception:
+        pass
+    value = func(*(load(source) for source in sources))
+    try:
+        cache.parent.mkdir(parents=True, exist_ok=True)
+        with cache.open("wb") as f:
+            pickle.dump(value, f, pickle.HIGHEST_PROTOCOL)
+    except OSError:
+        pass
+    return value
+
+
+def load(name: str) -> Any:
+    """按名称取得数据集或索引，第一次调用时读取，之后直接返回缓存"""
+    if name in _loaded:
+        return _loaded[name]
+    if name not in DATASETS and name not in INDEXES:
+        raise KeyError(name)
+    with _locks.setdefault(name, Lock()):
+        if name not in _loaded:
+            if name in DATASETS:
+                path = Path(f"{__rootdir__}/data/{DATASETS[name]}")
+                _loaded[name] = json.loads(path.read_text("utf-8"))
+            else:
+                _loaded[name] = build_index(name)
+    return _loaded[name]
+
+
+@index("recruit_agent")
+def _recruit_tag(recruit_agent: dict) -> list[str]:
+    recruit_tag = ["资深干员", "高级资深干员"]
+    for x in recruit_agent.values():
+        recruit_tag += x["tags"]
+    return list(set(recruit_tag))
+
+
+@index("recruit_agent")
+def _agent_with_tags(recruit_agent: dict) -> dict[str, list[dict]]:
+    """按tag分类组合干员"""
+    agent_with_tags = {item: [] for item in _recruit_tag(recruit_agent)}
+    for agent, info in recruit_agent.items():
+        tags = set(info["tags"])
+        if len(tags) < 2:
+            continue
+        for item in tags:
+            agent_with_tags[item].append(
+                {"id": agent, "name": info["name"], "star": info["stars"]}
+            )
+    return agent_with_tags
 
-agent_arrange_order = json.loads(
-    Path(f"{__rootdir__}/data/arrange_order.json").read_text("utf-8")
-)
 
-# chapter name in English
-chapter_list = json.loads(Path(f"{__rootdir__}/data/chapter.json").read_text("utf-8"))
+@index("recruit_result")
+def _result_template_list(recruit_result: dict) -> list[str]:
+    return [name for item in recruit_result for name in recruit_result[item]]
 
-# list of supported levels
-level_list = json.loads(Path(f"{__rootdir__}/data/level.json").read_text("utf-8"))
 
-# open zones
-zone_list = json.loads(Path(f"{__rootdir__}/data/zone.json").read_text("utf-8"))
+@index("stage_data_full")
+def _stage_by_id(stage_data_full: list[dict]) -> dict[str, int]:
+    """关卡 id 到 stage_data_full 中第一个匹配项下标的映射"""
+    stage_by_id = {}
+    for i, item in enumerate(stage_data_full):
+        stage_by_id.setdefault(item.get("id"), i)
+    return stage_by_id
 
-# list of supported weekly levels
-weekly_zones = json.loads(Path(f"{__rootdir__}/data/weekly.json").read_text("utf-8"))
 
-# list of scene defined
-scene_list = json.loads(Path(f"{__rootdir__}/data/scene.json").read_text("utf-8"))
+@index("stage_data_full")
+def _stage_by_name(stage_data_full: list[dict]) -> dict[str, int]:
+    """关卡名称到 stage_data_full 中第一个匹配项下标的映射"""
+    stage_by_name = {}
+    for i, item in enumerate(stage_data_full):
+        stage_by_name.setdefault(item.get("name"), i)
+    return stage_by_name
 
-# recruit database
-recruit_agent = json.loads(Path(f"{__rootdir__}/data/recruit.json").read_text("utf-8"))
 
-recruit_result = json.loads(
-    Path(f"{__rootdir__}/data/recruit_result.json").read_text("utf-8")
-)
+@index("key_mapping")
+def _item_by_id(key_mapping: dict) -> dict[str, list]:
+    """key_mapping 同时以 id 和名称为键，这里只保留以 id 为键的项"""
+    return {key: value for key, value in key_mapping.items() if key == value[0]}
 
-key_mapping = json.loads(
-    Path(f"{__rootdir__}/data/key_mapping.json").read_text("utf-8")
-)
 
-recruit_tag = ["资深干员", "高级资深干员"]
-for x in recruit_agent.values():
-    recruit_tag += x["tags"]
-recruit_tag = list(set(recruit_tag))
+@index("key_mapping")
+def _item_by_name(key_mapping: dict) -> dict[str, list]:
+    """同名物品（如不同期限的改名卡）与 key_mapping 一样取同一项"""
+    return {key: value for key, value in key_mapping.items() if key == value[2]}
 
-"""
-按tag分类组合干员
-"""
 
-agent_with_tags = {}
-for item in recruit_tag:
-    agent_with_tags[item] = []
-    for agent in recruit_agent:
-        if {item} < set(recruit_agent[agent]["tags"]):
-            agent_with_tags[item].append(
-                {
-                    "id": agent,
-                    "name": recruit_agent[agent]["name"],
-                    "star": recruit_agent[agent]["stars"],
-                }
-            )
+def find_stage(key: str) -> Optional[dict]:
+    """按关卡 id 或名称查找关卡，两者都匹配时取 stage_data_full 中靠前的一项"""
+    candidates = [
+        i
+        for i in (load("stage_by_id").get(key), load("stage_by_name").get(key))
+        if i is not None
+    ]
+    return load("stage_data_full")[min(candidates)] if candidates else None
 
-result_template_list = []
 
-for item in recruit_result:
-    for name in recruit_result[item]:
-        result_template_list.append(name)
+def __getattr__(name: str) -> Any:
+    if name in DATASETS or name in INDEXES:
+        return load(name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -1,24 +1,63 @@
 import lzma
 import pickle
+import time
+from threading import Lock, Thread
+from typing import Any, Iterable, Optional
 
 from arknights_mower import __rootdir__
-
-with lzma.open(f"{__rootdir__}/models/avatar.pkl", "rb") as f:
-    avatar = pickle.load(f)
-
-
-with lzma.open(f"{__rootdir__}/models/secret_front.pkl", "rb") as f:
-    secret_front = pickle.load(f)
-
-
-with lzma.open(f"{__rootdir__}/models/navigation.pkl", "rb") as f:
-    navigation = pickle.load(f)
-
-with lzma.open(f"{__rootdir__}/models/riic_base_digits.pkl", "rb") as f:
-    riic_base_digits = pickle.load(f)
-
-with lzma.open(f"{__rootdir__}/models/noto_sans.pkl", "rb") as f:
-    noto_sans = pickle.load(f)
-
-with lzma.open(f"{__rootdir__}/models/shop.pkl", "rb") as f:
-    shop = pickle.load(f)
+from arknights_mower.utils.log import logger
+
+# 模型名称与文件名，首次访问时才解压并反序列化
+MODELS = {
+    "avatar": "avatar.pkl",
+    "secret_front": "secret_front.pkl",
+    "navigation": "navigation.pkl",
+    "riic_base_digits": "riic_base_digits.pkl",
+    "noto_sans": "noto_sans.pkl",
+    "shop": "shop.pkl",
+    "recruit": "recruit.pkl",
+    "recruit_result": "recruit_result.pkl",
+    "operator_select": "operator_select.model",
+    "operator_train": "operator_train.model",
+    "operator_room": "operator_room.model",
+    "svm": "svm.model",
+}
+
+_loaded: dict[str, Any] = {}
+_locks = {name: Lock() for name in MODELS}
+
+
+def load(name: str) -> Any:
+    """按名称取得模型，第一次调用时从文件加载，之后直接返回缓存"""
+    if name in _loaded:
+        return _loaded[name]
+    with _locks[name]:
+        if name not in _loaded:
+            start_time = time.perf_counter()
+            with lzma.open(f"{__rootdir__}/models/{MODELS[name]}", "rb") as f:
+                _loaded[name] = pickle.load(f)
+            logger.debug(
+                f"加载模型 {name} 用时 {time.perf_counter() - start_time:.3f}s"
+            )
+    return _loaded[name]
+
+
+def preload(names: Optional[Iterable[str]] = None) -> Thread:
+    """在后台线程中依次加载指定的模型（默认全部），加载失败的模型留到使用时再报错"""
+
+    def run():
+        for name in names or MODELS:
+            try:
+                load(name)
+            except Exception as e:
+                logger.debug(f"预加载模型 {name} 失败：{e}")
+
+    thread = Thread(target=run, daemon=True)
+    thread.start()
+    return thread
+
+
+def __getattr__(name: str) -> Any:
+    if name in MODELS:
+        return load(name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -4,8 +4,9 @@ import cv2
 from scipy.signal import argrelmax
 from skimage.metrics import structural_similarity
 
-from arknights_mower.models import avatar, secret_front
+from arknights_mower import models
 from arknights_mower.utils import typealias as tp
+from arknights_mower.utils.digit_reader import read_number
 from arknights_mower.utils.image import cropimg, loadres, thres2
 from arknights_mower.utils.log import logger
 from arknights_mower.utils.solver import BaseSolver
@@ -38,31 +39,7 @@ class AutoFight(BaseSolver):
     def number(self, scope: tp.Scope, height: int, thres: int) -> int:
         "数字识别"
         img = cropimg(self.recog.gray, scope)
-        default_height = 25
-        if height != default_height:
-            scale = 25 / height
-            img = cv2.resize(img, None, None, scale, scale)
-        img = thres2(img, thres)
-        contours, _ = cv2.findContours(img, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
-        rect = [cv2.boundingRect(c) for c in contours]
-        rect.sort(key=lambda c: c[0])
-
-        value = 0
-
-        for x, y, w, h in rect:
-            digit = cropimg(img, ((x, y), (x + w, y + h)))
-            digit = cv2.copyMakeBorder(
-                digit, 10, 10, 10, 10, cv2.BORDER_CONSTANT, None, (0,)
-            )
-            score = []
-            for i in range(10):
-                im = secret_front[i]
-                result = cv2.matchTemplate(digit, im, cv2.TM_SQDIFF_NORMED)
-                min_val, max_val, min_loc, max_loc = cv2.minMaxLoc(result)
-                score.append(min_val)
-            value = value * 10 + score.index(min(score))
-
-        return value
+        return read_number(img, "secret_front", height, thres=thres)
 
     def cost(self) -> int:
         "获取部署费用"
@@ -161,7 +138,7 @@ class AutoFight(BaseSolver):
             tpl = cv2.resize(tpl, None, None, 0.5, 0.5)
             max_score = 0
             name = None
-            for i, img_list in avatar.items():
+            for i, img_list in models.avatar.items():
                 for img in img_list:
                     result = cv2.matchTemplate(img, tpl, cv2.TM_CCOEFF_NORMED)
                     min_val, max_val, min_loc, max_loc = cv2.minMaxLoc(result)
@@ -1,25 +1,58 @@
-import lzma
-import pickle
 from datetime import datetime, timedelta
 
 import cv2
 import numpy as np
 
-from arknights_mower import __rootdir__
+from arknights_mower import models
 from arknights_mower.data import workshop_formula
 from arknights_mower.solvers.record import save_inventory_counts
-from arknights_mower.utils import rapidocr, segment
+from arknights_mower.utils import segment
 from arknights_mower.utils.character_recognize import operator_list, operator_list_train
 from arknights_mower.utils.csleep import MowerExit
 from arknights_mower.utils.image import cropimg, loadres, thres2
 from arknights_mower.utils.log import logger
 
-with lzma.open(f"{__rootdir__}/models/operator_room.model", "rb") as f:
-    OP_ROOM = pickle.loads(f.read())
-
 kernel = np.ones((12, 12), np.uint8)
 
 
+def operator_name_tpl(img):
+    """房间详情中干员名的二值化区域，裁掉空白后放进与模板对齐的画布"""
+    img = thres2(img, 200)
+    img = cv2.copyMakeBorder(img, 10, 10, 10, 10, cv2.BORDER_CONSTANT, None, (0,))
+    dilation = cv2.dilate(img, kernel, iterations=1)
+    contours, _ = cv2.findContours(dilation, cv2.RETR_TREE, cv2.CHAIN_APPROX_SIMPLE)
+    rect = map(lambda c: cv2.boundingRect(c), contours)
+    x, y, w, h = sorted(rect, key=lambda c: c[0])[0]
+    img = img[y : y + h, x : x + w]
+    tpl = np.zeros((46, 265), dtype=np.uint8)
+    tpl[: img.shape[0], : img.shape[1]] = img
+    return cv2.copyMakeBorder(tpl, 2, 2, 2, 2, cv2.BORDER_CONSTANT, None, (0,))
+
+
+def match_operator_names(imgs):
+    """一次识别多个位置的干员名，结果与逐个匹配相同
+
+    各位置的画布上下拼接，每个模板只匹配一次，再按画布切分得分
+    """
+    if not imgs:
+        return []
+    tpls = [operator_name_tpl(img) for img in imgs]
+    strip = np.vstack(tpls)
+    height = tpls[0].shape[0]
+    max_score = np.zeros(len(tpls))
+    best_operator = [None] * len(tpls)
+    for operator, template in models.operator_room.items():
+        result = cv2.matchTemplate(strip, template, cv2.TM_CCORR_NORMED)
+        rows = height - template.shape[0] + 1
+        # 补齐最后一块后按画布分块，每块只取完全落在该画布内的位置
+        result = np.pad(result, ((0, len(tpls) * height - len(result)), (0, 0)))
+        score = result.reshape(len(tpls), height, -1)[:, :rows].max(axis=(1, 2))
+        for k in np.flatnonzero(score > max_score):
+            max_score[k] = score[k]
+            best_operator[k] = operator
+    return best_operator
+
+
 class BaseMixin:
     profession_labels = [
         "ALL",
@@ -376,25 +409,7 @@ class BaseMixin:
                 return pos
 
     def read_operator_in_room(self, img):
-        img = thres2(img, 200)
-        img = cv2.copyMakeBorder(img, 10, 10, 10, 10, cv2.BORDER_CONSTANT, None, (0,))
-        dilation = cv2.dilate(img, kernel, iterations=1)
-        contours, _ = cv2.findContours(dilation, cv2.RETR_TREE, cv2.CHAIN_APPROX_SIMPLE)
-        rect = map(lambda c: cv2.boundingRect(c), contours)
-        x, y, w, h = sorted(rect, key=lambda c: c[0])[0]
-        img = img[y : y + h, x : x + w]
-        tpl = np.zeros((46, 265), dtype=np.uint8)
-        tpl[: img.shape[0], : img.shape[1]] = img
-        tpl = cv2.copyMakeBorder(tpl, 2, 2, 2, 2, cv2.BORDER_CONSTANT, None, (0,))
-        max_score = 0
-        best_operator = None
-        for operator, template in OP_ROOM.items():
-            result = cv2.matchTemplate(tpl, template, cv2.TM_CCORR_NORMED)
-            min_val, max_val, min_loc, max_loc = cv2.minMaxLoc(result)
-            if max_val > max_score:
-                max_score = max_val
-                best_operator = operator
-        return best_operator
+        return match_operator_names([img])[0]
 
     def read_screen(self, img, type="mood", limit=24, cord=None):
         if cord is not None:
@@ -403,11 +418,18 @@ class BaseMixin:
             img = cropimg(img, ((169, 22), (513, 80)))
             return self.read_operator_in_room(img)
         try:
-            ret = rapidocr.engine(img, use_det=False, use_cls=False, use_rec=True)[0]
-            logger.debug(ret)
-            if not ret or not ret[0][0]:
+            ret = self.recog.ocr_many([img], (type, limit))[0]
+        except Exception:
+            return limit + 1
+        return self.parse_screen_text(ret, type, limit)
+
+    @staticmethod
+    def parse_screen_text(ret, type="mood", limit=24):
+        logger.debug(ret)
+        try:
+            if not ret or not ret[0]:
                 raise Exception("识别失败")
-            ret = ret[0][0]
+            ret = ret[0]
             if "mood" in type:
                 if (f"/{limit}") in ret:
                     ret = ret.replace(f"/{limit}", "")
@@ -448,12 +470,7 @@ class BaseMixin:
             offset_x = 370
             offset_y = 125
             img = self.recog.img[offset_y:1040, offset_x:1860]
-            ocr_result = rapidocr.engine(
-                img,
-                use_det=True,
-                use_cls=False,
-                use_rec=True,
-            )
+            ocr_result = self.recog.ocr_many([img], "item_list", det=True)[0]
             res = []
             furniture_start_index = -1
             furniture_keys = [
@@ -465,7 +482,7 @@ class BaseMixin:
                 "家具零件_碳",
             ]
             base_idx = 0
-            for idx, item in enumerate(ocr_result[0]):
+            for idx, item in enumerate(ocr_result):
                 if item[1] == "家具零件" and furniture_start_index == -1:
                     furniture_start_index = base_idx
                 if (
@@ -516,13 +533,7 @@ class BaseMixin:
             self.recog.update()
             y1, y2, x1, x2 = cord
             img = self.recog.img[y1:y2, x1:x2]
-            ocr_result = rapidocr.engine(
-                img,
-                use_det=True,
-                use_cls=False,
-                use_rec=True,
-            )
-            text = ocr_result[0][0][1]
+            text = self.recog.ocr_many([img], "number", det=True)[0][0][1]
             score_str = text.split("/")[0]
             return int(score_str)
         except Exception as e:
@@ -534,13 +545,7 @@ class BaseMixin:
     def get_craft(self):
         try:
             img = self.recog.img[290:335, 95:200]
-            ocr_result = rapidocr.engine(
-                img,
-                use_det=True,
-                use_cls=False,
-                use_rec=True,
-            )
-            text = ocr_result[0][0][1]
+            text = self.recog.ocr_many([img], "number", det=True)[0][0][1]
             if text.find("/") == -1:
                 logger.exception("九色鹿技能识别失败")
                 return None
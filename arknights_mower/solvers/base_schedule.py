@@ -18,7 +18,7 @@ from arknights_mower.data import (
     base_room_list,
     workshop_formula,
 )
-from arknights_mower.solvers.base_mixin import BaseMixin
+from arknights_mower.solvers.base_mixin import BaseMixin, match_operator_names
 from arknights_mower.solvers.credit import CreditSolver
 from arknights_mower.solvers.cultivate_depot import cultivate as cultivateDepotSolver
 from arknights_mower.solvers.depotREC import depotREC as DepotSolver
@@ -34,7 +34,7 @@ from arknights_mower.solvers.report import ReportSolver
 from arknights_mower.solvers.secret_front import SecretFront
 from arknights_mower.solvers.shop import CreditShop
 from arknights_mower.solvers.skland import SKLand
-from arknights_mower.utils import config, detector, rapidocr
+from arknights_mower.utils import config, detector
 from arknights_mower.utils import typealias as tp
 from arknights_mower.utils.csleep import MowerExit, csleep
 from arknights_mower.utils.datetime import (
@@ -51,8 +51,10 @@ from arknights_mower.utils.operators import Operator, Operators
 from arknights_mower.utils.path import get_path
 from arknights_mower.utils.plan import PlanTriggerTiming
 from arknights_mower.utils.recognize import Recognizer, Scene
+from arknights_mower.utils.room_order import count_swipes, plan_visits
 from arknights_mower.utils.scheduler_task import (
     SchedulerTask,
+    TaskQueue,
     TaskTypes,
     check_dorm_ordering,
     find_next_task,
@@ -65,6 +67,17 @@ from arknights_mower.utils.scheduler_task import (
 from arknights_mower.utils.simulator import restart_simulator
 from arknights_mower.utils.trading_order import TradingOrder
 
+# 房间详情中各位置的干员名、心情、时间区域
+room_name_p = [
+    ((1288, y0), (1869, y1))
+    for y0, y1 in [(135, 326), (344, 535), (553, 744), (532, 723), (741, 932)]
+]
+room_time_p = [
+    ((1650, y0), (1780, y1))
+    for y0, y1 in [(270, 305), (480, 515), (690, 725), (668, 703), (877, 912)]
+]
+room_mood_p = [((1470, y), (1780, y + 1)) for y in (219, 428, 637, 615, 823)]
+
 
 class BaseSchedulerSolver(SceneGraphSolver, BaseMixin):
     """
@@ -122,6 +135,14 @@ class BaseSchedulerSolver(SceneGraphSolver, BaseMixin):
             self.tasks, compare_time, task_type, compare_type, meta_data
         )
 
+    @property
+    def tasks(self) -> TaskQueue:
+        return self._tasks
+
+    @tasks.setter
+    def tasks(self, value):
+        self._tasks = value if isinstance(value, TaskQueue) else TaskQueue(value)
+
     @property
     def party_time(self):
         return self._party_time
@@ -416,11 +437,7 @@ class BaseSchedulerSolver(SceneGraphSolver, BaseMixin):
         task = self.task
         try:
             self.enter_room("factory")
-            current_agent = [
-                key
-                for key, value in self.op_data.operators.items()
-                if value.current_room == "factory"
-            ]
+            current_agent = [op.name for op in self.op_data.operators_in("factory")]
             agent_room = (
                 self.op_data.operators[task.meta_data].current_room
                 if task.meta_data in self.op_data.operators
@@ -677,6 +694,29 @@ class BaseSchedulerSolver(SceneGraphSolver, BaseMixin):
 
         return room
 
+    def shift_rooms(self, rooms, minutes=10):
+        """rooms 中即将被换班任务进入的房间
+
+        换班后会重新读取房间内所有干员的心情，房间内干员都有过心情记录时可以合并
+        """
+        deadline = datetime.now() + timedelta(minutes=minutes)
+        shift_types = [
+            TaskTypes.SHIFT_ON,
+            TaskTypes.SHIFT_OFF,
+            TaskTypes.EXHAUST_OFF,
+            TaskTypes.SELF_CORRECTION,
+        ]
+        planned = set()
+        for task in self.tasks:
+            if task.time < deadline and task.type in shift_types:
+                planned.update(task.plan)
+        return {
+            room
+            for room in rooms
+            if room in planned
+            and all(op.time_stamp for op in self.op_data.operators_in(room))
+        }
+
     def agent_get_mood(self, skip_dorm=False, force=False):
         # 暂时规定纠错只适用于主班表
         need_read = set(
@@ -684,14 +724,10 @@ class BaseSchedulerSolver(SceneGraphSolver, BaseMixin):
             for k, v in self.op_data.operators.items()
             if v.need_to_refresh() and v.room in base_room_list
         )
+        visit_rooms = []
         for room in need_read:
-            error_count = 0
             # 由于训练室不纠错，如果训练室有干员且时间读取过就跳过
-            current_working = [
-                value
-                for key, value in self.op_data.operators.items()
-                if value.current_room == room
-            ]
+            current_working = self.op_data.operators_in(room)
 
             if current_working and all(
                 operator.time_stamp
@@ -706,6 +742,23 @@ class BaseSchedulerSolver(SceneGraphSolver, BaseMixin):
                     logger.debug(e.time_stamp)
                 logger.debug(f"{room} 所有干员不满足扫描条件，跳过")
                 continue
+            visit_rooms.append(room)
+        # 即将换班的房间换班后会读取心情，这次不再单独进入
+        merged_rooms = set() if force else self.shift_rooms(visit_rooms)
+        visit_rooms = [room for room in visit_rooms if room not in merged_rooms]
+        ordered_rooms = plan_visits(visit_rooms)
+        saved = (
+            count_swipes(visit_rooms)
+            - count_swipes(ordered_rooms)
+            + 2 * len(merged_rooms)
+        )
+        if saved > 0:
+            logger.info(
+                f"心情读取顺序：{[self.translate_room(r) for r in ordered_rooms]}，"
+                f"与换班合并 {len(merged_rooms)} 个房间，节省 {saved} 次界面切换"
+            )
+        for room in ordered_rooms:
+            error_count = 0
             while True:
                 try:
                     self.enter_room(room)
@@ -766,7 +819,11 @@ class BaseSchedulerSolver(SceneGraphSolver, BaseMixin):
                         need_fix = True
                     fix_plan[key][idx] = plan[key][idx].agent
         # 最后如果有任何高效组心情没有记录 或者高效组在宿舍
-        miss_list = {k: v for (k, v) in self.op_data.operators.items() if v.not_valid()}
+        miss_list = {
+            k: v
+            for (k, v) in self.op_data.operators.items()
+            if v.not_valid() and v.current_room not in merged_rooms
+        }
         if len(miss_list.keys()) > 0:
             # 替换到他应该的位置
             logger.debug(f"高效组心情没有记录{str(miss_list)}")
@@ -1581,7 +1638,8 @@ class BaseSchedulerSolver(SceneGraphSolver, BaseMixin):
             for k, v in self.op_data.operators.items()
             if v.is_high() and not v.room.startswith("dorm")
         )
-        self.total_agent.sort(key=lambda x: x.current_mood(), reverse=False)
+        moods = self.op_data.mood_table().moods()
+        self.total_agent.sort(key=lambda x: moods[x.name], reverse=False)
         # 目前有换班的计划后面改
         logger.debug(f"当前基地数据--> {self.total_agent}")
         new_plan = {}
@@ -1617,8 +1675,9 @@ class BaseSchedulerSolver(SceneGraphSolver, BaseMixin):
             self.backup_plan_solver()
 
     def resting(self):
+        moods = self.op_data.mood_table().moods()
         self.total_agent.sort(
-            key=lambda x: x.current_mood() - x.lower_limit, reverse=False
+            key=lambda x: moods[x.name] - x.lower_limit, reverse=False
         )
         self.plan_metadata()
         current_resting = (
@@ -1626,10 +1685,13 @@ class BaseSchedulerSolver(SceneGraphSolver, BaseMixin):
             - self.op_data.available_free()
             - self.op_data.available_free("low")
         )
+        # available_free 会更新休息完毕的干员心情，之后重新取一次
+        table = self.op_data.mood_table()
+        moods = table.moods()
         # 阈值暂定为 0.5
         self.ideal_resting_count = (
             4
-            if self.op_data.average_mood()
+            if self.op_data.average_mood(table)
             > self.op_data.config.resting_threshold * config.conf.rescue_threshold
             else len(self.op_data.dorm)
         )
@@ -1651,13 +1713,13 @@ class BaseSchedulerSolver(SceneGraphSolver, BaseMixin):
             ):
                 continue
             # 忽略掉心情太高的
-            if op.upper_limit - op.current_mood() < 2:
+            if op.upper_limit - moods[op.name] < 2:
                 continue
             # 忽略 用尽，已经处理
             if op.name in self.op_data.exhaust_agent:
                 continue
             # 忽略掉心情值没低于上限的的
-            if op.current_mood() > int(
+            if moods[op.name] > int(
                 (op.upper_limit - op.lower_limit)
                 * self.op_data.config.resting_threshold
                 + op.lower_limit
@@ -2082,13 +2144,8 @@ class BaseSchedulerSolver(SceneGraphSolver, BaseMixin):
                         name_img = cv2.copyMakeBorder(
                             name_img, 48, 48, 48, 48, cv2.BORDER_REPLICATE
                         )
-                        name = rapidocr.engine(
-                            name_img,
-                            use_det=True,
-                            use_cls=False,
-                            use_rec=True,
-                        )[0][0][1]
-                        name = name.strip() if name else "好友"
+                        name = self.recog.ocr_many([name_img], "clue", det=True)[0]
+                        name = name[0][1].strip() if name else "好友"
                         logger.info(f"接收{name}的{clue}号线索")
                         self.tap(name_scope)
                     else:
@@ -2118,6 +2175,7 @@ class BaseSchedulerSolver(SceneGraphSolver, BaseMixin):
                         continue
                     clue_pos = ((1305, 208), (1305, 503), (1305, 797))
                     clue_list = []
+                    rois = []
                     for cp in clue_pos:
                         clue_img = cropimg(self.recog.img, tl2p(cp))
                         res = loadres(f"clue/{cl}")
@@ -2126,17 +2184,12 @@ class BaseSchedulerSolver(SceneGraphSolver, BaseMixin):
                         if max_val > tm_thres:
                             name_scope = (va(cp, (274, 99)), va(cp, (580, 134)))
                             name_img = cropimg(self.recog.gray, name_scope)
-                            name_img = cv2.copyMakeBorder(
-                                name_img, 48, 48, 48, 48, cv2.BORDER_REPLICATE
+                            name = len(rois)
+                            rois.append(
+                                cv2.copyMakeBorder(
+                                    name_img, 48, 48, 48, 48, cv2.BORDER_REPLICATE
+                                )
                             )
-                            name = rapidocr.engine(
-                                name_img,
-                                use_det=True,
-                                use_cls=False,
-                                use_rec=True,
-                            )[0][0][1]
-                            if name:
-                                name = name.strip()
                             time_scope = (va(cp, (45, 222)), va(cp, (168, 255)))
                             time_hsv = cropimg(self.recog.img, time_scope)
                             time_hsv = cv2.cvtColor(time_hsv, cv2.COLOR_RGB2HSV)
@@ -2144,17 +2197,12 @@ class BaseSchedulerSolver(SceneGraphSolver, BaseMixin):
                                 time_img = thres2(
                                     cropimg(self.recog.gray, time_scope), 180
                                 )
-                                time_img = cv2.copyMakeBorder(
-                                    time_img, 48, 48, 48, 48, cv2.BORDER_REPLICATE
+                                time = len(rois)
+                                rois.append(
+                                    cv2.copyMakeBorder(
+                                        time_img, 48, 48, 48, 48, cv2.BORDER_REPLICATE
+                                    )
                                 )
-                                time = rapidocr.engine(
-                                    time_img,
-                                    use_det=True,
-                                    use_cls=False,
-                                    use_rec=True,
-                                )[0][0][1]
-                                if time:
-                                    time = time.strip()
                             else:
                                 time = None
                             clue_list.append(
@@ -2162,6 +2210,15 @@ class BaseSchedulerSolver(SceneGraphSolver, BaseMixin):
                             )
                         else:
                             break
+                    # 同一屏的线索名字与剩余时间一次批量检测识别
+                    texts = [
+                        res[0][1].strip() if res else None
+                        for res in self.recog.ocr_many(rois, "clue", det=True)
+                    ]
+                    for c in clue_list:
+                        c["name"] = texts[c["name"]]
+                        if c["time"] is not None:
+                            c["time"] = texts[c["time"]]
                     if clue_list:
                         list_name = "接收库" if receive else "自有库"
                         logger.info(f"{cl}号线索{list_name}：{clue_list}")
@@ -2670,25 +2727,8 @@ class BaseSchedulerSolver(SceneGraphSolver, BaseMixin):
             free_list.remove(train_support)
         return free_list
 
-    def choose_agent(
-        self, agents: list[str], room: str, fast_mode=True, train_index=0
-    ) -> None:
-        """
-        :param order: ArrangeOrder, 选择干员时右上角的排序功能
-        """
-        first_name = ""
-        max_swipe = 50
-        position = [
-            (0.35, 0.35),
-            (0.35, 0.75),
-            (0.45, 0.35),
-            (0.45, 0.75),
-            (0.55, 0.35),
-        ]
-        # 空位置跳过安排
-        if "" in agents:
-            fast_mode = False
-            agents = [item for item in agents if item != ""]
+    def prepare_agents(self, agents: list[str], room: str) -> None:
+        """去掉重复的干员，宿舍中满心情的干员换成 Free"""
         current_list = set()
         for idx, n in enumerate(agents):
             if n not in current_list:
@@ -2711,6 +2751,27 @@ class BaseSchedulerSolver(SceneGraphSolver, BaseMixin):
                             and current_free.mood < current_free.upper_limit
                         ):
                             agents[idx] = current_free.name
+
+    def choose_agent(
+        self, agents: list[str], room: str, fast_mode=True, train_index=0
+    ) -> None:
+        """
+        :param order: ArrangeOrder, 选择干员时右上角的排序功能
+        """
+        first_name = ""
+        max_swipe = 50
+        position = [
+            (0.35, 0.35),
+            (0.35, 0.75),
+            (0.45, 0.35),
+            (0.45, 0.75),
+            (0.55, 0.35),
+        ]
+        # 空位置跳过安排
+        if "" in agents:
+            fast_mode = False
+            agents = [item for item in agents if item != ""]
+        self.prepare_agents(agents, room)
         agent = copy.deepcopy(agents)
         exists = []
         if fast_mode:
@@ -2975,9 +3036,8 @@ class BaseSchedulerSolver(SceneGraphSolver, BaseMixin):
         self.reset_room_time(room)
         raise Exception("未成功进入房间")
 
-    def get_agent_from_room(self, room, read_time_index=None):
-        if read_time_index is None:
-            read_time_index = []
+    def open_room_detail(self, room):
+        """打开房间详情，并把干员列表滚动到顶部"""
         if room == "meeting" and not self.leifeng_mode:
             self.sleep(0.5)
             self.recog.update()
@@ -2988,18 +3048,10 @@ class BaseSchedulerSolver(SceneGraphSolver, BaseMixin):
                 self.clue_count = clue_res
                 logger.info(f"当前拥有线索数量为{self.clue_count}")
         self.turn_on_room_detail(room)
-        # 如果是宿舍则全读取
-        if room.startswith("dorm"):
-            read_time_index = [
-                i
-                for i, obj in enumerate(self.op_data.plan[room])
-                if obj.agent == "Free" or obj.agent == "菲亚梅塔"
-            ]
         while self.detect_product_complete():
             logger.info("检测到产物收取提示")
             self.sleep(1)
-        length = len(self.op_data.plan[room])
-        if length > 3:
+        if len(self.op_data.plan[room]) > 3:
             while self.get_color((1800, 138))[0] > 51:
                 self.swipe(
                     (self.recog.w * 0.8, self.recog.h * 0.5),
@@ -3007,35 +3059,58 @@ class BaseSchedulerSolver(SceneGraphSolver, BaseMixin):
                     duration=500,
                     interval=1,
                 )
-        name_x = (1288, 1869)
-        name_y = [(135, 326), (344, 535), (553, 744), (532, 723), (741, 932)]
-        name_p = [tuple(zip(name_x, y)) for y in name_y]
-        time_x = (1650, 1780)
-        time_y = [(270, 305), (480, 515), (690, 725), (668, 703), (877, 912)]
-        time_p = [tuple(zip(time_x, y)) for y in time_y]
-        mood_x = (1470, 1780)
-        mood_y = (219, 428, 637, 615, 823)
-        mood_y = [(y, y + 1) for y in mood_y]
-        mood_p = [tuple(zip(mood_x, y)) for y in mood_y]
+
+    def read_room_names(self, room, slots):
+        """读取房间详情中同一屏若干位置的干员名，空位为空字符串
+
+        第 4 个位置起需要先把干员列表滚动到底部；同一屏的名字一次批量匹配
+        """
+        if 3 in slots:
+            while self.get_color((1800, 930))[0] > 51:
+                self.swipe(
+                    (self.recog.w * 0.8, self.recog.h * 0.5),
+                    (0, -self.recog.h * 0.45),
+                    duration=500,
+                    interval=1,
+                )
+        names = {}
+        crops = {}
+        for i in slots:
+            if self.find("infra_no_operator", scope=room_name_p[i]):
+                names[i] = ""
+            else:
+                crop = cropimg(self.recog.gray, room_name_p[i])
+                crops[i] = cropimg(crop, ((169, 22), (513, 80)))
+        names.update(zip(crops, match_operator_names(list(crops.values()))))
+        return [names[i] for i in slots]
+
+    def read_room_mood(self, room, i):
+        return self.read_accurate_mood(cropimg(self.recog.gray, room_mood_p[i]))
+
+    def read_room_time(self, room, i):
+        return self.double_read_time(room_time_p[i], use_digit_reader=True)
+
+    def get_agent_from_room(self, room, read_time_index=None):
+        if read_time_index is None:
+            read_time_index = []
+        self.open_room_detail(room)
+        # 如果是宿舍则全读取
+        if room.startswith("dorm"):
+            read_time_index = [
+                i
+                for i, obj in enumerate(self.op_data.plan[room])
+                if obj.agent == "Free" or obj.agent == "菲亚梅塔"
+            ]
+        length = len(self.op_data.plan[room])
         result = []
-        swiped = False
+        names = {}
         for i in range(0, length):
-            if i >= 3 and not swiped:
-                while self.get_color((1800, 930))[0] > 51:
-                    self.swipe(
-                        (self.recog.w * 0.8, self.recog.h * 0.5),
-                        (0, -self.recog.h * 0.45),
-                        duration=500,
-                        interval=1,
-                    )
-                swiped = True
             data = {}
-            if self.find("infra_no_operator", scope=name_p[i]):
-                _name = ""
-            else:
-                _name = self.read_screen(
-                    cropimg(self.recog.gray, name_p[i]), type="name"
-                )
+            if i not in names:
+                # 前 3 个位置在第一屏，其余在滚动后的一屏
+                slots = list(range(i, min(length, 3) if i < 3 else length))
+                names.update(zip(slots, self.read_room_names(room, slots)))
+            _name = names[i]
             _mood = 24
             # 如果房间不为空
             update_time = False
@@ -3049,7 +3124,7 @@ class BaseSchedulerSolver(SceneGraphSolver, BaseMixin):
                     or (self.tasks and self.tasks[0].type == TaskTypes.SHIFT_ON)
                     or i in read_time_index
                 ):
-                    _mood = self.read_accurate_mood(cropimg(self.recog.gray, mood_p[i]))
+                    _mood = self.read_room_mood(room, i)
                     update_time = True
                 else:
                     _mood = self.op_data.operators[_name].current_mood()
@@ -3071,9 +3146,7 @@ class BaseSchedulerSolver(SceneGraphSolver, BaseMixin):
                     data["time"] = datetime.now()
                 else:
                     logger.debug(f"开始记录时间:{room},{i}")
-                    data["time"] = self.double_read_time(
-                        time_p[i], use_digit_reader=True
-                    )
+                    data["time"] = self.read_room_time(room, i)
                 self.op_data.refresh_dorm_time(room, i, data)
                 logger.debug(f"停止记录时间:{str(data)}")
             result.append(data)
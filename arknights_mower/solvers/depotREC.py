@@ -1,9 +1,8 @@
 import json
-import lzma
-import os
-import pickle
 import re
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
+from time import perf_counter
 
 import cv2
 import numpy as np
@@ -14,8 +13,9 @@ from arknights_mower.utils import depot
 from arknights_mower.utils.graph import SceneGraphSolver
 
 from .. import __rootdir__
+from ..utils.depot_index import 加载物品分类器
 from ..utils.device.device import Device
-from ..utils.image import loadimg
+from ..utils.digit_reader import get_templates
 from ..utils.log import logger
 from ..utils.path import get_path
 from ..utils.recognize import Recognizer, Scene
@@ -29,15 +29,6 @@ from ..utils.recognize import Recognizer, Scene
 # [140:1000, :]
 
 
-def 导入_数字模板():
-    模板文件夹 = f"{__rootdir__}/resources/depot_num"
-    数字模板列表 = []
-    for 文件名 in sorted(os.listdir(模板文件夹)):
-        文件路径 = os.path.join(模板文件夹, 文件名)
-        数字模板列表.append(loadimg(文件路径, True))
-    return 数字模板列表
-
-
 def 提取特征点(模板):
     模板 = 模板[40:173, 40:173]
     hog_features = hog(
@@ -52,6 +43,13 @@ def 提取特征点(模板):
     return hog_features
 
 
+def 批量提取特征点(物品列表):
+    """一次算出一页所有物品的特征"""
+    if not 物品列表:
+        return np.empty((0, 0))
+    return np.stack([提取特征点(物品) for 物品 in 物品列表])
+
+
 def 识别空物品(物品灰):
     物品灰 = 物品灰[0:130, 130:260]
     _, 二值图 = cv2.threshold(物品灰, 60, 255, cv2.THRESH_BINARY)
@@ -85,6 +83,17 @@ def 切图(圆心x坐标, 圆心y坐标, 拼接结果, 正方形边长=130):
     return 图片
 
 
+def 估计滚动偏移(旧图, 新图, 模板宽度=300, 右边距=120):
+    """在新截图中寻找旧截图靠右的一段竖条，返回内容向左滚动的像素数与匹配得分"""
+    旧灰 = cv2.cvtColor(旧图, cv2.COLOR_RGB2GRAY)
+    新灰 = cv2.cvtColor(新图, cv2.COLOR_RGB2GRAY)
+    x = 旧灰.shape[1] - 右边距 - 模板宽度
+    模板 = 旧灰[:, x : x + 模板宽度]
+    结果 = cv2.matchTemplate(新灰, 模板, cv2.TM_CCOEFF_NORMED)
+    _, 得分, _, 位置 = cv2.minMaxLoc(结果)
+    return x - 位置[0], 得分
+
+
 class depotREC(SceneGraphSolver):
     def __init__(self, device: Device = None, recog: Recognizer = None) -> None:
         super().__init__(device, recog)
@@ -99,13 +108,13 @@ class depotREC(SceneGraphSolver):
 
         self.仓库输出 = get_path("@app/tmp/depotresult.csv")
 
-        with lzma.open(f"{__rootdir__}/models/CONSUME.pkl", "rb") as pkl:
-            self.knn模型_CONSUME = pickle.load(pkl)
-        with lzma.open(f"{__rootdir__}/models/NORMAL.pkl", "rb") as pkl:
-            self.knn模型_NORMAL = pickle.load(pkl)
-        self.物品数字 = 导入_数字模板()
+        self.knn模型_CONSUME = 加载物品分类器(f"{__rootdir__}/models/CONSUME")
+        self.knn模型_NORMAL = 加载物品分类器(f"{__rootdir__}/models/NORMAL")
+        self.物品数字 = get_templates("depot_num")
 
         self.结果字典 = {}
+        self.滚动扫描 = True
+        self.最多滑动次数 = 30
 
         logger.info(f"仓库扫描: 吟唱用时{datetime.now() - start_time}")
 
@@ -116,25 +125,17 @@ class depotREC(SceneGraphSolver):
         return 切图列表
 
     def 读取物品数字(self, 数字图片, 距离阈值=5, 阈值=0.85):
-        结果 = {}
-        for idx, 模板图片 in enumerate(self.物品数字):
-            res = cv2.matchTemplate(数字图片, 模板图片, cv2.TM_CCORR_NORMED)
-            loc = np.where(res >= 阈值)
-            for i in range(len(loc[0])):
-                pos_x = loc[1][i]
-                accept = True
-                for o in 结果:
-                    if abs(o - pos_x) < 距离阈值:
-                        accept = False
-                        break
-                if accept:
-                    结果[loc[1][i]] = idx
+        return self.批量读取物品数字([数字图片], 距离阈值, 阈值)[0]
+
+    def 批量读取物品数字(self, 数字图片列表, 距离阈值=5, 阈值=0.85):
+        结果列表 = self.物品数字.scan_many(数字图片列表, 阈值, 距离阈值)
+        return [self.格式化物品数字(结果) for 结果 in 结果列表]
 
+    @staticmethod
+    def 格式化物品数字(结果):
         物品个数 = ""
-        for k in sorted(结果):
-            物品个数 += (
-                str(结果[k]) if 结果[k] < 10 else ("万" if 结果[k] == 10 else ".")
-            )
+        for k in 结果:
+            物品个数 += str(k) if k < 10 else ("万" if k == 10 else ".")
 
         if not 物品个数:
             return 999999
@@ -145,11 +146,25 @@ class depotREC(SceneGraphSolver):
         )
         return 格式化数字
 
-    def 匹配物品一次(self, 物品, 物品灰, 模型名称):
-        物品特征 = 提取特征点(物品)
-        predicted_label = 模型名称.predict([物品特征])
-        物品数字 = self.读取物品数字(物品灰)
-        return [predicted_label[0], 物品数字]
+    def 批量匹配物品(self, 切图列表, 模型名称):
+        """整页物品一起提取特征、一次预测，再读取数字，并记录各阶段用时"""
+        开始 = perf_counter()
+        物品特征 = 批量提取特征点([物品 for 物品, _, _ in 切图列表])
+        特征用时 = perf_counter() - 开始
+
+        开始 = perf_counter()
+        predicted_label = 模型名称.predict(物品特征)
+        分类用时 = perf_counter() - 开始
+
+        开始 = perf_counter()
+        物品数字 = self.批量读取物品数字([物品灰 for _, 物品灰, _ in 切图列表])
+        数字用时 = perf_counter() - 开始
+
+        logger.info(
+            f"仓库扫描: {len(切图列表)}个物品，特征提取{特征用时:.3f}s，"
+            f"分类{分类用时:.3f}s，数字识别{数字用时:.3f}s"
+        )
+        return [list(结果) for 结果 in zip(predicted_label, 物品数字)]
 
     def run(self) -> None:
         logger.info("Start: 仓库扫描")
@@ -203,16 +218,61 @@ class depotREC(SceneGraphSolver):
         return similarity * 100
 
     def 分类扫描(self, 模型名称):
-        截图列表 = []
-        旧的截图 = self.recog.img
-        旧的截图 = 旧的截图[140:1000, :]
-        截图列表.append(旧的截图)
-        self.recog.update()
-        拼接好的图片 = 截图列表[0]
-        切图列表 = self.切图主程序(拼接好的图片)
-        logger.info(f"仓库扫描: 需要识别{len(切图列表)}个物品")
-
-        for [物品, 物品灰, id] in 切图列表:
-            [物品名称, 物品数字] = self.匹配物品一次(物品, 物品灰, 模型名称)
+        if self.滚动扫描:
+            结果列表 = self.滚动识别(模型名称)
+        else:
+            拼接好的图片 = self.recog.img[140:1000, :]
+            切图列表 = self.切图主程序(拼接好的图片)
+            logger.info(f"仓库扫描: 需要识别{len(切图列表)}个物品")
+            if not 切图列表:
+                return
+            结果列表 = self.批量匹配物品(切图列表, 模型名称)
+        for [物品名称, 物品数字] in 结果列表:
             logger.debug([物品名称, 物品数字])
             self.结果字典[物品名称] = self.结果字典.get(物品名称, 0) + 物品数字
+
+    def 滚动识别(self, 模型名称, 阈值=0.8, 最小偏移=10):
+        """向左滑动浏览整个分类，按估计的滚动偏移把截图拼成长条
+
+        每列物品完整出现在长条中后只切图识别一次，识别在后台线程中进行，
+        与下一次滑动和截图同时进行；滑不动或无法对齐时视为到达列表末尾
+        """
+        横坐标, 间隔, 纵坐标 = 188, 234, [144, 430, 715]
+        长条 = self.recog.img[140:1000, :]
+        长条起点 = 0  # 长条第 0 列在整个分类中的横坐标
+        下一列 = 0
+        任务列表 = []
+        with ThreadPoolExecutor(max_workers=1) as 线程池:
+            for 次数 in range(self.最多滑动次数 + 1):
+                列坐标 = []
+                while (x := 横坐标 + 间隔 * 下一列) + 130 <= 长条起点 + 长条.shape[1]:
+                    列坐标.append(x - 长条起点)
+                    下一列 += 1
+                if 列坐标:
+                    切图列表 = 切图(列坐标, 纵坐标, 长条)
+                    logger.info(f"仓库扫描: 新增{len(切图列表)}个物品")
+                    if 切图列表:
+                        任务列表.append(
+                            线程池.submit(self.批量匹配物品, 切图列表, 模型名称)
+                        )
+                    # 已经识别过的列不再保留
+                    裁剪 = 横坐标 + 间隔 * 下一列 - 130 - 长条起点
+                    长条 = 长条[:, 裁剪:]
+                    长条起点 += 裁剪
+                if 次数 == self.最多滑动次数:
+                    logger.warning("仓库扫描: 达到最多滑动次数")
+                    break
+
+                旧图 = self.recog.img[140:1000, :]
+                self.swipe_noinertia((1400, 540), (-800, 0), interval=0.5)
+                新图 = self.recog.img[140:1000, :]
+                偏移, 得分 = 估计滚动偏移(旧图, 新图)
+                logger.debug(f"仓库扫描: 滚动偏移{偏移}，匹配得分{得分:.3f}")
+                if 得分 < 阈值:
+                    logger.warning("仓库扫描: 前后截图无法对齐，停止滑动")
+                    break
+                if 偏移 < 最小偏移:
+                    logger.info("仓库扫描: 到达列表末尾")
+                    break
+                长条 = np.hstack([长条, 新图[:, 新图.shape[1] - 偏移 :]])
+            return [结果 for 任务 in 任务列表 for 结果 in 任务.result()]
@@ -1,12 +1,18 @@
+import json
+from functools import cache
+from typing import Optional
+
 import cv2
+import numpy as np
 
-from arknights_mower.data import stage_data_full
-from arknights_mower.models import navigation
+from arknights_mower import models
+from arknights_mower.data import find_stage
 from arknights_mower.solvers.base_mixin import BaseMixin
 from arknights_mower.utils import rapidocr
 from arknights_mower.utils.graph import SceneGraphSolver
 from arknights_mower.utils.image import thres2
 from arknights_mower.utils.log import logger
+from arknights_mower.utils.path import get_path
 from arknights_mower.utils.scene import Scene
 from arknights_mower.utils.vector import va, vs
 
@@ -144,20 +150,167 @@ difficulty_str = [
 ]
 
 
+@cache
+def level_template(name: str, scale: int) -> np.ndarray:
+    template = models.navigation[name]
+    h, w = template.shape
+    return cv2.resize(template, (w // scale, h // scale), interpolation=cv2.INTER_AREA)
+
+
+class LevelLocator:
+    """在关卡选择界面定位关卡标签
+
+    只在关卡标签所在的横条内、缩小 scale 倍后搜索，取 candidates 个候选位置在原尺寸上确认，
+    得分低于 threshold 时提前结束；
+    记住上一次关卡图原点在屏幕上的位置，滑动后先搜索预计在屏幕中央附近的关卡
+    """
+
+    def __init__(
+        self, prefix, scale: int = 2, threshold: float = 0.02, candidates: int = 3
+    ) -> None:
+        self.prefix = prefix
+        self.stages = location[prefix]
+        self.scale = scale
+        self.threshold = threshold
+        self.candidates = candidates
+        self.origin = None
+        self.searched = 0
+        # 名称是其他关卡名称前缀的模板可能匹配到更长的关卡名，不能据此提前结束
+        self.ambiguous = {
+            n
+            for n in self.stages
+            if any(m != n and m.startswith(n) for m in self.stages)
+        }
+
+    def band(self, height: int) -> tuple[int, int]:
+        if self.origin is None:
+            return 0, height
+        ys = [y for _, y in self.stages.values()]
+        th = max(models.navigation[name].shape[0] for name in self.stages)
+        top = self.origin[1] + min(ys) - 20
+        bottom = self.origin[1] + max(ys) + th + 20
+        return max(top, 0), min(bottom, height)
+
+    def order(self, width: int) -> list[str]:
+        names = list(self.stages)
+        if self.origin is not None:
+            names.sort(
+                key=lambda n: abs(self.origin[0] + self.stages[n][0] - width // 2)
+            )
+        return names
+
+    def refine(
+        self, gray: np.ndarray, name: str, loc: tuple[int, int]
+    ) -> tuple[float, tuple[int, int]]:
+        """在原尺寸上缩小后匹配位置的附近重新匹配，返回得分与准确位置"""
+        template = models.navigation[name]
+        th, tw = template.shape
+        height, width = gray.shape
+        x0 = max(loc[0] - self.scale, 0)
+        y0 = max(loc[1] - self.scale, 0)
+        x1 = min(loc[0] + tw + 2 * self.scale, width)
+        y1 = min(loc[1] + th + 2 * self.scale, height)
+        result = cv2.matchTemplate(gray[y0:y1, x0:x1], template, cv2.TM_SQDIFF_NORMED)
+        min_val, _, (x, y), _ = cv2.minMaxLoc(result)
+        return min_val, (x0 + x, y0 + y)
+
+    def locate(self, gray: np.ndarray) -> tuple[str, tuple[int, int]]:
+        """返回匹配到的关卡名与其在屏幕上的左上角坐标"""
+        height, width = gray.shape
+        top, bottom = self.band(height)
+        small = cv2.resize(
+            gray[top:bottom],
+            (width // self.scale, (bottom - top) // self.scale),
+            interpolation=cv2.INTER_AREA,
+        )
+        val, name, loc = 1, None, None
+        self.searched = 0
+        for i in self.order(width):
+            template = level_template(i, self.scale)
+            if template.shape[0] > small.shape[0] or template.shape[1] > small.shape[1]:
+                continue
+            result = cv2.matchTemplate(small, template, cv2.TM_SQDIFF_NORMED)
+            th, tw = template.shape
+            # 相似的关卡名在缩小后难以区分，取几个候选位置在原尺寸上比较
+            min_val, min_loc = 1, None
+            for _ in range(self.candidates):
+                _, _, (x, y), _ = cv2.minMaxLoc(result)
+                candidate = self.refine(gray, i, (x * self.scale, y * self.scale + top))
+                if candidate[0] < min_val:
+                    min_val, min_loc = candidate
+                result[max(y - th, 0) : y + th, max(x - tw, 0) : x + tw] = 1
+            self.searched += 1
+            if min_val < val:
+                val, name, loc = min_val, i, min_loc
+            if min_val < self.threshold and i not in self.ambiguous:
+                break
+        if name is None and (top > 0 or bottom < height):
+            # 横条内没有找到时退回到全屏搜索
+            self.origin = None
+            return self.locate(gray)
+
+        self.origin = vs(loc, self.stages[name])
+        logger.debug(
+            f"关卡定位：{name} {loc} 得分{val:.3f}，搜索了{self.searched}个模板"
+        )
+        return name, loc
+
+
+class NavigationMemo:
+    """按关卡保存成功导航时从终端开始的操作序列
+
+    每一步记录操作前的场景、操作及其参数，关卡选择界面的操作还记录作为锚点的关卡标签位置
+    """
+
+    def __init__(self, path=None) -> None:
+        self.path = path or get_path("@app/tmp/navigation.json")
+        self.traces = None
+
+    def load(self) -> dict[str, list[dict]]:
+        if self.traces is None:
+            try:
+                with open(self.path, "r", encoding="utf-8") as f:
+                    self.traces = json.load(f)
+            except Exception:
+                self.traces = {}
+        return self.traces
+
+    def save(self) -> None:
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            with open(self.path, "w", encoding="utf-8") as f:
+                json.dump(self.traces, f, ensure_ascii=False)
+        except OSError as e:
+            logger.debug(f"保存导航备忘失败：{e}")
+
+    def get(self, name: str) -> Optional[list[dict]]:
+        return self.load().get(name)
+
+    def put(self, name: str, trace: list[dict]) -> None:
+        self.load()[name] = trace
+        self.save()
+
+    def drop(self, name: str) -> None:
+        if self.load().pop(name, None) is not None:
+            self.save()
+
+
+memo = NavigationMemo()
+
+
 class NavigationSolver(SceneGraphSolver, BaseMixin):
+    # 重放时每一步最多等待的次数
+    replay_tries = 10
+
     def run(self, name: str):
         logger.info("Start: 关卡导航")
         self.success = False
         self.act = None
         self.name = name
-        self.stage_meta = next(
-            (
-                item
-                for item in stage_data_full
-                if item.get("id") == name or item.get("name") == name
-            ),
-            None,
-        )
+        self.locator = None
+        self.trace = None
+        self.anchor = None
+        self.stage_meta = find_stage(name)
         self.stageType = (
             "ACTIVITY" if not self.stage_meta else self.stage_meta.get("stageType")
         )
@@ -167,24 +320,13 @@ class NavigationSolver(SceneGraphSolver, BaseMixin):
         if rapidocr.engine:
             x0, y0, x1, y1 = 1680, 840, 1895, 945
             region = self.recog.img[y0:y1, x0:x1]
-            ocr_raw = rapidocr.engine(region, use_det=True, use_cls=False, use_rec=True)
-            ocr_result = ocr_raw[0] if isinstance(ocr_raw, tuple) else ocr_raw
+            ocr_result = self.recog.ocr_many([region], "last_stage", det=True)[0]
 
             texts = []
-            for item in ocr_result or []:
-                try:
-                    txt = None
-                    if (
-                        isinstance(item, (list, tuple))
-                        and len(item) >= 2
-                        and isinstance(item[1], str)
-                    ):
-                        txt = item[1]
-                        logger.info(f"ocr识别结果: {txt}")
-                    if txt:
-                        texts.append(txt.strip())
-                except Exception:
-                    continue
+            for _, txt, _ in ocr_result:
+                logger.info(f"ocr识别结果: {txt}")
+                if txt:
+                    texts.append(txt.strip())
             logger.info(f"上次作战OCR: {texts}")
             if self.name in texts:
                 logger.info("识别到上次作战与目标相同，尝试点击进入")
@@ -192,10 +334,101 @@ class NavigationSolver(SceneGraphSolver, BaseMixin):
                 self.success = True
                 return
 
+        if trace := memo.get(self.name):
+            logger.info("按导航备忘重放")
+            if self.replay(trace):
+                self.success = True
+                return self.success
+            logger.info("导航备忘与当前界面不一致，重新导航")
+            memo.drop(self.name)
+            self.scene_graph_navigation(Scene.TERMINAL_MAIN)
+
+        self.trace = []
         super().run()
+        if self.success and self.trace:
+            memo.put(self.name, self.trace)
+        self.trace = None
         return self.success
 
+    def record(self, action: str, **kwargs) -> None:
+        """记录一步操作；导航中出现返回或场景图跳转时放弃本次记录"""
+        if self.trace is None:
+            return
+        step = {"scene": self.scene(), "action": action, **kwargs}
+        if self.anchor is not None:
+            step["anchor"] = self.anchor
+        self.trace.append(step)
+
+    def tap(self, poly, x_rate=0.5, y_rate=0.5, interval=1):
+        self.record("tap", pos=self.get_pos(poly, x_rate, y_rate), interval=interval)
+        super().tap(poly, x_rate, y_rate, interval)
+
+    def swipe_noinertia(self, start, movement, duration=20, interval=0.2):
+        self.record("swipe", start=start, movement=movement, interval=interval)
+        super().swipe_noinertia(start, movement, duration, interval)
+
+    def swipe_ext(self, points, durations):
+        self.record("swipe_ext", points=points, durations=durations)
+        self.device.swipe_ext(points, durations=durations)
+        self.recog.update()
+
+    def back(self, interval=1):
+        self.trace = None
+        super().back(interval)
+
+    def check_anchor(
+        self, anchor: dict, radius: int = 20, threshold: float = 0.02
+    ) -> bool:
+        """锚点是否仍在记录的位置附近"""
+        x, y = anchor["pos"]
+        if "level" in anchor:
+            template = models.navigation[anchor["level"]]
+            th, tw = template.shape
+            height, width = self.recog.gray.shape
+            x0, y0 = max(x - radius, 0), max(y - radius, 0)
+            x1, y1 = min(x + tw + radius, width), min(y + th + radius, height)
+            if x1 - x0 < tw or y1 - y0 < th:
+                return False
+            result = cv2.matchTemplate(
+                self.recog.gray[y0:y1, x0:x1], template, cv2.TM_SQDIFF_NORMED
+            )
+            return cv2.minMaxLoc(result)[0] < threshold
+        pos = self.find(anchor["res"])
+        return pos is not None and max(abs(pos[0][0] - x), abs(pos[0][1] - y)) <= radius
+
+    def wait_for(self, scene: int, previous: int, anchor: Optional[dict] = None):
+        """等待进入指定场景并确认锚点；停留在上一步的场景或加载中时继续等待，其余场景视为不一致"""
+        for _ in range(self.replay_tries):
+            current = self.scene()
+            if current == scene and (anchor is None or self.check_anchor(anchor)):
+                return True
+            if current not in (scene, previous) and current not in self.waiting_scene:
+                logger.debug(f"导航备忘：期望场景{scene}，实际为{current}")
+                return False
+            self.sleep(0.5)
+        return False
+
+    def replay(self, trace: list[dict]) -> bool:
+        """重放导航备忘，每一步前确认场景与锚点"""
+        previous = Scene.TERMINAL_MAIN
+        for step in trace:
+            if not self.wait_for(step["scene"], previous, step.get("anchor")):
+                return False
+            if step["action"] == "tap":
+                self.tap(step["pos"], interval=step["interval"])
+            elif step["action"] == "swipe":
+                self.swipe_noinertia(
+                    step["start"], step["movement"], interval=step["interval"]
+                )
+            else:
+                self.swipe_ext(step["points"], step["durations"])
+            previous = step["scene"]
+        if self.name == "Annihilation":
+            return self.wait_for(Scene.OPERATOR_ELIMINATE, previous)
+        return self.wait_for(Scene.OPERATOR_BEFORE, previous)
+
     def transition(self):
+        self.anchor = None
         if (scene := self.scene()) == Scene.TERMINAL_MAIN:
             if self.name == "Annihilation":
                 pos_list = [(943, 130), (1491, 130), (1665, 815), (1875, 815)]
@@ -233,10 +466,9 @@ class NavigationSolver(SceneGraphSolver, BaseMixin):
                 if pos := self.find(f"navigation/main/{self.prefix}"):
                     self.tap(pos)
                 else:
-                    self.device.swipe_ext(
+                    self.swipe_ext(
                         ((932, 554), (1425, 554), (1425, 554)), durations=[300, 100]
                     )
-                    self.recog.update()
             else:
                 self.tap((230, 175))
         elif scene == Scene.TERMINAL_BIOGRAPHY:
@@ -249,7 +481,6 @@ class NavigationSolver(SceneGraphSolver, BaseMixin):
             self.tap_element(f"navigation/biography/{self.prefix}_entry")
         elif scene == Scene.TERMINAL_COLLECTION:
             prefix = self.prefix
-            val = 0.9
             if self.prefix not in collection_prefixs:
                 self.back()
                 return
@@ -274,13 +505,16 @@ class NavigationSolver(SceneGraphSolver, BaseMixin):
                 self.sleep()
                 return
 
-            name, val, loc = "", 1, None
             prefix = self.prefix
             # 资源收集关直接按坐标点击
             if prefix in collection_prefixs:
                 if self.prefix == "PR":
                     prefix = "{}-{}".format(self.prefix, self.pr_prefix)
                 if pos := self.find(f"navigation/collection/{prefix}-1"):
+                    self.anchor = {
+                        "res": f"navigation/collection/{prefix}-1",
+                        "pos": tuple(map(int, pos[0])),
+                    }
                     self.success = True
                     self.tap(va(pos[0], location[prefix][self.name]))
                 return True
@@ -305,16 +539,10 @@ class NavigationSolver(SceneGraphSolver, BaseMixin):
                             f"navigation/ope_{difficulty_str[self.now_difficulty]}"
                         )
                         return
-            for i in location[prefix]:
-                result = cv2.matchTemplate(
-                    self.recog.gray, navigation[i], cv2.TM_SQDIFF_NORMED
-                )
-                min_val, max_val, min_loc, max_loc = cv2.minMaxLoc(result)
-                if min_val < val:
-                    val = min_val
-                    loc = min_loc
-                    name = i
-
+            if self.locator is None or self.locator.prefix != prefix:
+                self.locator = LevelLocator(prefix)
+            name, loc = self.locator.locate(self.recog.gray)
+            self.anchor = {"level": name, "pos": loc}
             target = va(vs(loc, location[prefix][name]), location[prefix][self.name])
             if target[0] + 200 > 1920:
                 self.swipe_noinertia((1400, 540), (-800, 0))
@@ -344,4 +572,5 @@ class NavigationSolver(SceneGraphSolver, BaseMixin):
         elif scene in self.waiting_scene:
             self.waiting_solver()
         else:
+            self.trace = None
             self.scene_graph_navigation(Scene.TERMINAL_MAIN)
@@ -3,7 +3,7 @@ from typing import Optional
 
 import cv2
 
-from arknights_mower.models import secret_front
+from arknights_mower import models
 from arknights_mower.utils import config
 from arknights_mower.utils import typealias as tp
 from arknights_mower.utils.datetime import get_server_weekday
@@ -42,7 +42,7 @@ class OperationSolver(SceneGraphSolver):
             )
             score = []
             for i in range(10):
-                im = secret_front[i]
+                im = models.secret_front[i]
                 result = cv2.matchTemplate(digit, im, cv2.TM_SQDIFF_NORMED)
                 min_val, max_val, min_loc, max_loc = cv2.minMaxLoc(result)
                 score.append(min_val)
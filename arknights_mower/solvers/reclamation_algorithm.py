@@ -6,7 +6,7 @@ from typing import Optional
 import cv2
 import numpy as np
 
-from arknights_mower.utils import config, rapidocr
+from arknights_mower.utils import config
 from arknights_mower.utils import typealias as tp
 from arknights_mower.utils.csleep import MowerExit
 from arknights_mower.utils.image import cropimg, loadres, thres2
@@ -289,15 +289,21 @@ class ReclamationAlgorithm(BaseSolver):
         self.tap_element("ra/map_back", thres=200)
 
     def detect_score(self, scope=None, find_max=True):
-        if find_max and self.find("ra/max", scope=scope, score=0.7):
-            return "已达上限"
-        score = rapidocr.engine(
-            thres2(cropimg(self.recog.gray, scope), 127),
-            use_det=False,
-            use_cls=False,
-            use_rec=True,
-        )[0][0][0]
-        return score or "识别失败"
+        return self.detect_scores([(scope, find_max)])[0]
+
+    def detect_scores(self, scope_list):
+        """同一帧内的多个分数区域一次批量识别"""
+        scores = [None] * len(scope_list)
+        rois, indices = [], []
+        for i, (scope, find_max) in enumerate(scope_list):
+            if find_max and self.find("ra/max", scope=scope, score=0.7):
+                scores[i] = "已达上限"
+            else:
+                rois.append(thres2(cropimg(self.recog.gray, scope), 127))
+                indices.append(i)
+        for i, (text, _) in zip(indices, self.recog.ocr_many(rois, "ra_score")):
+            scores[i] = text or "识别失败"
+        return scores
 
     def map_select_place(self, pos, place):
         if popup := self.find("ra/popup"):
@@ -387,8 +393,8 @@ class ReclamationAlgorithm(BaseSolver):
                 (((870, 785), (956, 825)), "转化技术点数", True),
                 (((1250, 785), (1345, 825)), "转化繁荣点数", True),
             )
-            for scope, title, find_max in scope_list:
-                score = self.detect_score(scope=scope, find_max=find_max)
+            scores = self.detect_scores([(s, f) for s, _, f in scope_list])
+            for (_, title, _), score in zip(scope_list, scores):
                 logger.info(f"{title}：{score}")
             self.tap((960, 230))
 
@@ -1,9 +1,16 @@
 # 用于记录Mower操作行为
+import atexit
 import collections
+import hashlib
+import itertools
 import json
 import pickle
+import queue
 import sqlite3
+import threading
+import time
 import traceback
+from contextlib import closing
 from datetime import datetime, timedelta
 
 import pytz
@@ -13,6 +20,200 @@ from arknights_mower.utils import config
 from arknights_mower.utils.log import logger
 from arknights_mower.utils.path import get_path
 
+AGENT_ACTION_TABLE = (
+    "CREATE TABLE IF NOT EXISTS agent_action ("
+    "name TEXT,"
+    "agent_current_room TEXT,"
+    "current_room TEXT,"
+    "is_high INTEGER,"
+    "agent_group TEXT,"
+    "mood REAL,"
+    "time INTEGER"
+    ")"
+)
+
+RECORD_TABLES = [
+    AGENT_ACTION_TABLE,
+    "CREATE INDEX IF NOT EXISTS agent_action_name_time ON agent_action (name, time)",
+    "CREATE INDEX IF NOT EXISTS agent_action_high_time ON agent_action (is_high, time)",
+    "CREATE TABLE IF NOT EXISTS trading_history ("
+    "time INTEGER PRIMARY KEY,"
+    "server_date TEXT,"
+    "type TEXT,"
+    "price INTEGER"
+    ")",
+    "CREATE TABLE IF NOT EXISTS inventory (item_name TEXT PRIMARY KEY, count INTEGER)",
+    "CREATE TABLE IF NOT EXISTS log (time INTEGER,task TEXT,level TEXT,message TEXT)",
+]
+
+
+def migrate_agent_action(connection):
+    """agent_action 的时间由本地时间字符串改为整数时间戳"""
+    columns = [row[1] for row in connection.execute("PRAGMA table_info(agent_action)")]
+    if "current_time" not in columns:
+        return
+    connection.execute("ALTER TABLE agent_action RENAME TO agent_action_old")
+    connection.execute(AGENT_ACTION_TABLE)
+    connection.execute(
+        "INSERT INTO agent_action "
+        "SELECT name, agent_current_room, current_room, is_high, agent_group, mood, "
+        "CAST(strftime('%s', `current_time`, 'utc') AS INTEGER) "
+        "FROM agent_action_old"
+    )
+    connection.execute("DROP TABLE agent_action_old")
+
+
+# 数据库结构的升级步骤，第 i 步把 user_version 从 i 升到 i + 1
+RECORD_MIGRATIONS = [migrate_agent_action]
+
+
+def migrate_records(connection):
+    version = connection.execute("PRAGMA user_version").fetchone()[0]
+    for target, migration in enumerate(RECORD_MIGRATIONS[version:], version + 1):
+        connection.execute("BEGIN")
+        try:
+            migration(connection)
+            connection.execute(f"PRAGMA user_version = {target}")
+            connection.commit()
+        except Exception:
+            connection.rollback()
+            raise
+        logger.info(f"数据库升级至版本 {target}")
+
+
+class RecordWriter:
+    """后台写入数据库的记录服务
+
+    调用方只把 (SQL, 参数) 放进队列，由唯一的写入线程用常驻的 WAL 连接执行；
+    攒够 batch_size 条或等待 interval 秒后在一个事务中提交。
+    读取数据前调用 flush，保证之前提交的记录都已写入。
+    无法打开数据库时写入线程直接退出，submit 和 flush 记录错误后立即返回。
+    """
+
+    def __init__(self, database_path=None, batch_size=200, interval=0.5):
+        self.database_path = database_path
+        self.batch_size = batch_size
+        self.interval = interval
+        self.queue = queue.Queue()
+        self.thread = None
+        self.connected = False
+        self.lock = threading.Lock()
+
+    def connect(self) -> sqlite3.Connection:
+        if self.database_path is None:
+            get_path("@app/tmp").mkdir(exist_ok=True)
+            self.database_path = get_path("@app/tmp/data.db")
+        connection = sqlite3.connect(self.database_path)
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.execute("PRAGMA synchronous=NORMAL")
+        migrate_records(connection)
+        with connection:
+            for sql in RECORD_TABLES:
+                connection.execute(sql)
+        return connection
+
+    def start(self) -> bool:
+        """启动写入线程，返回数据库是否可用"""
+        with self.lock:
+            if self.thread is None or not self.thread.is_alive():
+                self.connected = False
+                ready = threading.Event()
+                self.thread = threading.Thread(
+                    target=self.run, args=(ready,), name="RecordWriter", daemon=True
+                )
+                self.thread.start()
+                # 等待建表完成，之后读取数据时表一定存在
+                ready.wait()
+            return self.connected
+
+    def submit(self, sql: str, params=()):
+        """提交一条写入，不等待写入完成"""
+        if not self.start():
+            logger.error(f"记录数据库不可用，未写入：{sql} {params}")
+            return
+        self.queue.put((sql, params))
+
+    def flush(self, timeout=None):
+        """等待已提交的记录写入数据库"""
+        if not self.start():
+            logger.error("记录数据库不可用")
+            return
+        if self.queue.unfinished_tasks == 0:
+            return
+        done = threading.Event()
+        self.queue.put(done)
+        done.wait(timeout)
+
+    def close(self):
+        with self.lock:
+            thread = self.thread
+            self.thread = None
+        if thread is not None and thread.is_alive():
+            self.queue.put(None)
+            thread.join()
+
+    def run(self, ready):
+        try:
+            connection = self.connect()
+            self.connected = True
+        except Exception as e:
+            logger.exception(f"无法打开记录数据库：{e}")
+            return
+        finally:
+            ready.set()
+        while True:
+            batch = []
+            events = []
+            stop = False
+            deadline = None
+            while len(batch) < self.batch_size:
+                try:
+                    if not batch:
+                        item = self.queue.get()
+                        deadline = time.monotonic() + self.interval
+                    else:
+                        item = self.queue.get(
+                            timeout=max(deadline - time.monotonic(), 0)
+                        )
+                except queue.Empty:
+                    break
+                if item is None:
+                    stop = True
+                elif isinstance(item, threading.Event):
+                    events.append(item)
+                else:
+                    batch.append(item)
+                    continue
+                self.queue.task_done()
+                break
+            if batch:
+                self.write(connection, batch)
+            for _ in batch:
+                self.queue.task_done()
+            for event in events:
+                event.set()
+            if stop:
+                connection.close()
+                return
+
+    def write(self, connection, batch):
+        """在一个事务中写入一批记录，出错时逐条重试"""
+        try:
+            with connection:
+                for sql, rows in itertools.groupby(batch, key=lambda item: item[0]):
+                    connection.executemany(sql, [params for _, params in rows])
+        except sqlite3.Error:
+            for sql, params in batch:
+                try:
+                    with connection:
+                        connection.execute(sql, params)
+                except sqlite3.Error as e:
+                    logger.error(f"SQLite error: {e}")
+
+
+recorder = RecordWriter()
+atexit.register(recorder.close)
+
 
 # 记录干员进出站以及心情数据，将记录信息存入agent_action表里
 def save_action_to_sqlite_decorator(func):
@@ -28,122 +229,235 @@ def save_action_to_sqlite_decorator(func):
             return
         # 保存到数据库
         current_time = datetime.now()
-        database_path = get_path("@app/tmp/data.db")
+        recorder.submit(
+            "INSERT INTO agent_action VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (
+                name,
+                agent_current_room,
+                current_room,
+                int(agent_is_high),
+                agent.group,
+                mood,
+                int(current_time.timestamp()),
+            ),
+        )
 
-        try:
-            # Create 'tmp' directory if it doesn't exist
-            get_path("@app/tmp").mkdir(exist_ok=True)
+        # Log the action
+        logger.debug(
+            f"Saved action to SQLite: Name: {name}, Agent's Room: {agent_current_room}, Agent's group: {agent.group}, "
+            f"Current Room: {current_room}, Is High: {agent_is_high}, Current Time: {current_time}"
+        )
 
-            connection = sqlite3.connect(database_path)
-            cursor = connection.cursor()
-
-            # Create a table if it doesn't exist
-            cursor.execute(
-                "CREATE TABLE IF NOT EXISTS agent_action ("
-                "name TEXT,"
-                "agent_current_room TEXT,"
-                "current_room TEXT,"
-                "is_high INTEGER,"
-                "agent_group TEXT,"
-                "mood REAL,"
-                "current_time TEXT"
-                ")"
-            )
+        return result
 
-            # Insert data
-            cursor.execute(
-                "INSERT INTO agent_action VALUES (?, ?, ?, ?, ?, ?, ?)",
-                (
-                    name,
-                    agent_current_room,
-                    current_room,
-                    int(agent_is_high),
-                    agent.group,
-                    mood,
-                    str(current_time),
-                ),
-            )
+    return wrapper
 
-            connection.commit()
-            connection.close()
 
-            # Log the action
-            logger.debug(
-                f"Saved action to SQLite: Name: {name}, Agent's Room: {agent_current_room}, Agent's group: {agent.group}, "
-                f"Current Room: {current_room}, Is High: {agent_is_high}, Current Time: {current_time}"
+# 从存档恢复时只用到的干员字段
+OperatorState = collections.namedtuple(
+    "OperatorState",
+    ["mood", "time_stamp", "depletion_rate", "current_room", "current_index"],
+)
+
+STATE_FIELDS = [
+    "daily_visit_friend",
+    "daily_report",
+    "daily_skland",
+    "daily_mail",
+    "task_count",
+]
+
+
+def state_items(scheduler) -> dict[tuple[str, str], object]:
+    """把排班状态拆成 (类型, 键) -> 值 的小条目，值可以直接比较是否变化
+
+    干员与宿舍拆成元组；任务与其余字段序列化后比较，任务以内容的哈希为键。
+    """
+    op_data = scheduler.op_data
+    items = {}
+    for name, op in op_data.operators.items():
+        items["operator", name] = (
+            op.mood,
+            op.time_stamp,
+            op.depletion_rate,
+            op.current_room,
+            op.current_index,
+        )
+    for idx, dorm in enumerate(op_data.dorm):
+        items["dorm", str(idx)] = (dorm.position, dorm.name, dorm.time)
+    for task in scheduler.tasks:
+        data = pickle.dumps(task)
+        items["task", hashlib.blake2b(data, digest_size=8).hexdigest()] = data
+    for field in STATE_FIELDS:
+        items["field", field] = pickle.dumps(getattr(scheduler, field))
+    items["field", "party_time"] = pickle.dumps(op_data.party_time)
+    items["field", "skill_upgrade_supports"] = pickle.dumps(
+        op_data.skill_upgrade_supports
+    )
+    return items
+
+
+def build_state(items: dict[tuple[str, str], object]) -> dict:
+    """由条目还原出 load_state 的返回格式"""
+    from arknights_mower.utils.operators import Dormitory
+
+    state = {"operators": {}, "dorm": [], "tasks": []}
+    dorms = {}
+    for (kind, key), value in items.items():
+        if kind == "operator":
+            state["operators"][key] = OperatorState(*value)
+        elif kind == "dorm":
+            dorms[int(key)] = Dormitory(*value)
+        elif kind == "task":
+            state["tasks"].append(pickle.loads(value))
+        else:
+            state[key] = pickle.loads(value)
+    state["dorm"] = [dorms[idx] for idx in sorted(dorms)]
+    state["tasks"].sort(key=lambda task: task.time)
+    return state
+
+
+# 区分没有记录的条目与值为 None 的条目
+_missing = object()
+
+
+class StateJournal:
+    """增量保存排班状态
+
+    每次保存只把与上次不同的条目追加到 state_journal 表，条目累积到 compact_size 条
+    后合并成 state_snapshot 中的一份快照。恢复时读取快照再按顺序重放日志。
+    数据库使用 WAL 模式和常驻连接。
+    """
+
+    def __init__(self, database_path=None, compact_size=2000):
+        self.database_path = database_path
+        self.compact_size = compact_size
+        self.connection = None
+        self.lock = threading.Lock()
+        # 已写入数据库的条目，None 表示还没有从数据库读取
+        self.items = None
+        self.journal_size = 0
+
+    def connect(self) -> sqlite3.Connection:
+        if self.connection is None:
+            if self.database_path is None:
+                get_path("@app/tmp").mkdir(exist_ok=True)
+                self.database_path = get_path("@app/tmp/data.db")
+            self.connection = sqlite3.connect(
+                self.database_path, check_same_thread=False
+            )
+            self.connection.execute("PRAGMA journal_mode=WAL")
+            self.connection.execute("PRAGMA synchronous=NORMAL")
+            self.connection.execute(
+                "CREATE TABLE IF NOT EXISTS state_snapshot (time TEXT, state BLOB)"
             )
+            self.connection.execute(
+                "CREATE TABLE IF NOT EXISTS state_journal ("
+                "seq INTEGER PRIMARY KEY AUTOINCREMENT,"
+                "kind TEXT,"
+                "key TEXT,"
+                "data BLOB"
+                ")"
+            )
+        return self.connection
+
+    def close(self):
+        with self.lock:
+            if self.connection is not None:
+                self.connection.close()
+                self.connection = None
+            self.items = None
+
+    def _read(self) -> dict[tuple[str, str], object]:
+        """读取快照并重放日志，data 为 None 的日志表示删除"""
+        cursor = self.connect().cursor()
+        cursor.execute("SELECT state FROM state_snapshot LIMIT 1")
+        row = cursor.fetchone()
+        items = pickle.loads(row[0]) if row else {}
+        cursor.execute("SELECT kind, key, data FROM state_journal ORDER BY seq")
+        rows = cursor.fetchall()
+        for kind, key, data in rows:
+            if data is None:
+                items.pop((kind, key), None)
+            else:
+                items[kind, key] = pickle.loads(data)
+        self.journal_size = len(rows)
+        return items
+
+    def load(self) -> dict[tuple[str, str], object] | None:
+        with self.lock:
+            self.items = self._read()
+            return dict(self.items) if self.items else None
+
+    def record(self, items: dict[tuple[str, str], object], compact=False) -> int:
+        """写入与上次不同的条目，返回写入的条数"""
+        with self.lock:
+            if self.items is None:
+                self.items = self._read()
+            changes = [
+                (kind, key, pickle.dumps(value))
+                for (kind, key), value in items.items()
+                if self.items.get((kind, key), _missing) != value
+            ]
+            changes += [
+                (kind, key, None)
+                for kind, key in self.items
+                if (kind, key) not in items
+            ]
+            connection = self.connect()
+            with connection:
+                if changes:
+                    connection.executemany(
+                        "INSERT INTO state_journal (kind, key, data) VALUES (?, ?, ?)",
+                        changes,
+                    )
+                self.journal_size += len(changes)
+                self.items = dict(items)
+                if compact or self.journal_size >= self.compact_size:
+                    self._compact(connection)
+            return len(changes)
+
+    def _compact(self, connection):
+        connection.execute("DELETE FROM state_snapshot")
+        connection.execute(
+            "INSERT INTO state_snapshot VALUES (?, ?)",
+            (str(datetime.now()), sqlite3.Binary(pickle.dumps(self.items))),
+        )
+        connection.execute("DELETE FROM state_journal")
+        self.journal_size = 0
 
-        except sqlite3.Error as e:
-            logger.error(f"SQLite error: {e}")
 
-        return result
+state_journal = StateJournal()
 
-    return wrapper
+
+def checkpoint_state(scheduler, compact=False):
+    """把排班状态的变化追加到日志，崩溃后也能从最近一次保存恢复"""
+    try:
+        count = state_journal.record(state_items(scheduler), compact)
+        logger.debug(f"储存 {count} 条状态变化至数据库")
+    except sqlite3.Error as e:
+        logger.error(f"SQLite error: {e}")
 
 
 def save_state(func):
     def save_wrapper(*args, **kwargs):
         from arknights_mower.__main__ import base_scheduler
 
-        saved_state = {
-            "dorm": base_scheduler.op_data.dorm,
-            "tasks": base_scheduler.tasks,
-            "party_time": base_scheduler.op_data.party_time,
-            "operators": base_scheduler.op_data.operators,
-            "daily_visit_friend": base_scheduler.daily_visit_friend,
-            "daily_report": base_scheduler.daily_report,
-            "daily_skland": base_scheduler.daily_skland,
-            "daily_mail": base_scheduler.daily_mail,
-            "task_count": base_scheduler.task_count,
-            "skill_upgrade_supports": base_scheduler.op_data.skill_upgrade_supports,
-        }
-
         # Call the original function
         result = func(*args, **kwargs)
 
-        # Save saved_state to database
-        current_time = datetime.now()
-        database_path = get_path("@app/tmp/data.db")
-
-        try:
-            # Create 'tmp' directory if it doesn't exist
-            get_path("@app/tmp").mkdir(exist_ok=True)
-
-            connection = sqlite3.connect(database_path)
-            cursor = connection.cursor()
-
-            # Create a table if it doesn't exist
-            cursor.execute(
-                "CREATE TABLE IF NOT EXISTS saved_state (time TEXT,state BLOB)"
-            )
-
-            # Delete the previous saved state
-            cursor.execute("DELETE FROM saved_state")
-
-            # Insert data
-            cursor.execute(
-                "INSERT INTO saved_state VALUES (?, ?)",
-                (
-                    str(current_time),
-                    sqlite3.Binary(pickle.dumps(saved_state)),  # Serialize saved_state
-                ),
-            )
-
-            connection.commit()
-            connection.close()
-
-            logger.info(f"储存缓存数据至数据库 {current_time}")
-
-        except sqlite3.Error as e:
-            logger.error(f"SQLite error: {e}")
+        if base_scheduler is not None:
+            # 停止时合并成快照，下次启动只需读取一条记录
+            checkpoint_state(base_scheduler, compact=True)
+            logger.info(f"储存缓存数据至数据库 {datetime.now()}")
 
         return result
 
     return save_wrapper
 
 
-def load_state():
-    # Initialize an empty variable to hold the loaded state
+def load_legacy_state():
+    """读取旧版本整体序列化保存的状态"""
     loaded_state = None
     database_path = get_path("@app/tmp/data.db")
 
@@ -168,266 +482,149 @@ def load_state():
     return loaded_state
 
 
-def clear_data(date_time):
-    database_path = get_path("@app/tmp/data.db")
+def load_state():
     try:
-        connection = sqlite3.connect(database_path)
-        cursor = connection.cursor()
+        items = state_journal.load()
+    except sqlite3.Error as e:
+        logger.error(f"SQLite error: {e}")
+        items = None
+    if items is None:
+        return load_legacy_state()
+    return build_state(items)
 
-        # Ensure date_time is in the correct format
-        if isinstance(date_time, datetime):
-            date_time_str = date_time.strftime("%Y-%m-%d %H:%M:%S")
-        else:
-            date_time_str = date_time
 
-        # Execute the DELETE statement with parameterized query
-        cursor.execute(
-            "DELETE FROM agent_action WHERE `current_time` < ?", (date_time_str,)
-        )
+def clear_data(date_time):
+    # Ensure date_time is in the correct format
+    if not isinstance(date_time, datetime):
+        date_time = datetime.strptime(date_time, "%Y-%m-%d %H:%M:%S")
 
-        connection.commit()
-        connection.close()
-        logger.info(f"已删除 早于 {date_time_str} 的干员心情记录")
+    recorder.submit(
+        "DELETE FROM agent_action WHERE time < ?", (int(date_time.timestamp()),)
+    )
+    recorder.flush()
+    logger.info(f"已删除 早于 {date_time:%Y-%m-%d %H:%M:%S} 的干员心情记录")
 
-    except sqlite3.Error as e:
-        logger.error(f"SQLite error: {e}")
 
+def query_agent_action(since: str, order: str):
+    """查询需要统计的干员自 since 天前（本地时间零点）起的记录
 
-def get_work_rest_ratios():
-    # TODO 整理数据计算工休比
-    database_path = get_path("@app/tmp/data.db")
+    需要统计的干员是最近 7 天在宿舍以外工作过的高效组干员、菲亚梅塔和收藏的干员。
+    返回 (干员, 房间, 分组, 心情, 时间戳, 图表用的时间字符串) 的列表
+    """
     favorite = [] if config.conf.favorite == "" else config.conf.favorite.split(",")
-    sel = ""
-    for name in favorite:
-        sel = (
-            sel
-            + """
-                UNION
-                SELECT '{}' AS name
-            """.format(name)
+    names = ["菲亚梅塔"] + favorite
+    placeholders = ",".join(["(?)"] * len(names))
+    day_start = "CAST(strftime('%s', DATE('now', ?, 'localtime'), 'utc') AS INTEGER)"
+    query = f"""
+        SELECT name, current_room, agent_group, mood, time,
+            strftime('%Y-%m-%dT%H:%M:%S.000000+08:00', time, 'unixepoch', 'localtime')
+        FROM agent_action
+        WHERE time >= {day_start}
+        AND name IN (
+            SELECT name
+            FROM agent_action
+            WHERE is_high = 1 AND time >= {day_start}
+            AND current_room NOT LIKE 'dormitory%'
+            UNION VALUES {placeholders}
         )
+        ORDER BY {order}
+    """
     try:
-        # 连接到数据库
-        conn = sqlite3.connect(database_path)
-        # conn = sqlite3.connect('../../tmp/data.db')
-        cursor = conn.cursor()
-        # 查询数据
-        cursor.execute(
-            """
-                        SELECT a.*
-                        FROM agent_action a
-                        JOIN (
-                            SELECT DISTINCT b.name
-                            FROM agent_action b
-                            WHERE DATE(b.current_time) >= DATE('now', '-7 day', 'localtime')
-                            AND b.is_high = 1 AND b.current_room NOT LIKE 'dormitory%'
-                            UNION
-                            SELECT '菲亚梅塔' AS name
-                       """
-            + sel
-            + """
-                        ) AS subquery ON a.name = subquery.name
-                        WHERE DATE(a.current_time) >= DATE('now', '-1 month', 'localtime')
-                        ORDER BY a.current_time;
-                       """
-        )
-        data = cursor.fetchall()
-        # 关闭数据库连接
-        conn.close()
+        recorder.flush()
+        with closing(sqlite3.connect(recorder.database_path)) as conn:
+            return conn.execute(query, [since, "-7 day"] + names).fetchall()
     except sqlite3.Error:
-        data = []
-    processed_data = {}
-    grouped_data = {}
-    for row in data:
-        name = row[0]
-        current_room = row[2]
-        current_time = row[6]  # Assuming index 6 is the current_time column
-        agent = grouped_data.get(
-            name,
-            {
-                "agent_data": [
-                    {"current_time": current_time, "current_room": current_room}
-                ],
-                "difference": [],
-            },
-        )
-        difference = {
-            "time_diff": calculate_time_difference(
-                agent["agent_data"][-1]["current_time"], current_time
-            ),
-            "current_room": agent["agent_data"][-1]["current_room"],
-        }
-        agent["agent_data"].append(
-            {"current_time": current_time, "current_room": current_room}
-        )
-        agent["difference"].append(difference)
-        grouped_data[name] = agent
-    for name in grouped_data:
-        work_time = 0
-        rest_time = 0
-        for difference in grouped_data[name]["difference"]:
-            if difference["current_room"].startswith("dormitory"):
-                rest_time += difference["time_diff"]
+        return []
+
+
+def get_work_rest_ratios():
+    # TODO 整理数据计算工休比
+    data = query_agent_action("-1 month", "name, time")
+    work_rest = {}
+    last = {}
+    for name, current_room, _, _, time_stamp, _ in data:
+        ratio = work_rest.setdefault(name, {"rest": 0, "work": 0})
+        if name in last:
+            # 按上一条记录的房间计入休息或工作时间
+            last_room, last_time = last[name]
+            if last_room.startswith("dormitory"):
+                ratio["rest"] += time_stamp - last_time
             else:
-                work_time += difference["time_diff"]
-        processed_data[name] = {
+                ratio["work"] += time_stamp - last_time
+        last[name] = (current_room, time_stamp)
+    return {
+        name: {
             "labels": ["休息时间", "工作时间"],
-            "datasets": [{"data": [rest_time, work_time]}],
+            "datasets": [{"data": [ratio["rest"], ratio["work"]]}],
         }
-
-    return processed_data
+        for name, ratio in work_rest.items()
+    }
 
 
 # 整理心情曲线
 def get_mood_ratios():
-    database_path = get_path("@app/tmp/data.db")
-    favorite = [] if config.conf.favorite == "" else config.conf.favorite.split(",")
-    sel = ""
-    for name in favorite:
-        sel = (
-            sel
-            + """
-                UNION
-                SELECT '{}' AS name
-            """.format(name)
-        )
-    try:
-        # 连接到数据库
-        conn = sqlite3.connect(database_path)
-        cursor = conn.cursor()
-        # 查询数据（筛掉宿管和替班组的数据）
-        cursor.execute(
-            """
-                       SELECT a.*
-                        FROM agent_action a
-                        JOIN (
-                            SELECT DISTINCT b.name
-                            FROM agent_action b
-                            WHERE DATE(b.current_time) >= DATE('now', '-7 day', 'localtime')
-                            AND b.is_high = 1 AND b.current_room NOT LIKE 'dormitory%'
-                            UNION
-                            SELECT '菲亚梅塔' AS name
-                       """
-            + sel
-            + """
-                        ) AS subquery ON a.name = subquery.name
-                        WHERE DATE(a.current_time) >= DATE('now', '-7 day', 'localtime')
-                        ORDER BY a.agent_group DESC, a.current_time;
-
-        """
-        )
-        data = cursor.fetchall()
-        # 关闭数据库连接
-        conn.close()
-    except sqlite3.Error:
-        data = []
+    # 筛掉宿管和替班组的数据
+    data = query_agent_action("-7 day", "agent_group DESC, time")
 
     work_rest_data_ratios = get_work_rest_ratios()
     grouped_data = {}
     grouped_work_rest_data = {}
-    for row in data:
-        group_name = row[4]  # Assuming 'agent_group' is at index 4
+    datasets = {}
+    for name, _, group_name, mood_value, _, current_time in data:
         if not group_name:
-            group_name = row[0]
-        mood_data = grouped_data.get(group_name, {"labels": [], "datasets": []})
-        work_rest_data = grouped_work_rest_data.get(
-            group_name, work_rest_data_ratios[row[0]]
-        )
-        grouped_work_rest_data[group_name] = work_rest_data
-
-        timestamp_datetime = datetime.strptime(
-            row[6], "%Y-%m-%d %H:%M:%S.%f"
-        )  # Assuming 'current_time' is at index 6
-        # 创建 Luxon 格式的字符串
-        current_time = f"{timestamp_datetime.year:04d}-{timestamp_datetime.month:02d}-{timestamp_datetime.day:02d}T{timestamp_datetime.hour:02d}:{timestamp_datetime.minute:02d}:{timestamp_datetime.second:02d}.{timestamp_datetime.microsecond:06d}+08:00"
-
-        mood_label = row[0]  # Assuming 'name' is at index 0
-        mood_value = row[5]  # Assuming 'mood' is at index 5
-
-        if mood_label in [dataset["label"] for dataset in mood_data["datasets"]]:
-            # if mood_label == mood_data['datasets'][0]['label']:
-            mood_data["labels"].append(current_time)
-            # If mood label already exists, find the corresponding dataset
-            for dataset in mood_data["datasets"]:
-                if dataset["label"] == mood_label:
-                    dataset["data"].append({"x": current_time, "y": mood_value})
-                    break
-        else:
-            # If mood label doesn't exist, create a new dataset
-            mood_data["labels"].append(current_time)
-            mood_data["datasets"].append(
-                {"label": mood_label, "data": [{"x": current_time, "y": mood_value}]}
-            )
+            group_name = name
+        mood_data = grouped_data.setdefault(group_name, {"labels": [], "datasets": []})
+        grouped_work_rest_data.setdefault(group_name, work_rest_data_ratios[name])
+        mood_data["labels"].append(current_time)
+        if (group_name, name) not in datasets:
+            datasets[group_name, name] = {"label": name, "data": []}
+            mood_data["datasets"].append(datasets[group_name, name])
+        datasets[group_name, name]["data"].append({"x": current_time, "y": mood_value})
 
-        grouped_data[group_name] = mood_data
-    print(grouped_work_rest_data)
     # 将数据格式整理为数组
-    formatted_data = []
-    for group_name, mood_data in grouped_data.items():
-        formatted_data.append(
-            {
-                "groupName": group_name,
-                "moodData": mood_data,
-                "workRestData": grouped_work_rest_data[group_name],
-            }
-        )
-    return formatted_data
-
-
-def calculate_time_difference(start_time, end_time):
-    time_format = "%Y-%m-%d %H:%M:%S.%f"
-    start_datetime = datetime.strptime(start_time, time_format)
-    end_datetime = datetime.strptime(end_time, time_format)
-    time_difference = end_datetime - start_datetime
-    return time_difference.total_seconds()
+    return [
+        {
+            "groupName": group_name,
+            "moodData": mood_data,
+            "workRestData": grouped_work_rest_data[group_name],
+        }
+        for group_name, mood_data in grouped_data.items()
+    ]
 
 
 def save_trading_info(func):
     def wrapper(*args, **kwargs):
-        database_path = get_path("@app/tmp/data.db")
-        try:
-            result = None
-            get_path("@app/tmp").mkdir(exist_ok=True)
-            connection = sqlite3.connect(database_path)
-            cursor = connection.cursor()
-            cursor.execute(
-                "CREATE TABLE IF NOT EXISTS trading_history ("
-                "time INTEGER PRIMARY KEY,"
-                "server_date TEXT,"
-                "type TEXT,"
-                "price INTEGER"
-                ")"
+        if len(args) > 2:
+            dt = args[2]
+            try:
+                recorder.flush()
+                with closing(sqlite3.connect(recorder.database_path)) as connection:
+                    cursor = connection.execute(
+                        "SELECT COUNT(*) FROM trading_history WHERE time = ?",
+                        (int(dt.timestamp()),),
+                    )
+                    exists = cursor.fetchone()[0] > 0
+            except sqlite3.Error as e:
+                logger.error(f"SQLite error: {e}")
+                return None
+            if exists:
+                logger.debug("当前订单信息已经存在数据库，跳过.")
+                return None
+        result = func(*args, **kwargs)
+
+        if result:
+            dubai_tz = pytz.timezone("Asia/Dubai")
+            recorder.submit(
+                "INSERT INTO trading_history VALUES (?, ?, ?, ?)",
+                (
+                    int(result.time.timestamp()),
+                    result.time.astimezone(dubai_tz).date(),
+                    result.buff,
+                    result.price,
+                ),
             )
-            if len(args) > 2:
-                dt = args[2]
-                cursor.execute(
-                    "SELECT COUNT(*) FROM trading_history WHERE time = ?",
-                    (int(dt.timestamp()),),
-                )
-                exists = cursor.fetchone()[0] > 0
-                if exists:
-                    logger.debug("当前订单信息已经存在数据库，跳过.")
-                    return
-            result = func(*args, **kwargs)
-
-            if result:
-                dubai_tz = pytz.timezone("Asia/Dubai")
-                cursor.execute(
-                    "INSERT INTO trading_history VALUES (?, ?, ?, ?)",
-                    (
-                        int(result.time.timestamp()),
-                        result.time.astimezone(dubai_tz).date(),
-                        result.buff,
-                        result.price,
-                    ),
-                )
-                logger.info(f"当前为 {result.buff} 订单, 订单价值为: {result.price}")
-                logger.info(f"储存订单信息至数据库 {datetime.now()}")
-                connection.commit()
-        except sqlite3.Error as e:
-            logger.error(f"SQLite error: {e}")
-        finally:
-            connection.close()
+            logger.info(f"当前为 {result.buff} 订单, 订单价值为: {result.price}")
+            logger.info(f"储存订单信息至数据库 {datetime.now()}")
         return result
 
     return wrapper
@@ -448,7 +645,6 @@ def get_trading_history(start_date: str, end_date: str):
     start_dt = dubai_start.astimezone(local_tz)
     end_dt = dubai_end.astimezone(local_tz)
 
-    database_path = get_path("@app/tmp/data.db")
     start_timestamp = int(start_dt.timestamp())
     end_timestamp = int(end_dt.timestamp())
 
@@ -456,17 +652,11 @@ def get_trading_history(start_date: str, end_date: str):
     logger.debug(f"分析数据从{start_dt}")
     logger.debug(f"分析数据至{end_dt}")
 
+    connection = None
     try:
-        connection = sqlite3.connect(database_path)
+        recorder.flush()
+        connection = sqlite3.connect(recorder.database_path)
         cursor = connection.cursor()
-        cursor.execute(
-            "CREATE TABLE IF NOT EXISTS trading_history ("
-            "time INTEGER PRIMARY KEY,"
-            "server_date TEXT,"
-            "type TEXT,"
-            "price INTEGER"
-            ")"
-        )
         cursor.execute(
             """
             SELECT server_date, type, price, COUNT(*)
@@ -499,26 +689,18 @@ def get_trading_history(start_date: str, end_date: str):
 
 
 def save_inventory_counts(inventorys: dict[str, int]):
-    data = [(name, count) for name, count in inventorys.items()]
-    with sqlite3.connect(get_path("@app/tmp/data.db")) as conn:
-        cursor = conn.cursor()
-        cursor.execute(
-            "CREATE TABLE IF NOT EXISTS inventory (item_name TEXT PRIMARY KEY, count INTEGER)"
-        )
-        cursor.executemany(
+    for name, count in inventorys.items():
+        recorder.submit(
             "INSERT INTO inventory (item_name, count) VALUES (?, ?) "
             "ON CONFLICT(item_name) DO UPDATE SET count = excluded.count",
-            data,
+            (name, count),
         )
-        conn.commit()
 
 
 def get_inventory_counts(item_names: list[str] | None = None):
-    with sqlite3.connect(get_path("@app/tmp/data.db")) as conn:
+    recorder.flush()
+    with closing(sqlite3.connect(recorder.database_path)) as conn:
         cursor = conn.cursor()
-        cursor.execute(
-            "CREATE TABLE IF NOT EXISTS inventory (item_name TEXT PRIMARY KEY, count INTEGER)"
-        )
         if not item_names:
             cursor.execute("SELECT item_name, count FROM inventory")
         else:
@@ -529,29 +711,15 @@ def get_inventory_counts(item_names: list[str] | None = None):
 
 
 def save_log(message: str, task: str = "{}", level: str = "INFO"):
-    database_path = get_path("@app/tmp/data.db")
     try:
-        get_path("@app/tmp").mkdir(exist_ok=True)
-        conn = sqlite3.connect(database_path)
-        cursor = conn.cursor()
-        cursor.execute(
-            "CREATE TABLE IF NOT EXISTS log ("
-            "time INTEGER,"
-            "task TEXT,"
-            "level TEXT,"
-            "message TEXT"
-            ")"
-        )
         if not task:
             task = "{}"
         if not isinstance(task, str):
             task = json.dumps(task, ensure_ascii=False)
-        cursor.execute(
+        recorder.submit(
             "INSERT INTO log VALUES (?, ?, ?, ?)",
             (int(datetime.now().timestamp()), task, level, message),
         )
-        conn.commit()
-        conn.close()
     except Exception as e:
         logger.error(f"Log DB error: {e}")
 
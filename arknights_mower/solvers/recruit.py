@@ -1,17 +1,12 @@
-import lzma
-import pickle
-from itertools import combinations
+from functools import cache
+from typing import Optional
 
 import cv2
 import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
 
-from arknights_mower import __rootdir__
-from arknights_mower.data import (
-    agent_with_tags,
-    recruit_agent,
-)
-from arknights_mower.models import noto_sans, riic_base_digits
-from arknights_mower.utils import config
+from arknights_mower import data, models
+from arknights_mower.utils import config, recruit_calc
 from arknights_mower.utils.device.device import Device
 from arknights_mower.utils.email import recruit_rarity, recruit_template, send_message
 from arknights_mower.utils.graph import SceneGraphSolver
@@ -20,11 +15,81 @@ from arknights_mower.utils.log import logger
 from arknights_mower.utils.recognize import Recognizer, Scene
 from arknights_mower.utils.vector import va
 
-number = riic_base_digits
-with lzma.open(f"{__rootdir__}/models/recruit_result.pkl", "rb") as f:
-    recruit_res_template = pickle.load(f)
-with lzma.open(f"{__rootdir__}/models/recruit.pkl", "rb") as f:
-    tag_template = pickle.load(f)
+
+def normalize_rows(rows: np.ndarray) -> np.ndarray:
+    """每行减去均值后除以范数，点积即为归一化相关系数（TM_CCOEFF_NORMED）"""
+    rows = rows.reshape(len(rows), -1).astype(np.float32)
+    rows -= rows.mean(axis=1, keepdims=True)
+    rows /= np.linalg.norm(rows, axis=1, keepdims=True) + 1e-6
+    return rows
+
+
+@cache
+def tag_templates(scale: int) -> tuple[list[str], np.ndarray]:
+    """所有标签模板转为灰度、缩小 scale 倍后堆叠成矩阵，每行一个模板"""
+    names = list(models.recruit)
+    rows = []
+    for name in names:
+        gray = cv2.cvtColor(models.recruit[name], cv2.COLOR_RGB2GRAY)
+        h, w = gray.shape
+        rows.append(
+            cv2.resize(gray, (w // scale, h // scale), interpolation=cv2.INTER_AREA)
+        )
+    return names, normalize_rows(np.stack(rows))
+
+
+def tag_windows(gray: np.ndarray, shape: tuple[int, int], scale: int) -> np.ndarray:
+    """截图缩小 scale 倍后所有与模板同尺寸的窗口，形状为 (行, 列, 高, 宽)"""
+    h, w = gray.shape
+    small = cv2.resize(gray, (w // scale, h // scale), interpolation=cv2.INTER_AREA)
+    return sliding_window_view(small, shape)
+
+
+def match_tags(
+    crops: list[np.ndarray],
+    coarse: int = 4,
+    fine: int = 2,
+    radius: int = 2,
+    margin: float = 0.05,
+) -> list[Optional[str]]:
+    """所有标签截图与所有模板用矩阵乘法打分
+
+    先在缩小 coarse 倍的截图上，用全部窗口与全部模板的乘积找到标签框；
+    再在缩小 fine 倍的截图上取其附近 radius 像素内的窗口，
+    所有截图的窗口一起与模板矩阵相乘，得到每张截图对每个标签的最高分；
+    最高分与次高分相差不到 margin 时视为无法识别，返回 None
+    """
+    names, coarse_templates = tag_templates(coarse)
+    _, fine_templates = tag_templates(fine)
+    th, tw = next(iter(models.recruit.values())).shape[:2]
+    patches = []
+    for crop in crops:
+        gray = cv2.cvtColor(crop, cv2.COLOR_RGB2GRAY)
+        windows = tag_windows(gray, (th // coarse, tw // coarse), coarse)
+        scores = normalize_rows(windows.reshape(-1, *windows.shape[2:]))
+        scores = scores @ coarse_templates.T
+        y, x = divmod(int(scores.max(axis=1).argmax()), windows.shape[1])
+
+        windows = tag_windows(gray, (th // fine, tw // fine), fine)
+        y, x = y * coarse // fine, x * coarse // fine
+        y0, x0 = max(y - radius, 0), max(x - radius, 0)
+        y1 = min(y + radius + 1, windows.shape[0])
+        x1 = min(x + radius + 1, windows.shape[1])
+        patches.append(windows[y0:y1, x0:x1].reshape(-1, *windows.shape[2:]))
+
+    counts = np.cumsum([0] + [len(p) for p in patches])
+    scores = normalize_rows(np.concatenate(patches)) @ fine_templates.T
+    result = []
+    for start, end in zip(counts[:-1], counts[1:]):
+        score = scores[start:end].max(axis=0)
+        second, best = np.argsort(score)[-2:]
+        if score[best] - score[second] < margin:
+            result.append(None)
+        else:
+            result.append(names[best])
+    return result
+
+
 job_list = [
     "recruit/riic_res/CASTER",
     "recruit/riic_res/MEDIC",
@@ -204,7 +269,7 @@ class RecruitSolver(SceneGraphSolver):
                 logger.info(f"选择标签:{choose}")
                 tag_all_choose = True
                 for x in choose:
-                    h, w, _ = tag_template[x].shape
+                    h, w, _ = models.recruit[x].shape
                     tag_img = cropimg(self.recog.img, [tags[x], va(tags[x], (w, h))])
 
                     if self.tag_not_choosed(tag_img):
@@ -304,12 +369,12 @@ class RecruitSolver(SceneGraphSolver):
             img = cv2.threshold(img, 220, 255, cv2.THRESH_BINARY)[1]
 
             score = {}
-            for id in recruit_res_template:
-                res = recruit_res_template[id]
+            for id in models.recruit_result:
+                res = models.recruit_result[id]
                 result = cv2.matchTemplate(img, res, cv2.TM_CCORR_NORMED, res)
                 _, max_val, _, _ = cv2.minMaxLoc(result)
                 score[id] = max_val
-            self.result_agent[self.recruit_index] = recruit_agent[
+            self.result_agent[self.recruit_index] = data.recruit_agent[
                 max(score, key=score.get)
             ]["name"]
 
@@ -391,87 +456,9 @@ class RecruitSolver(SceneGraphSolver):
 
     def recruit_cal(self, tags: list[str]):
         logger.debug(f"选择标签{tags}")
-        index_dict = {k: i for i, k in enumerate(self.recruit_order)}
-        combined_agent = {}
         if "新手" in tags:
             tags.remove("新手")
-        for item in combinations(tags, 1):
-            tmp = agent_with_tags[item[0]]
-
-            if len(tmp) == 0:
-                continue
-            tmp.sort(key=lambda k: k["star"], reverse=True)
-            combined_agent[item] = tmp
-        for item in combinations(tags, 2):
-            tmp = [j for j in agent_with_tags[item[0]] if j in agent_with_tags[item[1]]]
-
-            if len(tmp) == 0:
-                continue
-            tmp.sort(key=lambda k: k["star"])
-            combined_agent[item] = tmp
-        for item in combinations(tags, 3):
-            tmp1 = [
-                j for j in agent_with_tags[item[0]] if j in agent_with_tags[item[1]]
-            ]
-            tmp = [j for j in tmp1 if j in agent_with_tags[item[2]]]
-
-            if len(tmp) == 0:
-                continue
-            tmp.sort(key=lambda k: k["star"], reverse=True)
-            combined_agent[item] = tmp
-
-        sorted_list = sorted(
-            combined_agent.items(), key=lambda x: index_dict[x[1][0]["star"]]
-        )
-
-        result_dict = {}
-        for item in sorted_list:
-            result_dict[item[0]] = []
-            max_star = -1
-            min_star = 7
-            for agent in item[1]:
-                if "高级资深干员" not in item[0] and agent["star"] == 6:
-                    continue
-                if agent["star"] > max_star:
-                    max_star = agent["star"]
-                if agent["star"] < min_star:
-                    min_star = agent["star"]
-            for agent in item[1]:
-                if max_star > 1 and agent["star"] == 2:
-                    continue
-                if max_star > 1 and agent["star"] == 1:
-                    continue
-                if max_star < 6 and agent["star"] == 6:
-                    continue
-                result_dict[item[0]].append(agent)
-
-            try:
-                for key in list(result_dict.keys()):
-                    if len(result_dict[key]) == 0:
-                        result_dict.pop(key)
-
-                result_dict[item[0]] = sorted(
-                    result_dict[item[0]], key=lambda x: x["star"], reverse=True
-                )
-                min_star = result_dict[item[0]][-1]["star"]
-                for res in result_dict[item[0]][:]:
-                    if res["star"] > min_star:
-                        result_dict[item[0]].remove(res)
-            except KeyError:
-                logger.debug("Recruit Cal Key Error :{}".format(result_dict))
-                continue
-        result = {
-            6: [],
-            5: [],
-            4: [],
-            3: [],
-            2: [],
-            1: [],
-        }
-        for tag in result_dict:
-            result[result_dict[tag][0]["star"]].append(
-                {"tag": tag, "result": result_dict[tag]}
-            )
+        result = recruit_calc.recruit_cal(tags, self.recruit_order)
         for item in result:
             if result[item]:
                 logger.debug("{}:{}".format(item, result[item]))
@@ -488,27 +475,18 @@ class RecruitSolver(SceneGraphSolver):
         tags = {}
         h, w, _ = img.shape
 
-        for index, value in enumerate(tags_img):
+        for value in tags_img:
             if self.tag_not_choosed(value) is False:
                 return False
-            max_v = -1
-            tag_res = None
-            for key in tag_template:
-                res = cv2.matchTemplate(
-                    value,
-                    tag_template[key],
-                    cv2.TM_CCORR_NORMED,
-                )
-
-                _, max_val, _, _ = cv2.minMaxLoc(res)
-                if max_val > max_v:
-                    tag_res = {"tag": key, "val": max_val}
-                    max_v = max_val
+        for index, tag in enumerate(match_tags(tags_img)):
+            if tag is None:
+                logger.warning(f"第{index + 1}个标签识别结果不确定")
+                return False
             tag_pos = (
                 int(left + (index % 3) * int(w / 3) + 30),
                 int(up + int(index / 3) * int(h / 2) + 30),
             )
-            tags[tag_res["tag"]] = tag_pos
+            tags[tag] = tag_pos
         return tags
 
     def split_tags(self, img):
@@ -550,7 +528,7 @@ class RecruitSolver(SceneGraphSolver):
                 continue
             score = []
             for i in range(10):
-                im = number[i]
+                im = models.riic_base_digits[i]
                 if digit.shape[0] < im.shape[0] or digit.shape[1] < im.shape[1]:
                     continue
                 result = cv2.matchTemplate(digit, im, cv2.TM_SQDIFF_NORMED)
@@ -580,7 +558,7 @@ class RecruitSolver(SceneGraphSolver):
             area = [(850, 280), (980, 400)]
 
         img = cropimg(self.recog.gray, area)
-        templates = noto_sans
+        templates = models.noto_sans
         default_height = 28
 
         if height and height != default_height:
@@ -4,13 +4,12 @@ import os
 import cv2
 import pandas as pd
 
-from arknights_mower.models import noto_sans
 from arknights_mower.utils.datetime import get_server_time
 from arknights_mower.utils.device.device import Device
-from arknights_mower.utils.digit_reader import DigitReader
+from arknights_mower.utils.digit_reader import DigitReader, read_number
 from arknights_mower.utils.email import report_template, send_message
 from arknights_mower.utils.graph import SceneGraphSolver
-from arknights_mower.utils.image import cropimg, thres2
+from arknights_mower.utils.image import cropimg
 from arknights_mower.utils.log import logger
 from arknights_mower.utils.path import get_path
 from arknights_mower.utils.recognize import Recognizer, Scene, tp
@@ -248,30 +247,7 @@ class ReportSolver(SceneGraphSolver):
         self, img, scope: tp.Scope, height: int | None = 18, thres: int | None = 100
     ):
         img = cropimg(img, scope)
-
-        default_height = 29
-        if height and height != default_height:
-            scale = default_height / height
-            img = cv2.resize(img, None, None, scale, scale)
-        img = thres2(img, thres)
-        contours, _ = cv2.findContours(img, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
-        rect = [cv2.boundingRect(c) for c in contours]
-        rect.sort(key=lambda c: c[0])
-        value = 0
-        for x, y, w, h in rect:
-            digit = cropimg(img, ((x, y), (x + w, y + h)))
-            digit = cv2.copyMakeBorder(
-                digit, 10, 10, 10, 10, cv2.BORDER_CONSTANT, None, (0,)
-            )
-
-            score = []
-            for i in range(10):
-                im = noto_sans[i]
-                result = cv2.matchTemplate(digit, im, cv2.TM_SQDIFF_NORMED)
-                min_val, max_val, min_loc, max_loc = cv2.minMaxLoc(result)
-                score.append(min_val)
-            value = value * 10 + score.index(min(score))
-        return value
+        return read_number(img, "noto", height, 29, thres)
 
 
 def get_report_data():
@@ -3,12 +3,13 @@ from typing import Optional
 
 import cv2
 
-from arknights_mower.models import secret_front
+from arknights_mower import models
 from arknights_mower.utils import config
 from arknights_mower.utils import typealias as tp
 from arknights_mower.utils.csleep import MowerExit
+from arknights_mower.utils.digit_reader import read_number
 from arknights_mower.utils.email import send_message
-from arknights_mower.utils.image import cropimg, thres2
+from arknights_mower.utils.image import cropimg
 from arknights_mower.utils.log import logger
 from arknights_mower.utils.matcher import Matcher
 from arknights_mower.utils.recognize import Scene
@@ -92,30 +93,7 @@ class SecretFront(BaseSolver):
 
     def number(self, scope: tp.Scope, height: Optional[int] = None):
         img = cropimg(self.recog.gray, scope)
-        if height:
-            scale = 25 / height
-            img = cv2.resize(img, None, None, scale, scale)
-        img = thres2(img, 127)
-        contours, _ = cv2.findContours(img, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
-        rect = [cv2.boundingRect(c) for c in contours]
-        rect.sort(key=lambda c: c[0])
-
-        value = 0
-
-        for x, y, w, h in rect:
-            digit = cropimg(img, ((x, y), (x + w, y + h)))
-            digit = cv2.copyMakeBorder(
-                digit, 10, 10, 10, 10, cv2.BORDER_CONSTANT, None, (0,)
-            )
-            score = []
-            for i in range(10):
-                im = secret_front[i]
-                result = cv2.matchTemplate(digit, im, cv2.TM_SQDIFF_NORMED)
-                min_val, max_val, min_loc, max_loc = cv2.minMaxLoc(result)
-                score.append(min_val)
-            value = value * 10 + score.index(min(score))
-
-        return value
+        return read_number(img, "secret_front", height)
 
     def card_pos(self, total, idx):
         if total == 3:
@@ -133,7 +111,9 @@ class SecretFront(BaseSolver):
         img = cv2.copyMakeBorder(img, 10, 10, 10, 10, cv2.BORDER_CONSTANT, None, (0,))
         score = []
         for i in self.target:
-            result = cv2.matchTemplate(img, secret_front[i], cv2.TM_SQDIFF_NORMED)
+            result = cv2.matchTemplate(
+                img, models.secret_front[i], cv2.TM_SQDIFF_NORMED
+            )
             min_val, max_val, min_loc, max_loc = cv2.minMaxLoc(result)
             score.append(min_val)
         name = list(self.target)[score.index(min(score))]
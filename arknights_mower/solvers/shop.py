@@ -1,8 +1,9 @@
 import cv2
 
-from arknights_mower.models import noto_sans, riic_base_digits, shop
+from arknights_mower import models
 from arknights_mower.utils import config
 from arknights_mower.utils import typealias as tp
+from arknights_mower.utils.digit_reader import read_number
 from arknights_mower.utils.graph import SceneGraphSolver
 from arknights_mower.utils.image import cropimg, thres2
 from arknights_mower.utils.log import logger
@@ -39,38 +40,8 @@ class CreditShop(SceneGraphSolver):
             height: 高度
         """
         img = cropimg(self.recog.gray, scope)
-
-        if font == "riic_base":
-            templates = riic_base_digits
-            default_height = 28
-        else:
-            templates = noto_sans
-            default_height = 29
-
-        if height and height != default_height:
-            scale = default_height / height
-            img = cv2.resize(img, None, None, scale, scale)
-        img = thres2(img, thres)
-        contours, _ = cv2.findContours(img, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
-        rect = [cv2.boundingRect(c) for c in contours]
-        rect.sort(key=lambda c: c[0])
-
-        value = 0
-
-        for x, y, w, h in rect:
-            digit = cropimg(img, ((x, y), (x + w, y + h)))
-            digit = cv2.copyMakeBorder(
-                digit, 10, 10, 10, 10, cv2.BORDER_CONSTANT, None, (0,)
-            )
-            score = []
-            for i in range(10):
-                im = templates[i]
-                result = cv2.matchTemplate(digit, im, cv2.TM_SQDIFF_NORMED)
-                min_val, max_val, min_loc, max_loc = cv2.minMaxLoc(result)
-                score.append(min_val)
-            value = value * 10 + score.index(min(score))
-
-        return value
+        default_height = 28 if font == "riic_base" else 29
+        return read_number(img, font, height, default_height, thres)
 
     def credit_remain(self):
         credits = self.number(((1700, 39), (1800, 75)), "riic_base", thres=180)
@@ -102,7 +73,7 @@ class CreditShop(SceneGraphSolver):
                 target, 10, 10, 30, 10, cv2.BORDER_CONSTANT, None, (0,)
             )
             target = thres2(target, 127)
-            for name, img in shop.items():
+            for name, img in models.shop.items():
                 result = cv2.matchTemplate(target, img, cv2.TM_SQDIFF_NORMED)
                 min_val, max_val, min_loc, max_loc = cv2.minMaxLoc(result)
                 if min_val < score:
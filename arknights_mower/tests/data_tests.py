@@ -0,0 +1,72 @@
+import unittest
+
+from arknights_mower import data
+
+
+def find_stage_linear(name):
+    """逐项比较的旧实现，作为对照"""
+    return next(
+        (
+            item
+            for item in data.stage_data_full
+            if item.get("id") == name or item.get("name") == name
+        ),
+        None,
+    )
+
+
+class TestData(unittest.TestCase):
+    def test_find_stage(self):
+        keys = {item.get("id") for item in data.stage_data_full}
+        keys |= {item.get("name") for item in data.stage_data_full}
+        keys |= {"不存在的关卡", "", None}
+        for key in keys:
+            self.assertIs(data.find_stage(key), find_stage_linear(key))
+
+    def test_agent_with_tags(self):
+        recruit_agent = data.recruit_agent
+        expected = {}
+        for item in data.recruit_tag:
+            expected[item] = []
+            for agent in recruit_agent:
+                if {item} < set(recruit_agent[agent]["tags"]):
+                    expected[item].append(
+                        {
+                            "id": agent,
+                            "name": recruit_agent[agent]["name"],
+                            "star": recruit_agent[agent]["stars"],
+                        }
+                    )
+        # recruit_cal 会原地排序 agent_with_tags，这里直接比较重新计算的结果
+        self.assertEqual(data._agent_with_tags(recruit_agent), expected)
+
+    def test_items(self):
+        self.assertEqual(data.key_mapping, {**data.item_by_name, **data.item_by_id})
+        for key, value in data.item_by_id.items():
+            self.assertEqual(key, value[0])
+        for key, value in data.item_by_name.items():
+            self.assertEqual(key, value[2])
+
+    def test_cache(self):
+        value = data.build_index("stage_by_name")
+        self.assertEqual(value, data.build_index("stage_by_name"))
+        self.assertEqual(value, data.stage_by_name)
+
+    def test_cache_key(self):
+        # 同名索引的计算代码改变后不再读取旧的缓存
+        for value in (1, 2):
+            namespace = {}
+            exec(f"def _code_key(recruit_agent):\n    return {value}", namespace)
+            data.INDEXES["code_key"] = (("recruit_agent",), namespace["_code_key"])
+            try:
+                self.assertEqual(data.build_index("code_key"), value)
+            finally:
+                del data.INDEXES["code_key"]
+
+    def test_unknown(self):
+        with self.assertRaises(AttributeError):
+            data.not_a_dataset
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,50 @@
+import lzma
+import pickle
+import tempfile
+import unittest
+
+import numpy as np
+
+from arknights_mower import __rootdir__
+from arknights_mower.utils.depot_index import 加载物品分类器, 物品分类索引
+
+
+class TestDepotIndex(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        with lzma.open(f"{__rootdir__}/models/NORMAL.pkl", "rb") as pkl:
+            cls.knn = pickle.load(pkl)
+        # 训练模板本身、加噪声的模板以及两两混合的模板
+        rng = np.random.default_rng(0)
+        # 发布的模型中只有 kNN 本身保存了训练模板
+        cls.模板 = 模板 = cls.knn._fit_X
+        cls.模板标签 = cls.knn.classes_[cls.knn._y]
+        噪声 = 模板 + rng.normal(0, 0.02, 模板.shape)
+        i, j = rng.integers(0, len(模板), (2, 200))
+        w = rng.uniform(0, 1, (200, 1))
+        混合 = w * 模板[i] + (1 - w) * 模板[j]
+        cls.测试集 = np.vstack([模板, 噪声, 混合])
+
+    def test_same_labels(self):
+        with tempfile.TemporaryDirectory() as d:
+            索引 = 物品分类索引.导出(self.模板, self.模板标签, f"{d}/NORMAL")
+            expected = self.knn.predict(self.测试集)
+            self.assertEqual(索引.predict(self.测试集).tolist(), expected.tolist())
+            # 模板分块计算距离时结果不变
+            索引.分块 = 7
+            self.assertEqual(索引.predict(self.测试集).tolist(), expected.tolist())
+
+    def test_shipped_index(self):
+        分类器 = 加载物品分类器(f"{__rootdir__}/models/NORMAL")
+        self.assertIsInstance(分类器, 物品分类索引)
+        self.assertIsNone(分类器.标签)
+        分类器.加载()
+        self.assertIsInstance(分类器.模板, np.memmap)
+        self.assertEqual(
+            分类器.predict(self.测试集).tolist(),
+            self.knn.predict(self.测试集).tolist(),
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
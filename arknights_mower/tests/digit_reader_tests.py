@@ -0,0 +1,64 @@
+import unittest
+
+import cv2
+import numpy as np
+
+from arknights_mower.utils.digit_reader import get_templates
+from arknights_mower.utils.image import loadres
+
+
+def compose(folder, digits, height, gap=2):
+    """把模板按顺序拼成一张黑底横条"""
+    templates = [loadres(f"{folder}/{d}", True) for d in digits]
+    width = sum(t.shape[1] + gap for t in templates) + 10
+    img = np.zeros((height, width), np.uint8)
+    x = 5
+    for t in templates:
+        y = (height - t.shape[0]) // 2
+        img[y : y + t.shape[0], x : x + t.shape[1]] = t
+        x += t.shape[1] + gap
+    return img
+
+
+class TestDigitTemplates(unittest.TestCase):
+    def test_scan(self):
+        templates = get_templates("drone_count").with_method(cv2.TM_CCORR_NORMED)
+        img = compose("drone_count", [1, 2, 7], 44)
+        self.assertEqual(templates.scan(img, 0.95), [1, 2, 7])
+
+    def test_scan_limit(self):
+        templates = get_templates("orders_time")
+        img = compose("orders_time", [0, 3, 5, 9, 2, 8], 33)
+        self.assertEqual(templates.scan(img, 0.85, limit=6), [0, 3, 5, 9, 2, 8])
+        self.assertEqual(len(templates.scan(img, 0.85, limit=3)), 3)
+
+    def test_scan_many(self):
+        templates = get_templates("depot_num")
+        imgs = [compose("depot_num", d, 40) for d in (["digit_1"], ["digit_3"])]
+        width = max(img.shape[1] for img in imgs)
+        imgs = [np.pad(img, ((0, 0), (0, width - img.shape[1]))) for img in imgs]
+        expected = [templates.scan(img, 0.85) for img in imgs]
+        self.assertEqual(templates.scan_many(imgs, 0.85), expected)
+
+    def test_scan_many_clipped(self):
+        # 仓库最右一列的物品被截图边缘裁掉，比其他物品窄
+        templates = get_templates("depot_num")
+        number = compose("depot_num", ["digit_1", "digit_2"], 40)
+        full = np.zeros((260, 260), np.uint8)
+        full[200:240, 100 : 100 + number.shape[1]] = number
+        clipped = np.zeros((260, 224), np.uint8)
+        clipped[200:240, 20 : 20 + number.shape[1]] = number
+        imgs = [full, clipped, full[:, :5]]
+        expected = [templates.scan(img, 0.85) for img in imgs]
+        self.assertEqual(expected[0], expected[1])
+        self.assertTrue(expected[0])
+        self.assertEqual(templates.scan_many(imgs, 0.85), expected)
+
+    def test_classify(self):
+        templates = get_templates("orders_time").with_method(cv2.TM_SQDIFF_NORMED)
+        glyphs = [loadres(f"orders_time/{d}", True) for d in (4, 0, 6)]
+        self.assertEqual(templates.classify(glyphs), [4, 0, 6])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,88 @@
+import copy
+import random
+import unittest
+from datetime import datetime
+
+from arknights_mower.tests.operators_index_tests import init_opdata
+from arknights_mower.utils.mood import MoodTable, simulate_fia
+from arknights_mower.utils.operators import Operator
+
+
+def predict_fia_recursive(operators, fia_mood, hours=240):
+    """递归的旧实现，作为对照"""
+    recover_hours = (24 - fia_mood) / 2
+    for agent in operators:
+        agent.mood -= agent.depletion_rate * recover_hours
+        if agent.mood < 0.0:
+            return False
+    if recover_hours >= hours or 0 < recover_hours < 1:
+        return True
+    operators.sort(
+        key=lambda x: (x.mood - x.lower_limit) / (x.upper_limit - x.lower_limit),
+        reverse=False,
+    )
+    fia_mood = operators[0].mood
+    operators[0].mood = 24
+    return predict_fia_recursive(operators, fia_mood, hours - recover_hours)
+
+
+def random_operators(rng, n):
+    return [
+        Operator(
+            f"op{i}",
+            "meeting",
+            mood=rng.uniform(8, 24),
+            lower_limit=rng.choice([0, 4, 8]),
+            depletion_rate=rng.uniform(0.5, 2),
+        )
+        for i in range(n)
+    ]
+
+
+class TestFiaSimulator(unittest.TestCase):
+    def test_same_as_recursive(self):
+        rng = random.Random(0)
+        op_data = init_opdata()
+        for _ in range(200):
+            operators = random_operators(rng, rng.randrange(1, 6))
+            fia_mood = rng.uniform(0, 23)
+            before = copy.deepcopy(operators)
+            self.assertEqual(
+                op_data.predict_fia(operators, fia_mood),
+                predict_fia_recursive(copy.deepcopy(operators), fia_mood),
+            )
+            # 新实现不修改干员数据
+            self.assertEqual([op.mood for op in operators], [op.mood for op in before])
+
+    def test_timeline(self):
+        ops = [
+            Operator("a", "meeting", mood=24, depletion_rate=1),
+            Operator("b", "meeting", mood=12, depletion_rate=1),
+        ]
+        sustainable, timeline = simulate_fia(
+            [op.mood for op in ops], [1, 1], [0, 0], [24, 24], 12, hours=30
+        )
+        self.assertTrue(sustainable)
+        # 第 6 小时给心情较低的 b 充能，菲亚心情变为 6，再休息 9 小时
+        self.assertEqual(timeline[0], (6.0, 1, 6.0))
+        self.assertEqual(timeline[1][:2], (15.0, 0))
+        self.assertFalse(simulate_fia([2], [4], [0], [24], 0)[0])
+        self.assertFalse(simulate_fia([], [], [], [], 20)[0])
+
+    def test_table(self):
+        op_data = init_opdata()
+        now = datetime.now()
+        names = ["夕", "焰尾", "森蚺"]
+        for name in names:
+            op_data.operators[name].mood = 20
+            op_data.operators[name].depletion_rate = 1
+            op_data.operators[name].time_stamp = now
+        table = MoodTable(op_data.operators.values(), now=now)
+        self.assertEqual(
+            table.fia_timeline(names, 10)[0],
+            op_data.predict_fia([op_data.operators[n] for n in names], 10),
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,395 @@
+"""离线基建排班模拟
+
+用虚拟时钟和虚拟基建代替模拟器，驱动 BaseSchedulerSolver 的排班逻辑，
+统计任务数量、排班耗费的 CPU 时间和每次决策的耗时。
+
+    python -m arknights_mower.tests.infra_simulation
+"""
+
+import logging
+import random
+import tempfile
+import time
+from contextlib import ExitStack, contextmanager
+from datetime import datetime, timedelta
+from pathlib import Path
+from types import SimpleNamespace
+from unittest.mock import patch
+
+import numpy as np
+
+from arknights_mower.data import agent_list
+from arknights_mower.solvers import base_schedule, record
+from arknights_mower.solvers.base_schedule import BaseSchedulerSolver
+from arknights_mower.utils import config, mood, operators, scheduler_task
+from arknights_mower.utils.log import logger
+from arknights_mower.utils.news_checker import NewsChecker
+from arknights_mower.utils.operators import Operators
+from arknights_mower.utils.plan import Plan, PlanConfig, Room
+from arknights_mower.utils.recognize import Scene
+from arknights_mower.utils.solver import BaseSolver
+
+# 使用 datetime.now() 的排班相关模块
+CLOCK_MODULES = [base_schedule, record, mood, operators, scheduler_task]
+# 有特殊逻辑的干员不放进随机排班表
+SPECIAL_AGENTS = {
+    "龙舌兰",
+    "但书",
+    "佩佩",
+    "菲亚梅塔",
+    "波登可",
+    "歌蕾蒂娅",
+    "见行者",
+    "九色鹿",
+    "年",
+}
+
+
+class VirtualClock:
+    def __init__(self, start: datetime):
+        self.now = start
+
+    def advance(self, seconds: float):
+        self.now += timedelta(seconds=seconds)
+
+    def advance_to(self, time: datetime):
+        self.now = max(self.now, time)
+
+    def datetime(self):
+        """now() 返回虚拟时间的 datetime 类"""
+        clock = self
+
+        class VirtualMeta(type):
+            def __instancecheck__(cls, instance):
+                return isinstance(instance, datetime)
+
+        class VirtualDatetime(datetime, metaclass=VirtualMeta):
+            @classmethod
+            def now(cls, tz=None):
+                return clock.now if tz is None else clock.now.astimezone(tz)
+
+        return VirtualDatetime
+
+
+def random_plan(rng: random.Random, replacements=2):
+    """随机生成排班表：9 个制造站/贸易站、控制中枢、会客室、办公室和 4 个宿舍"""
+    names = [n for n in agent_list if n not in SPECIAL_AGENTS]
+    rng.shuffle(names)
+    names = iter(names)
+    rooms = {"central": 5, "meeting": 2, "contact": 1}
+    rooms.update({f"room_{i}_{j}": 3 for i in range(1, 4) for j in range(1, 4)})
+    plan_config = {
+        room: [
+            Room(next(names), "", [next(names) for _ in range(replacements)])
+            for _ in range(count)
+        ]
+        for room, count in rooms.items()
+    }
+    for i in range(1, 5):
+        plan_config[f"dormitory_{i}"] = [Room(next(names), "", []) for _ in range(2)]
+        plan_config[f"dormitory_{i}"] += [Room("Free", "", []) for _ in range(3)]
+    return {
+        "default_plan": Plan(plan_config, PlanConfig("", "", "")),
+        "backup_plans": [],
+    }
+
+
+class InfraModel:
+    """虚拟基建：干员的真实位置和心情
+
+    工作时按各自的掉率消耗心情，在宿舍按 recover_rate 恢复，不在基建中则不变。
+    """
+
+    def __init__(self, rng: random.Random, now: datetime, recover_rate=2.0):
+        self.rng = rng
+        self.recover_rate = recover_rate
+        self.rooms = {}
+        self.location = {}
+        self.depletion_rate = {}
+        self.mood = {}
+        self.since = {}
+        self.now = now
+        # 工作中心情为 0 的累计小时数
+        self.exhausted_hours = 0.0
+
+    def add(self, name, mood=24.0):
+        if name not in self.mood:
+            self.mood[name] = mood
+            self.since[name] = self.now
+            self.depletion_rate[name] = self.rng.uniform(0.75, 1.5)
+
+    def settle(self, name, now):
+        self.add(name)
+        hours = (now - self.since[name]).total_seconds() / 3600
+        room = self.location.get(name, ("", -1))[0]
+        if room.startswith("dorm"):
+            self.mood[name] = min(24.0, self.mood[name] + self.recover_rate * hours)
+        elif room:
+            rate = self.depletion_rate[name]
+            left = self.mood[name] - rate * hours
+            if left < 0:
+                self.exhausted_hours += -left / rate
+            self.mood[name] = max(0.0, left)
+        self.since[name] = now
+
+    def settle_all(self, now):
+        for name in self.mood:
+            self.settle(name, now)
+
+    def current_mood(self, name, now):
+        self.settle(name, now)
+        return self.mood[name]
+
+    def place(self, room, size, names, now):
+        """把 names 依次安排到房间，原位置的干员下班"""
+        slots = self.rooms.setdefault(room, [""] * size)
+        for name in [*slots, *names]:
+            if name:
+                self.settle(name, now)
+        for name in slots:
+            self.location.pop(name, None)
+        for name in names:
+            if name in self.location:
+                old_room, old_index = self.location[name]
+                self.rooms[old_room][old_index] = ""
+        self.rooms[room] = [""] * size
+        for i, name in enumerate(names[:size]):
+            if name:
+                self.rooms[room][i] = name
+                self.location[name] = (room, i)
+
+    def rest_time(self, room, index, now):
+        """房间详情中显示的时间：宿舍为回满时间，工作房间为心情用尽时间"""
+        name = self.rooms[room][index]
+        mood = self.current_mood(name, now)
+        if room.startswith("dorm"):
+            hours = (24 - mood) / self.recover_rate
+        else:
+            hours = mood / self.depletion_rate[name]
+        return now + timedelta(hours=hours)
+
+
+class SimulatedScheduler(BaseSchedulerSolver):
+    """用虚拟基建代替设备的排班器，只覆盖截图、识别和点击相关的方法"""
+
+    # 模拟操作耗费的时间（秒）
+    enter_seconds = 5
+    back_seconds = 2
+    arrange_seconds = 20
+    read_seconds = 1
+
+    def __init__(self, plan, model: InfraModel, clock: VirtualClock):
+        with patch.object(BaseSolver, "__init__", lambda self, *args: None):
+            super().__init__()
+        self.device = None
+        image = np.full((1080, 1920, 3), 255, dtype=np.uint8)
+        self.recog = SimpleNamespace(
+            img=image,
+            gray=image[:, :, 0],
+            w=1920,
+            h=1080,
+            last_scene=None,
+            update=lambda: None,
+        )
+        self.global_plan = plan
+        self.model = model
+        self.clock = clock
+        self.drone_room = None
+        self.reload_room = None
+        self.enable_party = False
+        self.room_visits = 0
+
+    # 设备与界面
+    def check_current_focus(self):
+        pass
+
+    def scene(self):
+        return Scene.INFRA_MAIN
+
+    def find(self, res, *args, **kwargs):
+        if res in ["control_central", "confirm_blue"]:
+            return ((0, 0), (1, 1))
+        return None
+
+    def sleep(self, interval=1):
+        self.clock.advance(interval)
+
+    def back(self, interval=1):
+        self.clock.advance(self.back_seconds)
+
+    def back_to_index(self):
+        pass
+
+    def enter_room(self, room):
+        self.room_visits += 1
+        self.clock.advance(self.enter_seconds)
+
+    def turn_on_room_detail(self, room):
+        pass
+
+    def open_room_detail(self, room):
+        pass
+
+    # 房间详情
+    def read_room_names(self, room, slots):
+        names = self.model.rooms.get(room)
+        return [names[i] if names else "" for i in slots]
+
+    def read_room_mood(self, room, i):
+        self.clock.advance(self.read_seconds)
+        return self.model.current_mood(self.model.rooms[room][i], self.clock.now)
+
+    def read_room_time(self, room, i):
+        self.clock.advance(self.read_seconds)
+        return self.model.rest_time(room, i, self.clock.now)
+
+    # 换班
+    def choose_agent(self, agents, room, fast_mode=True, train_index=0):
+        if "" in agents:
+            agents = [item for item in agents if item != ""]
+        self.prepare_agents(agents, room)
+        if "Free" in agents:
+            # 与游戏中按心情升序选择空闲干员一致
+            free_list = sorted(
+                self.get_free_list(agents),
+                key=lambda name: (self.model.current_mood(name, self.clock.now), name),
+            )
+            for i, name in enumerate(agents):
+                if name == "Free" and free_list:
+                    agents[i] = free_list.pop(0)
+        names = [name if name != "Free" else "" for name in agents]
+        self.model.place(room, len(self.op_data.plan[room]), names, self.clock.now)
+        self.clock.advance(self.arrange_seconds)
+
+    def choose_train(self, agents, fast_mode=True):
+        self.choose_agent(agents, "train", fast_mode)
+
+    def tap_confirm(self, room, new_plan=None):
+        pass
+
+    # 不涉及排班的基建操作
+    def get_run_order_time(self, room):
+        return self.clock.now + timedelta(hours=1)
+
+    def get_order_remaining_time(self):
+        return 0
+
+    def drone(self, *args, **kwargs):
+        pass
+
+    def reload(self):
+        pass
+
+    def clue_new(self):
+        pass
+
+    def craft_material(self):
+        pass
+
+    def skill_upgrade(self, skill):
+        pass
+
+    def refresh_skill_time(self, task):
+        pass
+
+
+@contextmanager
+def simulation_env(clock: VirtualClock, quiet=True):
+    """替换排班相关模块的时钟，并隔离数据库、网络和消息推送"""
+    virtual_datetime = clock.datetime()
+    level = logger.level
+    callback = Operators.current_room_changed_callback
+    with ExitStack() as stack, tempfile.TemporaryDirectory() as tmp:
+        for module in CLOCK_MODULES:
+            stack.enter_context(patch.object(module, "datetime", virtual_datetime))
+        stack.enter_context(
+            patch.object(record, "get_path", lambda path: Path(tmp) / Path(path).name)
+        )
+        recorder = record.RecordWriter(Path(tmp) / "data.db")
+        stack.enter_context(patch.object(record, "recorder", recorder))
+        # 宿舍顺序按模拟的排班表重新生成，不写入配置文件
+        stack.enter_context(patch.object(config.conf, "dorm_order", ""))
+        stack.enter_context(patch.object(config, "save_conf", lambda: None))
+        stack.enter_context(
+            patch.object(NewsChecker, "get_update_time", return_value=(None, None))
+        )
+        stack.enter_context(
+            patch.object(base_schedule, "send_message", lambda *args, **kw: None)
+        )
+        if quiet:
+            logger.setLevel(logging.ERROR)
+        try:
+            yield
+        finally:
+            recorder.close()
+            logger.setLevel(level)
+            Operators.current_room_changed_callback = callback
+
+
+class SimulationReport:
+    def __init__(self):
+        self.runs = 0
+        self.errors = 0
+        self.tasks = {}
+        self.cpu_time = 0.0
+        self.latency = []
+        self.hours = 0.0
+        self.room_visits = 0
+        self.exhausted_hours = 0.0
+
+    def __str__(self):
+        latency = np.array(self.latency or [0.0]) * 1000
+        tasks = "，".join(f"{k} {v}" for k, v in sorted(self.tasks.items()))
+        return (
+            f"模拟 {self.hours:.1f} 小时，运行 {self.runs} 次，出错 {self.errors} 次\n"
+            f"任务：{tasks}\n"
+            f"进入房间 {self.room_visits} 次，"
+            f"干员工作中心情为 0 共 {self.exhausted_hours:.2f} 小时\n"
+            f"CPU 时间 {self.cpu_time:.3f}s，决策耗时 平均 {latency.mean():.2f}ms，"
+            f"P95 {np.percentile(latency, 95):.2f}ms，最大 {latency.max():.2f}ms"
+        )
+
+
+def simulate(days=7, seed=0, plan=None, quiet=True) -> SimulationReport:
+    """模拟 days 天的基建排班"""
+    rng = random.Random(seed)
+    if plan is None:
+        plan = random_plan(rng)
+    clock = VirtualClock(datetime(2024, 1, 1, 4))
+    model = InfraModel(rng, clock.now)
+    report = SimulationReport()
+    with simulation_env(clock, quiet):
+        solver = SimulatedScheduler(plan, model, clock)
+        if msg := solver.initialize_operators():
+            raise ValueError(msg)
+        # 初始按排班表上班，替换组休息
+        for name in solver.op_data.operators:
+            model.add(name, rng.uniform(8, 24))
+        for room, slots in solver.op_data.plan.items():
+            names = [data.agent if data.agent != "Free" else "" for data in slots]
+            model.place(room, len(slots), names, clock.now)
+        start, end = clock.now, clock.now + timedelta(days=days)
+        while clock.now < end:
+            if solver.tasks:
+                solver.tasks.sort(key=lambda x: x.time)
+                clock.advance_to(solver.tasks[0].time)
+                if solver.tasks[0].time <= clock.now:
+                    label = solver.tasks[0].type.display_value
+                    report.tasks[label] = report.tasks.get(label, 0) + 1
+            cpu, wall = time.process_time(), time.perf_counter()
+            solver.run()
+            report.cpu_time += time.process_time() - cpu
+            report.latency.append(time.perf_counter() - wall)
+            report.runs += 1
+            report.errors += solver.error
+            # 保证虚拟时间前进
+            clock.advance(1)
+        model.settle_all(clock.now)
+    report.hours = (clock.now - start).total_seconds() / 3600
+    report.room_visits = solver.room_visits
+    report.exhausted_hours = model.exhausted_hours
+    return report
+
+
+if __name__ == "__main__":
+    print(simulate())
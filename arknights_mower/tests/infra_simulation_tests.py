@@ -0,0 +1,49 @@
+import random
+import unittest
+from datetime import datetime, timedelta
+
+from arknights_mower.tests.infra_simulation import (
+    InfraModel,
+    VirtualClock,
+    simulate,
+    simulation_env,
+)
+from arknights_mower.utils import scheduler_task
+from arknights_mower.utils.scheduler_task import SchedulerTask
+
+
+class TestInfraSimulation(unittest.TestCase):
+    def test_virtual_clock(self):
+        clock = VirtualClock(datetime(2024, 1, 1, 4))
+        with simulation_env(clock):
+            self.assertEqual(SchedulerTask().time, datetime(2024, 1, 1, 4))
+            clock.advance(90)
+            self.assertEqual(
+                scheduler_task.datetime.now(), datetime(2024, 1, 1, 4, 1, 30)
+            )
+            self.assertIsInstance(datetime.now(), scheduler_task.datetime)
+        self.assertIs(scheduler_task.datetime, datetime)
+
+    def test_model(self):
+        start = datetime(2024, 1, 1, 4)
+        model = InfraModel(random.Random(0), start, recover_rate=2)
+        model.add("a", 10)
+        model.place("room_1_1", 3, ["a"], start)
+        rate = model.depletion_rate["a"]
+        later = start + timedelta(hours=2)
+        self.assertAlmostEqual(model.current_mood("a", later), 10 - 2 * rate)
+        model.place("dormitory_1", 5, ["", "", "a"], later)
+        self.assertEqual(model.rooms["room_1_1"], ["", "", ""])
+        self.assertEqual(model.current_mood("a", later + timedelta(hours=24)), 24)
+        self.assertEqual(model.exhausted_hours, 0)
+
+    def test_week(self):
+        report = simulate(days=7)
+        self.assertEqual(report.errors, 0)
+        self.assertGreater(report.tasks.get("下班", 0), 0)
+        self.assertGreater(report.tasks.get("上班", 0), 0)
+        self.assertGreaterEqual(report.hours, 7 * 24)
+
+
+if __name__ == "__main__":
+    unittest.main()
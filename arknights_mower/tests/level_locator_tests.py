@@ -0,0 +1,54 @@
+import unittest
+
+import cv2
+import numpy as np
+
+from arknights_mower import models
+from arknights_mower.solvers.navigation import LevelLocator, location
+from arknights_mower.utils.vector import va, vs
+
+
+def level_screen(rng, prefix, origin, h=1080, w=1920):
+    """按关卡图原点把关卡标签贴到带噪声的背景上"""
+    img = rng.integers(0, 80, (h, w), dtype=np.uint8)
+    img = cv2.GaussianBlur(img, (7, 7), 0)
+    for name, pos in location[prefix].items():
+        x, y = va(origin, pos)
+        template = models.navigation[name]
+        th, tw = template.shape
+        if 0 <= x and x + tw <= w and 0 <= y and y + th <= h:
+            img[y : y + th, x : x + tw] = template
+    return img
+
+
+def locate_loop(gray, prefix):
+    """全屏逐个模板搜索的旧实现，作为对照"""
+    name, val, loc = "", 1, None
+    for i in location[prefix]:
+        result = cv2.matchTemplate(gray, models.navigation[i], cv2.TM_SQDIFF_NORMED)
+        min_val, _, min_loc, _ = cv2.minMaxLoc(result)
+        if min_val < val:
+            val, loc, name = min_val, min_loc, i
+    return name, loc
+
+
+class TestLevelLocator(unittest.TestCase):
+    def test_swipes(self):
+        rng = np.random.default_rng(0)
+        for prefix in (1, 8):
+            locator = LevelLocator(prefix)
+            origin = (300, 400)
+            for step in range(5):
+                gray = level_screen(rng, prefix, origin)
+                name, loc = locator.locate(gray)
+                self.assertEqual(vs(loc, location[prefix][name]), origin)
+                expected = locate_loop(gray, prefix)
+                self.assertEqual(vs(expected[1], location[prefix][expected[0]]), origin)
+                if step > 0:
+                    self.assertLessEqual(locator.searched, 3)
+                # 模拟一次向左滑动，滑动距离不精确
+                origin = (origin[0] - 800 + int(rng.integers(-30, 30)), origin[1])
+
+
+if __name__ == "__main__":
+    unittest.main()
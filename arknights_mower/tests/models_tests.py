@@ -0,0 +1,25 @@
+import unittest
+
+from arknights_mower import models
+
+
+class TestModels(unittest.TestCase):
+    def test_lazy(self):
+        models._loaded.pop("shop", None)
+        self.assertNotIn("shop", models._loaded)
+        shop = models.shop
+        self.assertIn("shop", models._loaded)
+        self.assertIs(models.load("shop"), shop)
+
+    def test_unknown(self):
+        with self.assertRaises(AttributeError):
+            models.not_a_model
+
+    def test_preload(self):
+        models._loaded.pop("noto_sans", None)
+        models.preload(["noto_sans", "avatar"]).join()
+        self.assertIn("noto_sans", models._loaded)
+
+
+if __name__ == "__main__":
+    unittest.main()
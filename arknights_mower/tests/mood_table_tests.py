@@ -0,0 +1,82 @@
+import random
+import unittest
+from datetime import datetime, timedelta
+
+import numpy as np
+
+from arknights_mower.tests.operators_index_tests import ROOMS, init_opdata
+from arknights_mower.utils.mood import MoodTable
+
+
+def randomize_moods(rng, op_data, now):
+    for op in op_data.operators.values():
+        op.mood = rng.choice([-1, 0, 24, rng.uniform(0, 24)])
+        op.depletion_rate = rng.choice([0, -2, rng.uniform(0, 4)])
+        op.lower_limit = rng.choice([0, 4, 8])
+        op.time_stamp = rng.choice(
+            [None, now - timedelta(minutes=rng.randrange(0, 600))]
+        )
+        op.exhaust_time = rng.choice(
+            [None, now + timedelta(minutes=rng.randrange(-60, 600))]
+        )
+        op.workaholic = rng.random() < 0.1
+        op.exhaust_require = rng.random() < 0.1
+        op.current_room = rng.choice(ROOMS)
+
+
+def average_mood_loop(op_data, time):
+    total_mood = 0
+    current_mood = 0
+    for v in op_data.operators.values():
+        if not v.is_resting() and v.operator_type != "low" and not v.workaholic:
+            current_mood += v.current_mood(time) - v.lower_limit
+            total_mood += v.upper_limit - v.lower_limit
+    if total_mood == 0:
+        return 0
+    return current_mood / total_mood
+
+
+class TestMoodTable(unittest.TestCase):
+    def test_same_as_operator(self):
+        rng = random.Random(0)
+        op_data = init_opdata()
+        for _ in range(30):
+            now = datetime.now()
+            randomize_moods(rng, op_data, now)
+            table = MoodTable(op_data.operators.values(), op_data.dorm, now)
+            ops = list(op_data.operators.values())
+            for hours in [0, 0.5, 3, 12]:
+                t = now + timedelta(hours=hours)
+                np.testing.assert_allclose(
+                    table.current_mood(t), [op.current_mood(t) for op in ops]
+                )
+            np.testing.assert_allclose(
+                table.forecast([0, 3600])[1],
+                table.current_mood(now + timedelta(hours=1)),
+            )
+            exhaust = table.predict_exhaust()
+            for op, offset in zip(ops, exhaust):
+                diff = table.to_datetime(offset) - op.predict_exhaust()
+                # 与 now 有关的结果允许相差几秒
+                self.assertLess(abs(diff.total_seconds()), 2)
+            self.assertAlmostEqual(
+                table.average_mood(now), average_mood_loop(op_data, now)
+            )
+
+    def test_rested(self):
+        op_data = init_opdata()
+        now = datetime.now()
+        op_data.dorm[0].name = "塑心"
+        op_data.dorm[0].time = now + timedelta(hours=1)
+        op_data.dorm[1].name = "冰酿"
+        op_data.dorm[1].time = now - timedelta(minutes=1)
+        table = op_data.mood_table(now)
+        rested = dict(zip(table.names, table.rested()))
+        self.assertFalse(rested["塑心"])
+        self.assertTrue(rested["冰酿"])
+        self.assertFalse(rested["夕"])
+        self.assertTrue(table.rested(now + timedelta(hours=2))[table.index["塑心"]])
+
+
+if __name__ == "__main__":
+    unittest.main()
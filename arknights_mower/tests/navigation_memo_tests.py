@@ -0,0 +1,132 @@
+import json
+import tempfile
+import unittest
+from pathlib import Path
+
+import numpy as np
+
+from arknights_mower.solvers.navigation import (
+    NavigationMemo,
+    NavigationSolver,
+    location,
+)
+from arknights_mower.tests.level_locator_tests import level_screen
+from arknights_mower.utils.scene import Scene
+from arknights_mower.utils.vector import va
+
+
+class FakeGame:
+    """按固定流程切换场景的模拟器：终端 -> 主题曲 -> 关卡选择（可滑动） -> 作战准备"""
+
+    def __init__(self, origin, wrong_chapter=False):
+        self.rng = np.random.default_rng(0)
+        self.scene = Scene.TERMINAL_MAIN
+        self.origin = origin
+        self.wrong_chapter = wrong_chapter
+        self.actions = []
+        self.gray = None
+
+    def tap(self, pos):
+        self.actions.append(("tap", tuple(pos)))
+        if self.scene == Scene.TERMINAL_MAIN:
+            self.scene = Scene.TERMINAL_MAIN_THEME
+        elif self.scene == Scene.TERMINAL_MAIN_THEME:
+            if self.wrong_chapter:
+                self.scene = Scene.TERMINAL_COLLECTION
+            else:
+                self.scene = Scene.OPERATOR_CHOOSE_LEVEL
+        elif self.scene == Scene.OPERATOR_CHOOSE_LEVEL:
+            self.scene = Scene.OPERATOR_BEFORE
+
+    def swipe_ext(self, points, durations):
+        self.actions.append(("swipe", tuple(points[0]), tuple(points[-1])))
+        self.origin = va(self.origin, (points[-1][0] - points[0][0], 0))
+
+    def update(self):
+        if self.scene == Scene.OPERATOR_CHOOSE_LEVEL:
+            self.gray = level_screen(self.rng, 8, self.origin)
+
+
+def fake_solver(game):
+    solver = NavigationSolver.__new__(NavigationSolver)
+    solver.device = game
+    solver.recog = game
+    solver.scene = lambda: game.scene
+    solver.sleep = lambda interval=1: game.update()
+    solver.name = "R8-9"
+    solver.trace = None
+    solver.anchor = None
+    return solver
+
+
+def recorded_trace(origin):
+    """从原点 origin 开始、滑动一次后点击 R8-9 的导航记录"""
+    after = va(origin, (-800, 0))
+    return [
+        {
+            "scene": Scene.TERMINAL_MAIN,
+            "action": "tap",
+            "pos": [485, 1005],
+            "interval": 1,
+        },
+        {
+            "scene": Scene.TERMINAL_MAIN_THEME,
+            "action": "tap",
+            "pos": [900, 600],
+            "interval": 1,
+        },
+        {
+            "scene": Scene.OPERATOR_CHOOSE_LEVEL,
+            "action": "swipe",
+            "start": [1400, 540],
+            "movement": [-800, 0],
+            "interval": 0.2,
+            "anchor": {"level": "R8-1", "pos": va(origin, location[8]["R8-1"])},
+        },
+        {
+            "scene": Scene.OPERATOR_CHOOSE_LEVEL,
+            "action": "tap",
+            "pos": list(va(va(after, location[8]["R8-9"]), (60, 20))),
+            "interval": 1,
+            "anchor": {"level": "R8-5", "pos": va(after, location[8]["R8-5"])},
+        },
+    ]
+
+
+class TestNavigationMemo(unittest.TestCase):
+    def test_round_trip(self):
+        with tempfile.TemporaryDirectory() as d:
+            path = Path(d) / "navigation.json"
+            trace = recorded_trace((300, 400))
+            NavigationMemo(path).put("R8-9", trace)
+            self.assertEqual(
+                NavigationMemo(path).get("R8-9"), json.loads(json.dumps(trace))
+            )
+            memo = NavigationMemo(path)
+            memo.drop("R8-9")
+            self.assertIsNone(NavigationMemo(path).get("R8-9"))
+
+    def test_replay(self):
+        trace = json.loads(json.dumps(recorded_trace((300, 400))))
+        game = FakeGame((300, 400))
+        self.assertTrue(fake_solver(game).replay(trace))
+        self.assertEqual(game.scene, Scene.OPERATOR_BEFORE)
+        self.assertEqual(len(game.actions), 4)
+        self.assertEqual(game.actions[-1], ("tap", tuple(trace[-1]["pos"])))
+
+    def test_anchor_mismatch(self):
+        # 关卡图的位置与记录时不同，不能按记录的坐标点击
+        trace = recorded_trace((300, 400))
+        game = FakeGame((100, 400))
+        self.assertFalse(fake_solver(game).replay(trace))
+        self.assertEqual(len(game.actions), 2)
+
+    def test_scene_mismatch(self):
+        trace = recorded_trace((300, 400))
+        game = FakeGame((300, 400), wrong_chapter=True)
+        self.assertFalse(fake_solver(game).replay(trace))
+        self.assertEqual(len(game.actions), 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,46 @@
+import unittest
+
+import cv2
+import numpy as np
+
+from arknights_mower import models
+from arknights_mower.solvers.base_mixin import match_operator_names, operator_name_tpl
+
+
+def match_operator_name_loop(img):
+    """逐个模板匹配单个位置的旧实现，作为对照"""
+    tpl = operator_name_tpl(img)
+    max_score = 0
+    best_operator = None
+    for operator, template in models.operator_room.items():
+        result = cv2.matchTemplate(tpl, template, cv2.TM_CCORR_NORMED)
+        min_val, max_val, min_loc, max_loc = cv2.minMaxLoc(result)
+        if max_val > max_score:
+            max_score = max_val
+            best_operator = operator
+    return best_operator
+
+
+def name_crop(rng, template):
+    """把模板放进房间详情干员名区域大小的截图中"""
+    img = rng.integers(0, 120, (58, 344), dtype=np.uint8)
+    y, x = rng.integers(0, 8), rng.integers(0, 60)
+    img[y : y + 46, x : x + 265] = np.maximum(img[y : y + 46, x : x + 265], template)
+    return img
+
+
+class TestOperatorName(unittest.TestCase):
+    def test_same_as_loop(self):
+        rng = np.random.default_rng(0)
+        names = list(models.operator_room)
+        picked = [names[i] for i in rng.choice(len(names), 5, replace=False)]
+        crops = [name_crop(rng, models.operator_room[name]) for name in picked]
+        expected = [match_operator_name_loop(crop) for crop in crops]
+        self.assertEqual(match_operator_names(crops), expected)
+        self.assertEqual(expected, picked)
+        self.assertEqual(match_operator_names(crops[:1]), expected[:1])
+        self.assertEqual(match_operator_names([]), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
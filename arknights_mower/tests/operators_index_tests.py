@@ -0,0 +1,182 @@
+import copy
+import pickle
+import random
+import unittest
+
+from arknights_mower.utils.operators import Operators
+from arknights_mower.utils.plan import Plan, PlanConfig, Room
+
+ROOMS = ["central", "meeting", "train", "dormitory_1", "dormitory_2", ""]
+
+
+def init_opdata():
+    agent_base_config = PlanConfig("稀音,黑键,伊内丝", "稀音,柏喙,伊内丝", "见行者")
+    plan_config = {
+        "central": [
+            Room("夕", "", ["麒麟R夜刀"]),
+            Room("焰尾", "", ["凯尔希"]),
+            Room("森蚺", "", ["凯尔希"]),
+            Room("令", "", ["火龙S黑角"]),
+            Room("薇薇安娜", "", ["玛恩纳"]),
+        ],
+        "meeting": [
+            Room("伊内丝", "", ["陈", "红"]),
+            Room("见行者", "", ["陈", "红"]),
+        ],
+        "dormitory_1": [
+            Room("塑心", "", []),
+            Room("冰酿", "", []),
+            Room("Free", "", []),
+            Room("Free", "", []),
+            Room("Free", "", []),
+        ],
+        "dormitory_2": [
+            Room("琴柳", "", []),
+            Room("阿米娅", "", []),
+            Room("Free", "", []),
+            Room("Free", "", []),
+            Room("Free", "", []),
+        ],
+    }
+    plan = {
+        "default_plan": Plan(plan_config, agent_base_config),
+        "backup_plans": [],
+    }
+    op_data = Operators(plan)
+    op_data.init_and_validate()
+    return op_data
+
+
+def get_current_room_loop(op_data, room):
+    """逐个比较的旧实现，作为对照"""
+    room_data = {
+        v.current_index: v
+        for k, v in op_data.operators.items()
+        if v.current_room == room
+    }
+    return [
+        room_data[idx].name if idx in room_data else ""
+        for idx in range(len(op_data.plan[room]))
+    ]
+
+
+def get_current_operator_loop(op_data, room, index):
+    for key, value in op_data.operators.items():
+        if value.current_room == room and value.current_index == index:
+            return value
+    return None
+
+
+def get_dorm_by_name_loop(op_data, name):
+    _op = op_data.operators[name]
+    for idx, dorm in enumerate(op_data.dorm):
+        if (
+            dorm.position[0] == _op.current_room
+            and dorm.position[1] == _op.current_index
+        ):
+            return idx, dorm
+    return None, None
+
+
+def shuffle_positions(rng, op_data, steps):
+    names = list(op_data.operators)
+    for _ in range(steps):
+        op = op_data.operators[rng.choice(names)]
+        if rng.random() < 0.5:
+            op.current_room = rng.choice(ROOMS)
+        else:
+            op.current_index = rng.randrange(-1, 5)
+
+
+class TestOperatorsIndex(unittest.TestCase):
+    def assertSameLookups(self, op_data):
+        for room in op_data.plan:
+            self.assertEqual(
+                op_data.get_current_room(room, bypass=True),
+                get_current_room_loop(op_data, room),
+            )
+        for room in ROOMS:
+            self.assertEqual(
+                {op.name for op in op_data.operators_in(room)},
+                {k for k, v in op_data.operators.items() if v.current_room == room},
+            )
+            for index in range(-1, 5):
+                self.assertIs(
+                    op_data.get_current_operator(room, index),
+                    get_current_operator_loop(op_data, room, index),
+                )
+        self.assertEqual(
+            op_data.get_train_support(),
+            getattr(get_current_operator_loop(op_data, "train", 0), "name", None),
+        )
+        for name in op_data.operators:
+            self.assertEqual(
+                op_data.get_dorm_by_name(name), get_dorm_by_name_loop(op_data, name)
+            )
+
+    def test_same_as_scan(self):
+        rng = random.Random(0)
+        op_data = init_opdata()
+        self.assertSameLookups(op_data)
+        for _ in range(30):
+            shuffle_positions(rng, op_data, 10)
+            self.assertSameLookups(op_data)
+
+    def test_reinit(self):
+        rng = random.Random(1)
+        op_data = init_opdata()
+        shuffle_positions(rng, op_data, 50)
+        old = list(op_data.operators.values())
+        op_data.init_and_validate()
+        # 旧的干员对象不再更新索引
+        for op in old:
+            op.current_room = "meeting"
+        self.assertSameLookups(op_data)
+        # 重新初始化时从旧数据复制位置
+        shuffle_positions(rng, op_data, 50)
+        self.assertSameLookups(op_data)
+
+    def test_replace_dorm(self):
+        op_data = init_opdata()
+        op_data.operators["塑心"].current_room = "dormitory_1"
+        op_data.operators["塑心"].current_index = 2
+        self.assertEqual(op_data.get_dorm_by_name("塑心")[1].position[1], 2)
+        op_data.dorm = list(reversed(op_data.dorm))
+        self.assertEqual(
+            op_data.get_dorm_by_name("塑心"), get_dorm_by_name_loop(op_data, "塑心")
+        )
+
+    def test_pickle(self):
+        op_data = init_opdata()
+        op = op_data.operators["夕"]
+        op.current_room, op.current_index = "central", 0
+        for loaded in (pickle.loads(pickle.dumps(op)), copy.deepcopy(op)):
+            self.assertIsNone(loaded._owner)
+            self.assertEqual(
+                (loaded.current_room, loaded.current_index), ("central", 0)
+            )
+            loaded.current_index = 3
+            self.assertIs(op_data.get_current_operator("central", 0), op)
+        # 旧版本保存的数据中 current_index 是普通属性
+        state = op.__getstate__()
+        state["current_index"] = state.pop("_current_index")
+        del state["_owner"]
+        old = op.__class__.__new__(op.__class__)
+        old.__setstate__(state)
+        self.assertEqual(old.current_index, 0)
+
+    def test_copy(self):
+        rng = random.Random(2)
+        op_data = init_opdata()
+        shuffle_positions(rng, op_data, 50)
+        for copied in (pickle.loads(pickle.dumps(op_data)), copy.deepcopy(op_data)):
+            for op in copied.operators.values():
+                self.assertIs(op._owner, copied)
+            # 副本和原对象各自维护索引
+            shuffle_positions(rng, copied, 50)
+            self.assertSameLookups(copied)
+            self.assertSameLookups(op_data)
+
+
+if __name__ == "__main__":
+    unittest.main()
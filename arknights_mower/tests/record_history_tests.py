@@ -0,0 +1,199 @@
+import random
+import sqlite3
+import tempfile
+import unittest
+from datetime import datetime, timedelta
+from pathlib import Path
+from unittest.mock import patch
+
+from arknights_mower.solvers import record
+from arknights_mower.solvers.record import RECORD_MIGRATIONS, RecordWriter
+from arknights_mower.utils import config
+
+LEGACY_TABLE = (
+    "CREATE TABLE agent_action ("
+    "name TEXT,"
+    "agent_current_room TEXT,"
+    "current_room TEXT,"
+    "is_high INTEGER,"
+    "agent_group TEXT,"
+    "mood REAL,"
+    "current_time TEXT"
+    ")"
+)
+
+NAMES = [f"op{i}" for i in range(30)] + ["菲亚梅塔", "收藏"]
+ROOMS = ["dormitory_1", "dormitory_2", "meeting", "room_1_1", "central"]
+
+
+def legacy_history(database_path, days, per_day, seed=0):
+    """按旧的表结构生成心情记录"""
+    rng = random.Random(seed)
+    now = datetime.now().replace(microsecond=0)
+    rows = []
+    for name in NAMES:
+        is_high = int(name != "收藏" and rng.random() < 0.8)
+        group = rng.choice(["", "A", "B"])
+        t = now - timedelta(days=days)
+        step = 24 * 3600 / per_day
+        while t < now:
+            room = rng.choice(ROOMS)
+            rows.append((name, room, room, is_high, group, rng.uniform(0, 24), str(t)))
+            # 新的时间戳精确到秒
+            t += timedelta(seconds=int(step * rng.uniform(0.5, 1.5)))
+    with sqlite3.connect(database_path) as conn:
+        conn.execute(LEGACY_TABLE)
+        conn.executemany("INSERT INTO agent_action VALUES (?, ?, ?, ?, ?, ?, ?)", rows)
+    return len(rows)
+
+
+def legacy_query(database_path, days_expr, data_expr, order):
+    """旧实现的查询：字符串拼接收藏干员，按 DATE() 过滤文本时间"""
+    favorite = [] if config.conf.favorite == "" else config.conf.favorite.split(",")
+    sel = ""
+    for name in favorite:
+        sel = sel + " UNION SELECT '{}' AS name ".format(name)
+    with sqlite3.connect(database_path) as conn:
+        return conn.execute(
+            f"""
+            SELECT a.* FROM agent_action a
+            JOIN (
+                SELECT DISTINCT b.name FROM agent_action b
+                WHERE DATE(b.current_time) >= DATE('now', '{days_expr}', 'localtime')
+                AND b.is_high = 1 AND b.current_room NOT LIKE 'dormitory%'
+                UNION SELECT '菲亚梅塔' AS name {sel}
+            ) AS subquery ON a.name = subquery.name
+            WHERE DATE(a.current_time) >= DATE('now', '{data_expr}', 'localtime')
+            ORDER BY {order}
+            """
+        ).fetchall()
+
+
+def legacy_mood_ratios(database_path):
+    """旧实现整理出的心情曲线与工休比，作为对照"""
+    fmt = "%Y-%m-%d %H:%M:%S.%f"
+
+    def parse(text):
+        if "." not in text:
+            text += ".000000"
+        return datetime.strptime(text, fmt)
+
+    work_rest = {}
+    last = {}
+    for row in legacy_query(database_path, "-7 day", "-1 month", "a.current_time"):
+        name, current_room, current_time = row[0], row[2], parse(row[6])
+        ratio = work_rest.setdefault(name, [0, 0])
+        if name in last:
+            diff = (current_time - last[name][1]).total_seconds()
+            ratio[0 if last[name][0].startswith("dormitory") else 1] += diff
+        last[name] = (current_room, current_time)
+    result = {}
+    for row in legacy_query(
+        database_path, "-7 day", "-7 day", "a.agent_group DESC, a.current_time"
+    ):
+        group = row[4] or row[0]
+        x = parse(row[6]).strftime("%Y-%m-%dT%H:%M:%S.%f+08:00")
+        data = result.setdefault(group, {"labels": [], "datasets": {}})
+        data["labels"].append(x)
+        data["datasets"].setdefault(row[0], []).append({"x": x, "y": row[5]})
+    return result, work_rest
+
+
+class TestRecordHistory(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = Path(self.tmp.name) / "data.db"
+        self.favorite = patch.object(config.conf, "favorite", "收藏,不存在")
+        self.favorite.start()
+
+    def tearDown(self):
+        self.favorite.stop()
+        self.tmp.cleanup()
+
+    def test_migration(self):
+        count = legacy_history(self.path, 3, 4)
+        with sqlite3.connect(self.path) as conn:
+            legacy = conn.execute(
+                "SELECT name, `current_time` FROM agent_action ORDER BY rowid"
+            ).fetchall()
+        writer = RecordWriter(self.path)
+        writer.flush()
+        writer.close()
+        with sqlite3.connect(self.path) as conn:
+            version = conn.execute("PRAGMA user_version").fetchone()[0]
+            rows = conn.execute(
+                "SELECT name, time FROM agent_action ORDER BY rowid"
+            ).fetchall()
+            indexes = {
+                row[1] for row in conn.execute("PRAGMA index_list(agent_action)")
+            }
+        self.assertEqual(version, len(RECORD_MIGRATIONS))
+        self.assertEqual(len(rows), count)
+        self.assertEqual(
+            rows,
+            [
+                (name, int(datetime.fromisoformat(text).timestamp()))
+                for name, text in legacy
+            ],
+        )
+        self.assertEqual(indexes, {"agent_action_name_time", "agent_action_high_time"})
+        # 已经升级过的数据库不再迁移
+        writer = RecordWriter(self.path)
+        writer.flush()
+        writer.close()
+        with sqlite3.connect(self.path) as conn:
+            self.assertEqual(
+                conn.execute("SELECT COUNT(*) FROM agent_action").fetchone()[0],
+                count,
+            )
+
+    def test_same_as_legacy(self):
+        legacy_history(self.path, 40, 6, seed=1)
+        expected_mood, expected_work_rest = legacy_mood_ratios(self.path)
+        writer = RecordWriter(self.path)
+        with patch.object(record, "recorder", writer):
+            mood = record.get_mood_ratios()
+            work_rest = record.get_work_rest_ratios()
+        writer.close()
+        self.assertEqual(
+            {name: v["datasets"][0]["data"] for name, v in work_rest.items()},
+            expected_work_rest,
+        )
+        self.assertEqual([g["groupName"] for g in mood], list(expected_mood))
+        for group in mood:
+            expected = expected_mood[group["groupName"]]
+            self.assertEqual(group["moodData"]["labels"], expected["labels"])
+            self.assertEqual(
+                {d["label"]: d["data"] for d in group["moodData"]["datasets"]},
+                expected["datasets"],
+            )
+        self.assertIn("收藏", work_rest)
+
+    def test_save_and_clear(self):
+        writer = RecordWriter(self.path)
+        with patch.object(record, "recorder", writer):
+            now = datetime.now()
+            for minutes in [90, 30]:
+                writer.submit(
+                    "INSERT INTO agent_action VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    (
+                        "菲亚梅塔",
+                        "",
+                        "meeting",
+                        1,
+                        "",
+                        12,
+                        int((now - timedelta(minutes=minutes)).timestamp()),
+                    ),
+                )
+            self.assertEqual(
+                record.get_work_rest_ratios()["菲亚梅塔"]["datasets"][0]["data"],
+                [0, 3600],
+            )
+            record.clear_data(now - timedelta(hours=1))
+            self.assertEqual(len(record.query_agent_action("-7 day", "time")), 1)
+        writer.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
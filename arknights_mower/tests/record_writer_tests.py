@@ -0,0 +1,112 @@
+import sqlite3
+import tempfile
+import unittest
+from datetime import datetime
+from pathlib import Path
+from unittest.mock import patch
+
+from arknights_mower.solvers import record
+from arknights_mower.solvers.record import RecordWriter
+
+
+def save_log_connect(database_path, message):
+    """每次写入都新建连接的旧实现，作为对照"""
+    conn = sqlite3.connect(database_path)
+    cursor = conn.cursor()
+    cursor.execute(
+        "CREATE TABLE IF NOT EXISTS log ("
+        "time INTEGER,"
+        "task TEXT,"
+        "level TEXT,"
+        "message TEXT"
+        ")"
+    )
+    cursor.execute(
+        "INSERT INTO log VALUES (?, ?, ?, ?)",
+        (int(datetime.now().timestamp()), "{}", "INFO", message),
+    )
+    conn.commit()
+    conn.close()
+
+
+class CountingWriter(RecordWriter):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.batches = []
+
+    def write(self, connection, batch):
+        self.batches.append(len(batch))
+        super().write(connection, batch)
+
+
+class TestRecordWriter(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = Path(self.tmp.name) / "data.db"
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def count(self, table):
+        with sqlite3.connect(self.path) as conn:
+            return conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+
+    def test_batch(self):
+        writer = CountingWriter(self.path, batch_size=100, interval=10)
+        for i in range(450):
+            writer.submit(
+                "INSERT INTO log VALUES (?, ?, ?, ?)", (i, "{}", "INFO", str(i))
+            )
+        writer.flush()
+        self.assertEqual(self.count("log"), 450)
+        self.assertEqual(sum(writer.batches), 450)
+        self.assertLessEqual(len(writer.batches), 5)
+        with sqlite3.connect(self.path) as conn:
+            mode = conn.execute("PRAGMA journal_mode").fetchone()[0]
+        self.assertEqual(mode, "wal")
+        writer.close()
+        # 关闭后再次提交会重新启动写入线程
+        writer.submit("INSERT INTO log VALUES (?, ?, ?, ?)", (0, "{}", "INFO", ""))
+        writer.close()
+        self.assertEqual(self.count("log"), 451)
+
+    def test_error(self):
+        writer = RecordWriter(self.path)
+        writer.submit("INSERT INTO log VALUES (?, ?, ?, ?)", (1, "{}", "INFO", "a"))
+        writer.submit("INSERT INTO missing VALUES (?)", (1,))
+        writer.submit("INSERT INTO log VALUES (?, ?, ?, ?)", (2, "{}", "INFO", "b"))
+        writer.flush()
+        # 出错的记录不影响同一批中的其他记录
+        self.assertEqual(self.count("log"), 2)
+        writer.close()
+
+    def test_connect_error(self):
+        writer = RecordWriter(self.path)
+        with patch.object(writer, "connect", side_effect=OSError("no space")):
+            # 打不开数据库时不阻塞，也不留下写入线程
+            with self.assertLogs(record.logger, "ERROR"):
+                writer.submit("INSERT INTO log VALUES (?, ?, ?, ?)", (1, "{}", "", ""))
+                writer.flush()
+            self.assertFalse(writer.thread.is_alive())
+        # 数据库恢复后重新连接
+        writer.submit("INSERT INTO log VALUES (?, ?, ?, ?)", (2, "{}", "", ""))
+        writer.close()
+        self.assertEqual(self.count("log"), 1)
+
+    def test_read_after_write(self):
+        writer = RecordWriter(self.path, interval=10)
+        with patch.object(record, "recorder", writer):
+            record.save_inventory_counts({"固源岩": 10, "装置": 3})
+            record.save_inventory_counts({"固源岩": 12})
+            self.assertEqual(
+                record.get_inventory_counts(["固源岩", "装置"]),
+                {"固源岩": 12, "装置": 3},
+            )
+            record.save_log("test", {"task": 1})
+            record.clear_data(datetime.now())
+        writer.close()
+        self.assertEqual(self.count("log"), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,138 @@
+import unittest
+from itertools import combinations
+
+from arknights_mower import data
+from arknights_mower.utils import recruit_calc
+
+
+def recruit_cal_loop(tags, recruit_order):
+    """列表求交集的旧实现，作为对照"""
+    index_dict = {k: i for i, k in enumerate(recruit_order)}
+    combined_agent = {}
+    if "新手" in tags:
+        tags.remove("新手")
+    for item in combinations(tags, 1):
+        tmp = data.agent_with_tags[item[0]]
+
+        if len(tmp) == 0:
+            continue
+        tmp.sort(key=lambda k: k["star"], reverse=True)
+        combined_agent[item] = tmp
+    for item in combinations(tags, 2):
+        tmp = [
+            j
+            for j in data.agent_with_tags[item[0]]
+            if j in data.agent_with_tags[item[1]]
+        ]
+
+        if len(tmp) == 0:
+            continue
+        tmp.sort(key=lambda k: k["star"])
+        combined_agent[item] = tmp
+    for item in combinations(tags, 3):
+        tmp1 = [
+            j
+            for j in data.agent_with_tags[item[0]]
+            if j in data.agent_with_tags[item[1]]
+        ]
+        tmp = [j for j in tmp1 if j in data.agent_with_tags[item[2]]]
+
+        if len(tmp) == 0:
+            continue
+        tmp.sort(key=lambda k: k["star"], reverse=True)
+        combined_agent[item] = tmp
+
+    sorted_list = sorted(
+        combined_agent.items(), key=lambda x: index_dict[x[1][0]["star"]]
+    )
+
+    result_dict = {}
+    for item in sorted_list:
+        result_dict[item[0]] = []
+        max_star = -1
+        min_star = 7
+        for agent in item[1]:
+            if "高级资深干员" not in item[0] and agent["star"] == 6:
+                continue
+            if agent["star"] > max_star:
+                max_star = agent["star"]
+            if agent["star"] < min_star:
+                min_star = agent["star"]
+        for agent in item[1]:
+            if max_star > 1 and agent["star"] == 2:
+                continue
+            if max_star > 1 and agent["star"] == 1:
+                continue
+            if max_star < 6 and agent["star"] == 6:
+                continue
+            result_dict[item[0]].append(agent)
+
+        try:
+            for key in list(result_dict.keys()):
+                if len(result_dict[key]) == 0:
+                    result_dict.pop(key)
+
+            result_dict[item[0]] = sorted(
+                result_dict[item[0]], key=lambda x: x["star"], reverse=True
+            )
+            min_star = result_dict[item[0]][-1]["star"]
+            for res in result_dict[item[0]][:]:
+                if res["star"] > min_star:
+                    result_dict[item[0]].remove(res)
+        except KeyError:
+            continue
+    result = {
+        6: [],
+        5: [],
+        4: [],
+        3: [],
+        2: [],
+        1: [],
+    }
+    for tag in result_dict:
+        result[result_dict[tag][0]["star"]].append(
+            {"tag": tag, "result": result_dict[tag]}
+        )
+    return result
+
+
+class TestRecruitCalc(unittest.TestCase):
+    def test_every_draw(self):
+        """所有 5 个标签的组合与旧实现结果相同"""
+        tags = sorted(recruit_calc._recruit_masks(data.recruit_agent)["tags"])
+        count = 0
+        for draw in combinations(tags, 5):
+            # 默认顺序检查全部组合，另一种顺序抽查
+            orders = [[6, 5, 1, 4, 3, 2]]
+            if count % 50 == 0:
+                orders.append([6, 5, 4, 3, 2, 1])
+            for order in orders:
+                self.assertEqual(
+                    recruit_calc.recruit_cal(list(draw), order),
+                    recruit_cal_loop(list(draw), order),
+                    draw,
+                )
+            count += 1
+
+    def test_unsorted(self):
+        draw = ["重装干员", "先锋干员", "高级资深干员", "支援", "支援机械"]
+        order = [6, 5, 1, 4, 3, 2]
+        self.assertEqual(
+            recruit_calc.recruit_cal(list(draw), order),
+            recruit_cal_loop(list(draw), order),
+        )
+
+    def test_table(self):
+        masks = recruit_calc._recruit_masks(data.recruit_agent)
+        table = data.recruit_combos
+        for combo in combinations(sorted(masks["tags"]), 2):
+            result = recruit_calc.combo_result(combo, masks["tags"], masks["stars"])
+            entry = table.get(frozenset(combo))
+            if result is None:
+                self.assertIsNone(entry)
+            else:
+                self.assertEqual(entry[:2], result[:2])
+
+
+if __name__ == "__main__":
+    unittest.main()
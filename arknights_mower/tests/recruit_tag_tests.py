@@ -0,0 +1,49 @@
+import unittest
+
+import cv2
+import numpy as np
+
+from arknights_mower import models
+from arknights_mower.solvers.recruit import match_tags
+
+
+def match_tag_loop(crop):
+    """逐个模板调用 matchTemplate 的旧实现，作为对照"""
+    max_v = -1
+    tag_res = None
+    for key in models.recruit:
+        res = cv2.matchTemplate(crop, models.recruit[key], cv2.TM_CCORR_NORMED)
+        _, max_val, _, _ = cv2.minMaxLoc(res)
+        if max_val > max_v:
+            tag_res = key
+            max_v = max_val
+    return tag_res
+
+
+def tag_crop(rng, template, h=110, w=256):
+    """把标签模板放在随机位置，周围为相近的深灰色，再加上噪声"""
+    crop = np.full((h, w, 3), rng.integers(30, 70), np.uint8)
+    th, tw, _ = template.shape
+    y, x = rng.integers(0, h - th + 1), rng.integers(0, w - tw + 1)
+    crop[y : y + th, x : x + tw] = template
+    noise = rng.normal(0, 6, crop.shape)
+    return np.clip(crop + noise, 0, 255).astype(np.uint8)
+
+
+class TestRecruitTag(unittest.TestCase):
+    def test_match(self):
+        rng = np.random.default_rng(0)
+        names = list(models.recruit)
+        for _ in range(20):
+            truth = [names[i] for i in rng.choice(len(names), 5, replace=False)]
+            crops = [tag_crop(rng, models.recruit[name]) for name in truth]
+            self.assertEqual(match_tags(crops), truth)
+            self.assertEqual([match_tag_loop(crop) for crop in crops], truth)
+
+    def test_reject(self):
+        blank = np.full((110, 256, 3), 49, np.uint8)
+        self.assertEqual(match_tags([blank]), [None])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,191 @@
+import copy
+import random
+import unittest
+from datetime import datetime, timedelta
+from unittest.mock import patch
+
+from arknights_mower.utils import config
+from arknights_mower.utils.log import logger
+from arknights_mower.utils.news_checker import NewsChecker
+from arknights_mower.utils.scheduler_task import (
+    Rescheduler,
+    SchedulerTask,
+    TaskTypes,
+    adjust_run_order_for_maintenance,
+)
+
+TYPES = [
+    TaskTypes.RUN_ORDER,
+    TaskTypes.RUN_ORDER,
+    TaskTypes.FIAMMETTA,
+    TaskTypes.CLUE_PARTY,
+    TaskTypes.SHIFT_OFF,
+    TaskTypes.SHIFT_OFF,
+    TaskTypes.NOT_SPECIFIC,
+]
+START = datetime(2023, 9, 19, 10, 0)
+
+
+def scheduling_loop(tasks, run_order_delay=5, execution_time=0.75, time_now=None):
+    """原来每次都完整重算的实现，作为对照"""
+    # execution_time per room
+    if time_now is None:
+        time_now = datetime.now()
+    if len(tasks) > 0:
+        adjust_run_order_for_maintenance(tasks, run_order_delay)
+        tasks.sort(key=lambda x: x.time)
+
+        # 任务间隔最小时间（5分钟）
+        min_time_interval = timedelta(minutes=run_order_delay)
+
+        # 初始化变量以跟踪上一个优先级0任务和计划执行时间总和
+        last_priority_0_task = None
+        total_execution_time = 0
+
+        # 遍历任务列表
+        for i, task in enumerate(tasks):
+            current_time = time_now
+            # 判定任务堆积，如果第一个任务已经超时，则认为任务堆积
+            if task.type.priority == 1 and current_time > task.time:
+                total_execution_time += (current_time - task.time).total_seconds() / 60
+
+            if task.type.priority == 1:
+                if last_priority_0_task is not None:
+                    time_difference = task.time - last_priority_0_task.time
+                    if (
+                        config.conf.run_order_grandet_mode.enable
+                        and time_difference < min_time_interval
+                        and time_now < last_priority_0_task.time
+                    ) and not task.adjusted:
+                        logger.info("检测到跑单任务过于接近，准备修正跑单时间")
+                        return last_priority_0_task, task
+                # 更新上一个优先级0任务和总执行时间
+                last_priority_0_task = task
+                total_execution_time = 0
+            else:
+                # 找到下一个优先级0任务的位置
+                next_priority_0_index = -1
+                for j in range(i + 1, len(tasks)):
+                    if tasks[j].type.priority == 1:
+                        next_priority_0_index = j
+                        break
+                # 如果其他任务的总执行时间超过了下一个优先级0任务的执行时间，调整它们的时间
+                if next_priority_0_index > -1:
+                    for j in range(i, next_priority_0_index):
+                        # 菲亚充能/派对内置3分钟，线索购物内置1分钟
+                        task_time = (
+                            0
+                            if len(tasks[j].plan) > 0
+                            and tasks[j].type
+                            not in [TaskTypes.FIAMMETTA, TaskTypes.CLUE_PARTY]
+                            else (
+                                3
+                                if tasks[j].type
+                                in [TaskTypes.FIAMMETTA, TaskTypes.CLUE_PARTY]
+                                else 1
+                            )
+                        )
+                        # 其他任务按照 每个房间*预设执行时间算 默认 45秒
+                        estimate_time = (
+                            len(tasks[j].plan) * execution_time
+                            if task_time == 0
+                            else task_time
+                        )
+                        if (
+                            timedelta(minutes=total_execution_time + estimate_time)
+                            + time_now
+                            < tasks[j].time
+                        ):
+                            total_execution_time = 0
+                        else:
+                            total_execution_time += estimate_time
+                    if (
+                        timedelta(minutes=total_execution_time) + time_now
+                        > tasks[next_priority_0_index].time
+                    ):
+                        logger.info("检测到任务可能影响到下次跑单修改任务至跑单之后")
+                        logger.debug("||".join([str(t) for t in tasks]))
+                        next_priority_0_time = tasks[next_priority_0_index].time
+                        for j in range(i, next_priority_0_index):
+                            tasks[j].time = next_priority_0_time + timedelta(seconds=1)
+                            next_priority_0_time = tasks[j].time
+                        logger.debug("||".join([str(t) for t in tasks]))
+                        break
+        tasks.sort(key=lambda x: x.time)
+
+
+def random_task(rng, now):
+    rooms = rng.randrange(0, 6) if rng.random() < 0.8 else 0
+    return SchedulerTask(
+        time=now + timedelta(seconds=rng.randrange(-600, 7200)),
+        task_plan={f"room_{k}": ["Current"] for k in range(rooms)},
+        task_type=rng.choice(TYPES),
+        adjusted=rng.random() < 0.1,
+    )
+
+
+def mutate(rng, tasks, now):
+    """对任务列表做一次新增、移动或完成，返回可在另一份拷贝上重复的操作"""
+    op = rng.choice(["insert", "move", "remove"]) if tasks else "insert"
+    if op == "insert":
+        return op, random_task(rng, now)
+    i = rng.randrange(len(tasks))
+    if op == "move":
+        return op, (i, timedelta(seconds=rng.randrange(-1800, 1800)))
+    return op, i
+
+
+def apply(tasks, op, arg):
+    if op == "insert":
+        tasks.append(copy.deepcopy(arg))
+    elif op == "move":
+        tasks[arg[0]].time += arg[1]
+    else:
+        del tasks[arg]
+
+
+def snapshot(tasks, result):
+    state = [(t.time, t.type, len(t.plan)) for t in tasks]
+    if result is None:
+        return state, None
+    return state, tuple(next(i for i, t in enumerate(tasks) if t is r) for r in result)
+
+
+@patch.object(NewsChecker, "get_update_time", return_value=(None, None))
+class TestRescheduler(unittest.TestCase):
+    def setUp(self):
+        self.grandet = config.conf.run_order_grandet_mode.enable
+
+    def tearDown(self):
+        config.conf.run_order_grandet_mode.enable = self.grandet
+
+    def test_same_as_full(self, _):
+        rng = random.Random(0)
+        for _ in range(300):
+            config.conf.run_order_grandet_mode.enable = rng.random() < 0.5
+            now = START
+            expected = [random_task(rng, now) for _ in range(rng.randrange(0, 20))]
+            tasks = copy.deepcopy(expected)
+            rescheduler = Rescheduler()
+            for _ in range(15):
+                want = scheduling_loop(expected, time_now=now)
+                got = rescheduler(tasks, time_now=now)
+                self.assertEqual(snapshot(tasks, got), snapshot(expected, want))
+                op, arg = mutate(rng, expected, now)
+                apply(expected, op, arg)
+                apply(tasks, op, arg)
+                now += timedelta(seconds=rng.randrange(0, 1200))
+
+    def test_cached_windows(self, _):
+        rng = random.Random(1)
+        now = START
+        tasks = [random_task(rng, now) for _ in range(40)]
+        rescheduler = Rescheduler()
+        rescheduler(tasks, time_now=now)
+        with patch("arknights_mower.utils.scheduler_task.check_window") as check_window:
+            rescheduler(tasks, time_now=now)
+            check_window.assert_not_called()
+
+
+if __name__ == "__main__":
+    unittest.main()
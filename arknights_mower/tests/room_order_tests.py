@@ -0,0 +1,60 @@
+import itertools
+import random
+import unittest
+
+from arknights_mower.utils.room_order import (
+    VIEW_WIDTH,
+    count_swipes,
+    move_view,
+    plan_visits,
+    room_spans,
+)
+
+ROOMS = [room for room in room_spans() if room != "central"]
+
+
+def min_swipes_brute(rooms, view=0):
+    """穷举所有顺序，作为对照"""
+    return min(count_swipes(order, view) for order in itertools.permutations(rooms))
+
+
+class TestRoomOrder(unittest.TestCase):
+    def test_layout(self):
+        spans = room_spans()
+        # 左侧的房间在宿舍左边，加工站等在宿舍右边
+        self.assertLess(spans["room_1_1"][1], spans["room_1_3"][0])
+        self.assertLess(spans["room_1_3"][1], spans["dormitory_1"][0])
+        self.assertLess(spans["dormitory_1"][1], spans["factory"][0])
+        self.assertLess(spans["train"][1], spans["gaming_3"][0])
+        # 一屏放不下整个基建
+        self.assertGreater(spans["gaming_1"][1] - spans["room_2_1"][0], VIEW_WIDTH)
+
+    def test_move_view(self):
+        self.assertEqual(move_view("dormitory_1"), (0, False))
+        view, swiped = move_view("gaming_1")
+        self.assertTrue(swiped)
+        self.assertEqual(view + VIEW_WIDTH, room_spans()["gaming_1"][1])
+        view, swiped = move_view("room_2_1", view)
+        self.assertTrue(swiped)
+        self.assertEqual(view, room_spans()["room_2_1"][0])
+        self.assertEqual(move_view("unknown", 10), (10, False))
+
+    def test_plan(self):
+        self.assertEqual(plan_visits([]), [])
+        self.assertEqual(
+            count_swipes(plan_visits(["gaming_1", "room_2_1", "gaming_2"])), 2
+        )
+        order = plan_visits(["unknown", "meeting", "dormitory_1", "meeting"])
+        self.assertEqual(sorted(order), ["dormitory_1", "meeting", "unknown"])
+        self.assertEqual(order[-1], "unknown")
+        rng = random.Random(0)
+        for _ in range(100):
+            rooms = rng.sample(ROOMS, rng.randrange(1, 7))
+            view = rng.choice([0, -600, 700])
+            order = plan_visits(rooms, view)
+            self.assertEqual(sorted(order), sorted(rooms))
+            self.assertEqual(count_swipes(order, view), min_swipes_brute(rooms, view))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,52 @@
+import unittest
+
+import networkx as nx
+
+from arknights_mower.utils import graph
+from arknights_mower.utils.graph import DG, edge, routing_table, unreachable
+from arknights_mower.utils.scene import Scene
+
+
+def path_weight(path):
+    return sum(DG.edges[u, v]["weight"] for u, v in zip(path, path[1:]))
+
+
+def follow(source, target):
+    path = [source]
+    while path[-1] != target:
+        path.append(routing_table()[path[-1]][target])
+    return path
+
+
+class TestSceneGraph(unittest.TestCase):
+    def test_same_cost(self):
+        for source in DG.nodes:
+            for target in DG.nodes:
+                if source == target:
+                    continue
+                try:
+                    expected = nx.shortest_path(DG, source, target, weight="weight")
+                except nx.NetworkXNoPath:
+                    self.assertNotIn(target, routing_table()[source])
+                    self.assertIn(target, unreachable()[source])
+                    continue
+                self.assertEqual(
+                    path_weight(follow(source, target)), path_weight(expected)
+                )
+
+    def test_invalidate(self):
+        routing_table()
+        a, b = -1001, -1002
+        try:
+            edge(a, b)(lambda solver: None)
+            self.assertEqual(routing_table()[a][b], b)
+            edge(a, Scene.INDEX)(lambda solver: None)
+            self.assertEqual(routing_table()[a][Scene.INDEX], Scene.INDEX)
+        finally:
+            DG.remove_nodes_from([a, b])
+            graph.invalidate_routes()
+        self.assertNotIn(a, routing_table())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,212 @@
+import unittest
+
+import numpy as np
+
+from arknights_mower.utils import segment
+from arknights_mower.utils.recognize import RecognizeError
+
+
+def credit_loop(img):
+    """逐像素循环的旧实现，作为对照"""
+    height, width, _ = img.shape
+
+    left, right = 0, width
+    while np.max(img[:, right - 1]) < 100:
+        right -= 1
+    while np.max(img[:, left]) < 100:
+        left += 1
+
+    def average(i):
+        num, sum = 0, 0
+        for j in range(left, right):
+            if img[i, j, 0] == img[i, j, 1] and img[i, j, 1] == img[i, j, 2]:
+                num += 1
+                sum += img[i, j, 0]
+        return sum // num
+
+    def ptp(j):
+        maxval = -999999
+        minval = 999999
+        for i in range(up_1, up_2):
+            minval = min(minval, img[i, j, 0])
+            maxval = max(maxval, img[i, j, 0])
+        return maxval - minval
+
+    up_1 = 0
+    flag = False
+    while not flag or average(up_1) >= 250:
+        flag |= average(up_1) >= 250
+        up_1 += 1
+
+    up_2 = up_1
+    flag = False
+    while not flag or average(up_2) < 220:
+        flag |= average(up_2) < 220
+        up_2 += 1
+
+    down = height - 1
+    while average(down) < 150:
+        down -= 1
+
+    right = width - 1
+    while ptp(right) < 50:
+        right -= 1
+
+    left = 0
+    while ptp(left) < 50:
+        left += 1
+
+    split_x = [left + (right - left) // 5 * i for i in range(0, 6)]
+    split_y = [up_1, (up_1 + down) // 2, down]
+    ret = []
+    for y1, y2 in zip(split_y[:-1], split_y[1:]):
+        for x1, x2 in zip(split_x[:-1], split_x[1:]):
+            ret.append(((x1, y1), (x2, y2)))
+    return ret
+
+
+def recruit_loop(img):
+    """逐像素循环的旧实现，作为对照"""
+    height, width, _ = img.shape
+    left, right = width // 2 - 100, width // 2 - 50
+
+    def adj_x(i):
+        if i == 0:
+            return 0
+        sum = 0
+        for j in range(left, right):
+            for k in range(3):
+                sum += abs(int(img[i, j, k]) - int(img[i - 1, j, k]))
+        return sum // (right - left)
+
+    def adj_y(j):
+        if j == 0:
+            return 0
+        sum = 0
+        for i in range(up_2, down_2):
+            for k in range(3):
+                sum += abs(int(img[i, j, k]) - int(img[i, j - 1, k]))
+        return int(sum / (down_2 - up_2))
+
+    def average(i):
+        sum = 0
+        for j in range(left, right):
+            sum += np.sum(img[i, j, :3])
+        return sum // (right - left) // 3
+
+    def minus(i):
+        s = 0
+        for j in range(left, right):
+            s += int(img[i, j, 2]) - int(img[i, j, 0])
+        return s // (right - left)
+
+    up = 0
+    while minus(up) > -100:
+        up += 1
+    while not (adj_x(up) > 80 and minus(up) > -10 and average(up) > 210):
+        up += 1
+    up_2, down_2 = up - 90, up - 40
+
+    left = 0
+    while np.max(img[:, left]) < 100:
+        left += 1
+    left += 1
+    while adj_y(left) < 50:
+        left += 1
+
+    right = width - 1
+    while np.max(img[:, right]) < 100:
+        right -= 1
+    while adj_y(right) < 50:
+        right -= 1
+
+    split_x = [left, (left + right) // 2, right]
+    down = height - 1
+    split_y = [up, (up + down) // 2, down]
+    ret = []
+    for y1, y2 in zip(split_y[:-1], split_y[1:]):
+        for x1, x2 in zip(split_x[:-1], split_x[1:]):
+            ret.append(((x1, y1), (x2, y2)))
+    return ret
+
+
+def add_noise(rng, img, count):
+    """随机撒一些彩色噪点"""
+    h, w, _ = img.shape
+    ys = rng.integers(0, h, count)
+    xs = rng.integers(0, w, count)
+    img[ys, xs] = rng.integers(0, 256, (count, 3), dtype=np.uint8)
+    return img
+
+
+def credit_screen(rng, h=540, w=960):
+    """模拟信用交易所：暗边、白色标题栏、商品区与底部暗条"""
+    img = np.full((h, w, 3), 120, np.uint8)
+    a, b, c, d = np.sort(rng.choice(np.arange(20, h - 40), 4, replace=False))
+    img[a:b] = 255
+    img[b:c] = 200
+    img[c:d] = 235
+    img[d:] = 100
+    x0, x1 = rng.integers(40, 200), rng.integers(w - 200, w - 40)
+    img[b + 1 : b + 3, x0:x1] = 140
+    edge = rng.integers(1, 20)
+    img[:, :edge] = 30
+    img[:, w - edge :] = 30
+    return add_noise(rng, img, rng.integers(0, 500))
+
+
+def recruit_screen(rng, h=540, w=960):
+    """模拟公开招募：灰色背景、红色标题、白色栏位与左右边框"""
+    img = np.full((h, w, 3), 80, np.uint8)
+    red = rng.integers(100, 250)
+    white = rng.integers(red + 10, h - 20)
+    img[red:white] = (220, 60, 60)
+    img[white:] = 240
+    x0, x1 = rng.integers(30, 200), rng.integers(w - 200, w - 30)
+    img[:white, :x0] = 120
+    img[:white, x1:] = 120
+    edge = rng.integers(1, 20)
+    img[:, :edge] = 20
+    img[:, w - edge :] = 20
+    return add_noise(rng, img, rng.integers(0, 500))
+
+
+def run(func, img):
+    try:
+        return func(img)
+    except Exception:
+        return RecognizeError
+
+
+class TestSegment(unittest.TestCase):
+    def check(self, func, ref, screens):
+        for img in screens:
+            expected = run(ref, img)
+            self.assertEqual(run(func, img), expected)
+
+    def test_credit(self):
+        rng = np.random.default_rng(0)
+        screens = [credit_screen(rng) for _ in range(20)]
+        self.check(segment.credit, credit_loop, screens)
+
+    def test_recruit(self):
+        rng = np.random.default_rng(1)
+        screens = [recruit_screen(rng) for _ in range(20)]
+        self.check(segment.recruit, recruit_loop, screens)
+
+    def test_random(self):
+        rng = np.random.default_rng(2)
+        screens = [
+            rng.integers(0, 256, (120, 240, 3), dtype=np.uint8) for _ in range(10)
+        ]
+        self.check(segment.credit, credit_loop, screens)
+        self.check(segment.recruit, recruit_loop, screens)
+
+    def test_full_screen(self):
+        rng = np.random.default_rng(3)
+        self.check(segment.credit, credit_loop, [credit_screen(rng, 1080, 1920)])
+        self.check(segment.recruit, recruit_loop, [recruit_screen(rng, 1080, 1920)])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,157 @@
+import pickle
+import random
+import sqlite3
+import tempfile
+import unittest
+from datetime import date, datetime, timedelta
+from pathlib import Path
+from types import SimpleNamespace
+
+from arknights_mower.solvers.record import (
+    StateJournal,
+    build_state,
+    state_items,
+)
+from arknights_mower.tests.operators_index_tests import ROOMS, init_opdata
+from arknights_mower.utils.scheduler_task import SchedulerTask, TaskQueue, TaskTypes
+
+
+def init_scheduler():
+    op_data = init_opdata()
+    now = datetime.now()
+    tasks = TaskQueue(
+        [
+            SchedulerTask(now + timedelta(hours=1), {"meeting": ["伊内丝", "见行者"]}),
+            SchedulerTask(
+                now + timedelta(minutes=5),
+                task_type=TaskTypes.RUN_ORDER,
+                meta_data="room_1_1",
+            ),
+        ]
+    )
+    return SimpleNamespace(
+        op_data=op_data,
+        tasks=tasks,
+        daily_visit_friend=date(2024, 1, 1),
+        daily_report=date(2024, 1, 1),
+        daily_skland=date(2024, 1, 1),
+        daily_mail=date(2024, 1, 1),
+        task_count=0,
+    )
+
+
+def legacy_state(scheduler):
+    """旧版本整体序列化的内容，作为对照"""
+    return {
+        "dorm": scheduler.op_data.dorm,
+        "tasks": scheduler.tasks,
+        "party_time": scheduler.op_data.party_time,
+        "operators": scheduler.op_data.operators,
+        "daily_visit_friend": scheduler.daily_visit_friend,
+        "daily_report": scheduler.daily_report,
+        "daily_skland": scheduler.daily_skland,
+        "daily_mail": scheduler.daily_mail,
+        "task_count": scheduler.task_count,
+        "skill_upgrade_supports": scheduler.op_data.skill_upgrade_supports,
+    }
+
+
+def legacy_save(database_path, scheduler):
+    """旧版本 save_state 的写入方式：新建连接、删除旧状态、写入整体序列化的状态"""
+    connection = sqlite3.connect(database_path)
+    cursor = connection.cursor()
+    cursor.execute("CREATE TABLE IF NOT EXISTS saved_state (time TEXT,state BLOB)")
+    cursor.execute("DELETE FROM saved_state")
+    cursor.execute(
+        "INSERT INTO saved_state VALUES (?, ?)",
+        (str(datetime.now()), sqlite3.Binary(pickle.dumps(legacy_state(scheduler)))),
+    )
+    connection.commit()
+    connection.close()
+
+
+def mutate(rng, scheduler):
+    """模拟一次任务后状态的变化"""
+    ops = list(scheduler.op_data.operators.values())
+    for op in rng.sample(ops, 3):
+        op.mood = rng.uniform(0, 24)
+        op.time_stamp = datetime.now()
+        op.current_room = rng.choice(ROOMS)
+    dorm = rng.choice(scheduler.op_data.dorm)
+    dorm.name = rng.choice(list(scheduler.op_data.operators))
+    dorm.time = datetime.now()
+    if scheduler.tasks and rng.random() < 0.5:
+        scheduler.tasks.pop(0)
+    scheduler.tasks.append(
+        SchedulerTask(
+            datetime.now() + timedelta(minutes=rng.randrange(600)),
+            {"central": ["Current"] * 5},
+        )
+    )
+    scheduler.task_count += 1
+
+
+class TestStateJournal(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = Path(self.tmp.name) / "data.db"
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def assertSameState(self, state, scheduler):
+        for name, op in scheduler.op_data.operators.items():
+            saved = state["operators"][name]
+            self.assertEqual(
+                (saved.mood, saved.time_stamp, saved.current_room, saved.current_index),
+                (op.mood, op.time_stamp, op.current_room, op.current_index),
+            )
+        self.assertEqual(
+            [(d.position, d.name, d.time) for d in state["dorm"]],
+            [(d.position, d.name, d.time) for d in scheduler.op_data.dorm],
+        )
+        self.assertEqual(
+            state["tasks"], sorted(scheduler.tasks, key=lambda task: task.time)
+        )
+        self.assertEqual(state["task_count"], scheduler.task_count)
+        self.assertEqual(state["daily_mail"], scheduler.daily_mail)
+
+    def test_replay(self):
+        rng = random.Random(0)
+        scheduler = init_scheduler()
+        journal = StateJournal(self.path, compact_size=200)
+        self.assertIsNone(journal.load())
+        self.assertGreater(journal.record(state_items(scheduler)), 20)
+        for step in range(30):
+            mutate(rng, scheduler)
+            count = journal.record(state_items(scheduler))
+            # 每次只写入变化的条目
+            self.assertLess(count, 20)
+            if step % 7 == 0:
+                # 模拟崩溃后重新打开数据库
+                journal.close()
+                journal = StateJournal(self.path, compact_size=200)
+                self.assertSameState(build_state(journal.load()), scheduler)
+        self.assertEqual(journal.record(state_items(scheduler)), 0)
+        journal.close()
+
+    def test_compact(self):
+        rng = random.Random(1)
+        scheduler = init_scheduler()
+        journal = StateJournal(self.path, compact_size=30)
+        for _ in range(20):
+            mutate(rng, scheduler)
+            journal.record(state_items(scheduler))
+            self.assertLess(journal.journal_size, 30)
+        journal.record(state_items(scheduler), compact=True)
+        self.assertEqual(journal.journal_size, 0)
+        rows = journal.connect().execute("SELECT COUNT(*) FROM state_journal")
+        self.assertEqual(rows.fetchone()[0], 0)
+        journal.close()
+        journal = StateJournal(self.path)
+        self.assertSameState(build_state(journal.load()), scheduler)
+        journal.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
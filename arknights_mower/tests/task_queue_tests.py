@@ -0,0 +1,125 @@
+import pickle
+import random
+import unittest
+from datetime import datetime, timedelta
+
+from arknights_mower.utils.scheduler_task import (
+    SchedulerTask,
+    TaskQueue,
+    TaskTypes,
+    find_next_task,
+)
+
+TYPES = [
+    TaskTypes.RUN_ORDER,
+    TaskTypes.SHIFT_OFF,
+    TaskTypes.SHIFT_ON,
+    TaskTypes.RELEASE_DORM,
+    TaskTypes.NOT_SPECIFIC,
+]
+ROOMS = ["room_1_1", "room_1_2", "room_2_1", "dormitory_1", ""]
+START = datetime(2023, 9, 19, 10, 0)
+
+
+def random_tasks(rng, n):
+    return [
+        SchedulerTask(
+            time=START + timedelta(seconds=rng.randrange(0, 3600)),
+            task_type=rng.choice(TYPES),
+            meta_data=rng.choice(ROOMS),
+        )
+        for _ in range(n)
+    ]
+
+
+def random_queries(rng, n):
+    return [
+        (
+            rng.choice([None, START + timedelta(seconds=rng.randrange(-60, 3660))]),
+            rng.choice(["", *TYPES]),
+            rng.choice(["<", "=", ">"]),
+            rng.choice(["", "room", *ROOMS]),
+        )
+        for _ in range(n)
+    ]
+
+
+class TestTaskQueue(unittest.TestCase):
+    def test_same_as_list(self):
+        rng = random.Random(0)
+        for _ in range(50):
+            tasks = random_tasks(rng, rng.randrange(0, 40))
+            tasks.sort(key=lambda t: t.time)
+            queue = TaskQueue(tasks)
+            for query in random_queries(rng, 50):
+                self.assertIs(
+                    find_next_task(queue, *query), find_next_task(tasks, *query)
+                )
+
+    def test_unsorted(self):
+        rng = random.Random(1)
+        tasks = random_tasks(rng, 30)
+        queue = TaskQueue(tasks)
+        for query in random_queries(rng, 200):
+            self.assertIs(queue.find(*query), find_next_task(tasks, *query))
+
+    def test_invalidate(self):
+        rng = random.Random(2)
+        queue = TaskQueue(random_tasks(rng, 10))
+        queue.sort()
+        self.assertIs(queue.find(), queue[0])
+        # 修改任务时间后缓存失效，列表未排序时退回逐个比较
+        queue[-1].time = START - timedelta(minutes=1)
+        self.assertIs(queue.find(START), queue[-1])
+        self.assertFalse(queue._build()["ordered"])
+        queue.sort()
+        self.assertIs(queue.find(START), queue[0])
+        self.assertEqual(queue[0].time, START - timedelta(minutes=1))
+        task = SchedulerTask(
+            time=START - timedelta(hours=1), task_type=TaskTypes.RUN_ORDER
+        )
+        queue.insert(0, task)
+        self.assertIs(queue.find(task_type=TaskTypes.RUN_ORDER), task)
+        queue.remove(task)
+        self.assertIsNot(queue.find(task_type=TaskTypes.RUN_ORDER), task)
+        task = queue[3]
+        task.type = TaskTypes.SKLAND
+        self.assertIs(queue.find(task_type=TaskTypes.SKLAND), task)
+        del queue[3]
+        self.assertIsNone(queue.find(task_type=TaskTypes.SKLAND))
+
+    def test_isolated(self):
+        rng = random.Random(6)
+        queue = TaskQueue(sorted(random_tasks(rng, 10), key=lambda t: t.time))
+        other = TaskQueue(random_tasks(rng, 10))
+        index = queue._build()
+        other._build()
+        # 新建任务、format 出的副本、其他队列中任务的变化都不影响缓存
+        SchedulerTask(time=START, task_type=TaskTypes.RUN_ORDER, meta_data="room")
+        queue[0].format(8)
+        copied = pickle.loads(pickle.dumps(queue[1]))
+        copied.time = START
+        other[0].time = START - timedelta(hours=1)
+        self.assertIs(queue._build(), index)
+        self.assertIsNot(other._build(), index)
+        # 移出队列的任务也不再影响缓存
+        task = queue.pop()
+        index = queue._build()
+        task.time = START
+        self.assertIs(queue._build(), index)
+        queue[0].time = START - timedelta(hours=1)
+        self.assertIsNot(queue._build(), index)
+        self.assertIs(queue.find(), queue[0])
+
+    def test_pickle(self):
+        rng = random.Random(4)
+        queue = TaskQueue(random_tasks(rng, 5))
+        queue.find()
+        loaded = pickle.loads(pickle.dumps(queue))
+        self.assertIsInstance(loaded, TaskQueue)
+        self.assertEqual(loaded, queue)
+        self.assertEqual(loaded.find(), queue.find())
+
+
+if __name__ == "__main__":
+    unittest.main()
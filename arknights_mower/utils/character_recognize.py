@@ -1,22 +1,14 @@
-import lzma
-import pickle
 from concurrent.futures import ThreadPoolExecutor
 
 import cv2
 import numpy as np
 
-from arknights_mower import __rootdir__
+from arknights_mower import models
 from arknights_mower.utils.image import cropimg, thres2
 from arknights_mower.utils.log import logger
 
 kernel = np.ones((10, 10), np.uint8)
 
-with lzma.open(f"{__rootdir__}/models/operator_select.model", "rb") as f:
-    OP_SELECT = pickle.loads(f.read())
-
-with lzma.open(f"{__rootdir__}/models/operator_train.model", "rb") as f:
-    OP_TRAIN = pickle.loads(f.read())
-
 
 def operator_list(img, draw=False, full_scan=True):
     name_y = ((488, 520), (909, 941))
@@ -63,7 +55,7 @@ def operator_list(img, draw=False, full_scan=True):
         tpl = cv2.copyMakeBorder(tpl, 2, 2, 2, 2, cv2.BORDER_CONSTANT, None, (0,))
         max_score = 0
         best_operator = None
-        for operator, template in OP_SELECT.items():
+        for operator, template in models.operator_select.items():
             result = cv2.matchTemplate(tpl, template, cv2.TM_CCORR_NORMED)
             min_val, max_val, min_loc, max_loc = cv2.minMaxLoc(result)
             if max_val > max_score:
@@ -183,7 +175,7 @@ def operator_list_train(img, draw=False, full_scan=True):
         cv2.destroyAllWindows()"""
         max_score = 0
         best_operator = ""
-        for operator, template in OP_TRAIN.items():
+        for operator, template in models.operator_train.items():
             result = cv2.matchTemplate(tpl, template, cv2.TM_CCORR_NORMED)
             min_val, max_val, min_loc, max_loc = cv2.minMaxLoc(result)
             if max_val > max_score:
@@ -88,6 +88,16 @@ class ExtraPart(ConfModel):
         tray: bool = True
         "托盘图标"
 
+    class OCRConf(ConfModel):
+        intra_op_num_threads: int = -1
+        "算子内线程数（-1 为自动）"
+        inter_op_num_threads: int = -1
+        "算子间线程数（-1 为自动）"
+        graph_optimization_level: str = "all"
+        "图优化等级（disable/basic/extended/all）"
+        cache_optimized_model: bool = False
+        "缓存优化后的模型"
+
     class WaitingSceneConf(ConfModel):
         CONNECTING: tuple[int, int] = (1, 10)
         UNKNOWN: tuple[int, int] = (1, 10)
@@ -110,6 +120,8 @@ class ExtraPart(ConfModel):
     "检查更新"
     waiting_scene: WaitingSceneConf
     "等待时间"
+    ocr: OCRConf
+    "文字识别设置（重启后生效）"
 
 
 class LongTaskPart(ConfModel):
@@ -5,7 +5,7 @@ from datetime import datetime
 import pandas as pd
 
 # from .log import logger
-from arknights_mower.data import key_mapping, workshop_formula
+from arknights_mower import data
 
 # from typing import Dict, List, Union
 from arknights_mower.solvers.record import save_inventory_counts
@@ -20,7 +20,7 @@ def 读取仓库():
         depotinfo = json.load(f)
     物品数量 = depotinfo["data"]["items"]
     新物品1 = {
-        key_mapping[item["id"]][2]: int(item["count"])
+        data.key_mapping[item["id"]][2]: int(item["count"])
         for item in 物品数量
         if int(item["count"]) != 0
     }
@@ -37,11 +37,11 @@ def 读取仓库():
     新物品 = {**最后一行物品, **新物品1}  # 合并字典
     新物品json = {}
     db_dict = {}
-    for k in workshop_formula.keys():
+    for k in data.workshop_formula.keys():
         db_dict[k] = 0
     for item in 新物品:
-        新物品json[key_mapping[item][0]] = 新物品[item]
-        db_dict[key_mapping[item][2]] = 新物品[item]
+        新物品json[data.key_mapping[item][0]] = 新物品[item]
+        db_dict[data.key_mapping[item][2]] = 新物品[item]
     time = depotinfo.iloc[-1, 0]
     save_inventory_counts(db_dict)
     sort = {
@@ -144,7 +144,7 @@ def 读取仓库():
     classified_data["K未分类"] = {}
     for category, items in sort.items():
         classified_data[category] = {
-            item: {"number": 0, "sort": key_mapping[item][4], "icon": item}
+            item: {"number": 0, "sort": data.key_mapping[item][4], "icon": item}
             for item in items
         }
 
@@ -154,7 +154,7 @@ def 读取仓库():
             if key in items:
                 classified_data[category][key] = {
                     "number": value,
-                    "sort": key_mapping[key][4],
+                    "sort": data.key_mapping[key][4],
                     "icon": key,
                 }
                 found_category = True
@@ -163,7 +163,7 @@ def 读取仓库():
             # 如果未找到匹配的分类，则放入 "K未分类" 中
             classified_data["K未分类"][key] = {
                 "number": value,
-                "sort": key_mapping[key][4],
+                "sort": data.key_mapping[key][4],
                 "icon": key,
             }
 
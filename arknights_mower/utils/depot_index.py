@@ -0,0 +1,95 @@
+import json
+import lzma
+import pickle
+from pathlib import Path
+
+import numpy as np
+
+from arknights_mower.utils.log import logger
+
+
+class 物品分类索引:
+    """仓库物品的近似最近邻索引：HOG 特征经 PCA 降维后以 float16 保存
+
+    {前缀}_pca.npy 首行为均值、其余行为主成分，{前缀}_index.npy 为降维后的模板，
+    两者都以内存映射方式读取，首次预测时才加载；接口与 KNeighborsClassifier 相同
+    """
+
+    # 每次转换成 float32 计算距离的模板行数
+    分块 = 1024
+
+    def __init__(self, 前缀) -> None:
+        self.前缀 = str(前缀)
+        self.均值 = None
+        self.主成分 = None
+        self.模板 = None
+        self.标签 = None
+
+    @staticmethod
+    def 文件(前缀) -> tuple[Path, Path, Path]:
+        return (
+            Path(f"{前缀}_pca.npy"),
+            Path(f"{前缀}_index.npy"),
+            Path(f"{前缀}_labels.json"),
+        )
+
+    @classmethod
+    def 存在(cls, 前缀) -> bool:
+        return all(path.is_file() for path in cls.文件(前缀))
+
+    @classmethod
+    def 导出(cls, 模板, 标签, 前缀, 维数上限: int = 128) -> "物品分类索引":
+        """把训练 1-NN 模型用的模板特征和标签导出为索引
+
+        主成分个数不少于模板数时，降维前后最近的模板相同，只受 float16 精度影响
+        """
+        from sklearn.decomposition import PCA
+
+        模板 = np.asarray(模板)
+        标签 = np.asarray(标签)
+        pca = PCA(n_components=min(维数上限, *模板.shape)).fit(模板)
+        投影, 索引, 标签路径 = cls.文件(前缀)
+        np.save(投影, np.vstack([pca.mean_, pca.components_]).astype(np.float16))
+        np.save(索引, pca.transform(模板).astype(np.float16))
+        with open(标签路径, "w", encoding="utf-8") as f:
+            json.dump(标签.tolist(), f, ensure_ascii=False)
+        return cls(前缀)
+
+    def 加载(self) -> None:
+        if self.标签 is not None:
+            return
+        投影, 索引, 标签路径 = self.文件(self.前缀)
+        投影 = np.load(投影, mmap_mode="r")
+        self.均值 = 投影[0]
+        self.主成分 = 投影[1:]
+        self.模板 = np.load(索引, mmap_mode="r")
+        with open(标签路径, "r", encoding="utf-8") as f:
+            self.标签 = np.array(json.load(f))
+        logger.debug(f"仓库扫描: 加载{self.前缀}，{self.主成分.shape[0]}维")
+
+    def 降维(self, 特征) -> np.ndarray:
+        self.加载()
+        特征 = np.asarray(特征, np.float32) - self.均值
+        return 特征 @ self.主成分.T.astype(np.float32)
+
+    def predict(self, 特征) -> np.ndarray:
+        降维 = self.降维(特征)
+        最近 = np.zeros(len(降维), dtype=np.intp)
+        最小距离 = np.full(len(降维), np.inf, dtype=np.float32)
+        for 起点 in range(0, len(self.模板), self.分块):
+            块 = self.模板[起点 : 起点 + self.分块].astype(np.float32)
+            距离 = ((降维[:, None, :] - 块[None, :, :]) ** 2).sum(axis=2)
+            序号 = 距离.argmin(axis=1)
+            块最小 = 距离[np.arange(len(降维)), 序号]
+            更近 = 块最小 < 最小距离
+            最近[更近] = 序号[更近] + 起点
+            最小距离[更近] = 块最小[更近]
+        return self.标签[最近]
+
+
+def 加载物品分类器(前缀):
+    """优先使用导出的索引，没有时退回到 lzma 压缩的 kNN 模型"""
+    if 物品分类索引.存在(前缀):
+        return 物品分类索引(前缀)
+    with lzma.open(f"{前缀}.pkl", "rb") as pkl:
+        return pickle.load(pkl)
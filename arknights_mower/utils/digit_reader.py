@@ -1,79 +1,227 @@
-import os
-from pathlib import Path
+from functools import lru_cache
+from typing import Hashable, Optional
 
 import cv2
 import numpy as np
 
-from .image import loadres
+from arknights_mower.utils import typealias as tp
+from arknights_mower.utils.image import cropimg, loadres, thres2
 
 
-class DigitReader:
-    def __init__(self, template_dir=None):
-        if not template_dir:
-            template_dir = Path(os.path.dirname(os.path.abspath(__file__))) / Path(
-                "templates"
+class DigitTemplates:
+    """一套数字字体的模板，统一负责滑窗扫描与逐字分类两种识别方式"""
+
+    def __init__(
+        self,
+        templates: dict[Hashable, tp.GrayImage],
+        method: int = cv2.TM_SQDIFF_NORMED,
+    ) -> None:
+        self.labels = list(templates)
+        self.templates = list(templates.values())
+        self.method = method
+        # 平方差越小越相似，相关系数越大越相似
+        self.lower_better = method in (cv2.TM_SQDIFF, cv2.TM_SQDIFF_NORMED)
+
+    def with_method(self, method: int) -> "DigitTemplates":
+        return DigitTemplates(dict(zip(self.labels, self.templates)), method)
+
+    def responses(self, imgs: list[tp.GrayImage]) -> np.ndarray:
+        """每张图上每个模板在每一列的最佳得分，形状为 (图片数, 模板数, 列数)，越大越相似
+
+        图片右侧补黑边到同宽后上下拼接，每个模板只调用一次 matchTemplate；
+        超出原图宽度的列得分为 -inf，结果与逐张匹配相同
+        """
+        heights = [img.shape[0] for img in imgs]
+        widths = [img.shape[1] for img in imgs]
+        offsets = np.cumsum([0] + heights)
+        strip_width = max(widths)
+        strip = np.vstack(
+            [np.pad(img, ((0, 0), (0, strip_width - img.shape[1]))) for img in imgs]
+        )
+        width = strip_width - min(t.shape[1] for t in self.templates) + 1
+        scores = np.full((len(imgs), len(self.templates), max(width, 0)), -np.inf)
+        for i, template in enumerate(self.templates):
+            th, tw = template.shape
+            if th > strip.shape[0] or tw > strip.shape[1]:
+                continue
+            res = cv2.matchTemplate(strip, template, self.method)
+            if self.lower_better:
+                res = -res
+            for k, height in enumerate(heights):
+                valid = widths[k] - tw + 1
+                if th > height or valid <= 0:
+                    continue
+                rows = res[offsets[k] : offsets[k] + height - th + 1, :valid]
+                scores[k, i, :valid] = rows.max(axis=0)
+        return scores
+
+    def scan(
+        self,
+        img: tp.GrayImage,
+        threshold: float,
+        distance: int = 5,
+        limit: Optional[int] = None,
+    ) -> list[Hashable]:
+        """滑窗扫描，按得分做非极大值抑制，返回从左到右的数字
+
+        Args:
+            img: 数字所在的横条
+            threshold: 得分阈值（平方差类方法为上限）
+            distance: 两个数字之间的最小间距
+            limit: 最多保留得分最高的几个数字
+        """
+        return self.scan_many([img], threshold, distance, limit)[0]
+
+    def scan_many(
+        self,
+        imgs: list[tp.GrayImage],
+        threshold: float,
+        distance: int = 5,
+        limit: Optional[int] = None,
+    ) -> list[list[Hashable]]:
+        """对多张图片批量滑窗扫描，结果与逐张调用 scan 相同"""
+        if not imgs:
+            return []
+        if self.lower_better:
+            threshold = -threshold
+        return [
+            self.peaks(scores, threshold, distance, limit)
+            for scores in self.responses(imgs)
+        ]
+
+    def peaks(
+        self,
+        scores: np.ndarray,
+        threshold: float,
+        distance: int,
+        limit: Optional[int],
+    ) -> list[Hashable]:
+        if scores.size == 0:
+            return []
+        best = scores.max(axis=0)
+        label = scores.argmax(axis=0)
+        best[best < threshold] = -np.inf
+        peaks = []
+        columns = np.arange(best.size)
+        while limit is None or len(peaks) < limit:
+            x = int(best.argmax())
+            if best[x] == -np.inf:
+                break
+            peaks.append(x)
+            best[np.abs(columns - x) < distance] = -np.inf
+        return [self.labels[label[x]] for x in sorted(peaks)]
+
+    def classify(self, glyphs: list[tp.GrayImage], pad: int = 10) -> list[Hashable]:
+        """逐字分类：每个字加上黑边后与所有模板比较
+
+        所有字拼成一张横条，每个模板只需匹配一次，再在各字对应的窗口内取最优
+        """
+        if not glyphs:
+            return []
+        height = max(g.shape[0] for g in glyphs) + 2 * pad
+        offsets = np.cumsum([0] + [g.shape[1] + 2 * pad for g in glyphs])
+        strip = np.zeros((height, offsets[-1]), np.uint8)
+        for glyph, x in zip(glyphs, offsets):
+            strip[pad : pad + glyph.shape[0], x + pad : x + pad + glyph.shape[1]] = (
+                glyph
             )
-        if not isinstance(template_dir, Path):
-            template_dir = Path(template_dir)
-        self.time_template = []
-        self.drone_template = []
-        for i in range(10):
-            self.time_template.append(loadres(f"orders_time/{i}", True))
-            self.drone_template.append(loadres(f"drone_count/{i}", True))
+        scores = np.full((len(glyphs), len(self.templates)), -np.inf)
+        for i, template in enumerate(self.templates):
+            th, tw = template.shape
+            if th > height or tw > strip.shape[1]:
+                continue
+            res = cv2.matchTemplate(strip, template, self.method)
+            if self.lower_better:
+                res = -res
+            for k, glyph in enumerate(glyphs):
+                gh, gw = glyph.shape[0] + 2 * pad, glyph.shape[1] + 2 * pad
+                if th > gh or tw > gw:
+                    # 模板比字大时单独匹配，与逐字调用 matchTemplate 的行为一致
+                    window = cv2.matchTemplate(
+                        strip[:gh, offsets[k] : offsets[k] + gw], template, self.method
+                    )
+                    if self.lower_better:
+                        window = -window
+                else:
+                    window = res[: gh - th + 1, offsets[k] : offsets[k] + gw - tw + 1]
+                scores[k, i] = window.max()
+        return [self.labels[i] for i in scores.argmax(axis=1)]
+
+
+@lru_cache(maxsize=None)
+def get_templates(name: str) -> DigitTemplates:
+    """按名称取得数字模板
+
+    orders_time、drone_count、depot_num 来自 resources，
+    secret_front、riic_base、noto 来自 models 中的字体
+    """
+    if name in ("orders_time", "drone_count"):
+        templates = {i: loadres(f"{name}/{i}", True) for i in range(10)}
+        return DigitTemplates(templates, cv2.TM_CCOEFF_NORMED)
+    if name == "depot_num":
+        # 10 为“万”，11 为小数点
+        names = [f"digit_{i}" for i in range(10)] + ["digit_91", "digit_point"]
+        templates = {i: loadres(f"depot_num/{n}", True) for i, n in enumerate(names)}
+        return DigitTemplates(templates, cv2.TM_CCORR_NORMED)
+
+    from arknights_mower import models
+
+    font = {
+        "secret_front": models.secret_front,
+        "riic_base": models.riic_base_digits,
+        "noto": models.noto_sans,
+    }[name]
+    return DigitTemplates({i: font[i] for i in range(10)})
+
+
+def read_number(
+    img: tp.GrayImage,
+    font: str,
+    height: Optional[int] = None,
+    default_height: int = 25,
+    thres: int = 127,
+) -> int:
+    """基于轮廓分割与模板匹配的数字识别
+
+    Args:
+        img: 数字区域的灰度图
+        font: 数字字体
+        height: 数字在截图中的高度，与字体高度不同时先缩放
+        default_height: 字体高度
+        thres: 二值化阈值
+    """
+    if height and height != default_height:
+        scale = default_height / height
+        img = cv2.resize(img, None, None, scale, scale)
+    img = thres2(img, thres)
+    contours, _ = cv2.findContours(img, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+    rect = [cv2.boundingRect(c) for c in contours]
+    rect.sort(key=lambda c: c[0])
+    glyphs = [cropimg(img, ((x, y), (x + w, y + h))) for x, y, w, h in rect]
+    value = 0
+    for digit in get_templates(font).classify(glyphs):
+        value = value * 10 + digit
+    return value
+
+
+class DigitReader:
+    def __init__(self):
+        self.time_template = get_templates("orders_time")
+        self.drone_template = get_templates("drone_count")
+        self.drone_count_template = self.drone_template.with_method(cv2.TM_CCORR_NORMED)
 
     def get_drone(self, img_grey, h=1080, w=1920):
         drone_part = img_grey[
             h * 32 // 1080 : h * 76 // 1080, w * 1144 // 1920 : w * 1225 // 1920
         ]
         drone_part = cv2.resize(drone_part, (81, 44), interpolation=cv2.INTER_AREA)
-        result = {}
-        for j in range(10):
-            res = cv2.matchTemplate(
-                drone_part,
-                self.drone_template[j],
-                cv2.TM_CCORR_NORMED,
-            )
-            threshold = 0.95
-            loc = np.where(res >= threshold)
-            for i in range(len(loc[0])):
-                offset = loc[1][i]
-                accept = True
-                for o in result:
-                    if abs(o - offset) < 5:
-                        accept = False
-                        break
-                if accept:
-                    result[loc[1][i]] = j
-        ch = [str(result[k]) for k in sorted(result)]
-        return int("".join(ch))
-
-    def get_time(self, img_grey, h, w):
+        ch = self.drone_count_template.scan(drone_part, 0.95)
+        return int("".join(str(c) for c in ch))
+
+    def get_time(self, img_grey, h=1080, w=1920):
         digit_part = img_grey[h * 510 // 1080 : h * 543 // 1080, w * 499 // 1920 : w]
         digit_part = cv2.resize(digit_part, (1421, 33), interpolation=cv2.INTER_AREA)
-        result = {}
-        for j in range(10):
-            res = cv2.matchTemplate(
-                digit_part,
-                self.time_template[j],
-                cv2.TM_CCOEFF_NORMED,
-            )
-            threshold = 0.85
-            loc = np.where(res >= threshold)
-            for i in range(len(loc[0])):
-                x = loc[1][i]
-                accept = True
-                for o in result:
-                    if abs(o - x) < 5:
-                        accept = False
-                        break
-                if accept:
-                    if len(result) == 0:
-                        digit_part = digit_part[:, loc[1][i] - 5 : loc[1][i] + 116]
-                        offset = loc[1][0] - 5
-                        for m in range(len(loc[1])):
-                            loc[1][m] -= offset
-                    result[loc[1][i]] = j
-        ch = [str(result[k]) for k in sorted(result)]
+        ch = self.time_template.scan(digit_part, 0.85, limit=6)
         return f"{ch[0]}{ch[1]}:{ch[2]}{ch[3]}:{ch[4]}{ch[5]}"
 
     def 识别制造加速总剩余时间(self, img_grey, h, w):
@@ -83,26 +231,7 @@ class DigitReader:
         时间部分 = cv2.resize(
             时间部分, (210 * 58 // 71, 44 * 58 // 71), interpolation=cv2.INTER_AREA
         )
-        result = {}
-        for j in range(10):
-            res = cv2.matchTemplate(
-                时间部分,
-                self.drone_template[j],
-                cv2.TM_CCOEFF_NORMED,
-            )
-            threshold = 0.85
-            loc = np.where(res >= threshold)
-            for i in range(len(loc[0])):
-                offset = loc[1][i]
-                accept = True
-                for o in result:
-                    if abs(o - offset) < 5:
-                        accept = False
-                        break
-                if accept:
-                    result[loc[1][i]] = j
-        ch = [str(result[k]) for k in sorted(result)]
-        print(ch)
+        ch = self.drone_template.scan(时间部分, 0.85)
         if len(ch) == 6:
             return (
                 int(f"{ch[0]}{ch[1]}"),
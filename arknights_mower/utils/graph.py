@@ -1,4 +1,5 @@
 import functools
+from typing import Optional
 
 import networkx as nx
 
@@ -13,10 +14,42 @@ from arknights_mower.utils.solver import BaseSolver
 
 DG = nx.DiGraph()
 
+# 最短路径的下一跳：_routes[起点][终点]，首次导航时计算，边变化后重新计算
+_routes: Optional[dict[int, dict[int, int]]] = None
+
+
+def invalidate_routes():
+    global _routes
+    _routes = None
+
+
+def routing_table() -> dict[int, dict[int, int]]:
+    """所有场景之间按权重最短路径的下一跳，不可达的终点不在表中"""
+    global _routes
+    if (routes := _routes) is None:
+        routes = {}
+        for source, paths in nx.all_pairs_dijkstra_path(DG, weight="weight"):
+            routes[source] = {
+                target: path[1] for target, path in paths.items() if target != source
+            }
+        _routes = routes
+    return routes
+
+
+def unreachable() -> dict[int, set[int]]:
+    """每个场景无法到达的场景，用于检查场景图"""
+    nodes = set(DG.nodes)
+    result = {}
+    for source, targets in routing_table().items():
+        if missing := nodes - targets.keys() - {source}:
+            result[source] = missing
+    return result
+
 
 def edge(v_from: int, v_to: int, interval: int = 1):
     def decorator(func):
         DG.add_edge(v_from, v_to, weight=interval, transition=func)
+        invalidate_routes()
 
         @functools.wraps(func)
         def wrapper(*args, **kw):
@@ -430,10 +463,11 @@ class SceneGraphSolver(BaseSolver):
                 logger.debug(f"{SceneComment[current]}不在场景图中")
                 self.sleep()
 
-            try:
-                sp = nx.shortest_path(DG, current, scene, weight="weight")
-            except Exception as e:
-                logger.exception(f"场景图路径计算异常：{e}")
+            next_scene = routing_table().get(current, {}).get(scene)
+            if next_scene is None:
+                logger.error(
+                    f"场景图中无法从{SceneComment[current]}到达{SceneComment[scene]}"
+                )
                 restart_simulator()
                 self.device.client.check_server_alive()
                 Session().connect(config.conf.adb)
@@ -443,9 +477,7 @@ class SceneGraphSolver(BaseSolver):
                     self.device.control.scrcpy = Scrcpy(self.device.client)
                 return
 
-            logger.debug(sp)
-
-            next_scene = sp[1]
+            logger.debug(f"{SceneComment[current]} -> {SceneComment[next_scene]}")
             transition = DG.edges[current, next_scene]["transition"]
 
             try:
@@ -1,5 +1,3 @@
-import lzma
-import pickle
 from typing import Optional, Tuple
 
 import cv2
@@ -9,7 +7,7 @@ import sklearn.preprocessing
 import sklearn.svm  # noqa
 from skimage.metrics import structural_similarity as compare_ssim
 
-from arknights_mower import __rootdir__
+from arknights_mower import models
 from arknights_mower.utils import typealias as tp
 from arknights_mower.utils.image import cropimg
 from arknights_mower.utils.log import logger
@@ -28,10 +26,6 @@ def keypoints(img: tp.GrayImage):
     return ORB_no_pyramid.detectAndCompute(img, None)
 
 
-with lzma.open(f"{__rootdir__}/models/svm.model", "rb") as f:
-    SVC = pickle.loads(f.read())
-
-
 # build FlannBasedMatcher
 
 # FLANN_INDEX_KDTREE = 1
@@ -104,7 +98,7 @@ class Matcher:
             else:
                 logger.debug(f"score is not greater than {prescore}: {rect_score}")
                 return None
-        if judge and not SVC.predict([score])[0]:
+        if judge and not models.svm.predict([score])[0]:
             logger.debug(f"match fail: {rect_score}")
             return None
         logger.debug(f"match success: {rect_score}")
@@ -246,8 +240,10 @@ class Matcher:
 
             # measure the rate of good match within the rectangle (x-axis)
             better = filter(
-                lambda m: rect[0][0] < ori_kp[m.trainIdx].pt[0] < rect[1][0]
-                and rect[0][1] < ori_kp[m.trainIdx].pt[1] < rect[1][1],
+                lambda m: (
+                    rect[0][0] < ori_kp[m.trainIdx].pt[0] < rect[1][0]
+                    and rect[0][1] < ori_kp[m.trainIdx].pt[1] < rect[1][1]
+                ),
                 good,
             )
             better_kp_x = [qry_kp[m.queryIdx].pt[0] for m in better]
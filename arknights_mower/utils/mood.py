@@ -0,0 +1,144 @@
+from datetime import datetime, timedelta
+from typing import Iterable, Optional
+
+import numpy as np
+
+DAY = 24 * 3600
+
+
+class MoodTable:
+    """全体干员心情的快照，按列存成数组，一次算出所有干员在某一时刻的心情
+
+    时间都换算成相对 now 的秒数，没有记录的时间为 nan。
+    计算规则与 Operator.current_mood、Operator.predict_exhaust 一致。
+    """
+
+    def __init__(self, operators: Iterable, dorms: Iterable = (), now=None):
+        self.now = now or datetime.now()
+        operators = list(operators)
+        self.names = [op.name for op in operators]
+        self.index = {name: i for i, name in enumerate(self.names)}
+
+        def array(values, dtype=np.float64):
+            return np.fromiter(values, dtype=dtype, count=len(operators))
+
+        self.mood = array(op.mood for op in operators)
+        self.depletion_rate = array(op.depletion_rate for op in operators)
+        self.upper_limit = array(op.upper_limit for op in operators)
+        self.lower_limit = array(op.lower_limit for op in operators)
+        self.time_stamp = array(self.offset(op.time_stamp) for op in operators)
+        self.exhaust_time = array(self.offset(op.exhaust_time) for op in operators)
+        self.high = array((op.is_high() for op in operators), bool)
+        self.resting = array((op.is_resting() for op in operators), bool)
+        # 排班表中本身就在宿舍的干员
+        self.dorm_room = array((op.room.startswith("dorm") for op in operators), bool)
+        self.workaholic = array((op.workaholic for op in operators), bool)
+        self.low_type = array((op.operator_type == "low" for op in operators), bool)
+        self.no_exhaust = array(
+            (
+                op.workaholic or op.exhaust_require or op.room in ["factory", "train"]
+                for op in operators
+            ),
+            bool,
+        )
+        # 宿舍休息结束时间
+        self.rest_until = np.full(len(operators), np.nan)
+        for dorm in dorms:
+            if dorm.name in self.index and dorm.time is not None:
+                self.rest_until[self.index[dorm.name]] = self.offset(dorm.time)
+
+    def __len__(self):
+        return len(self.names)
+
+    def offset(self, time: Optional[datetime]) -> float:
+        if time is None:
+            return np.nan
+        return (time - self.now).total_seconds()
+
+    def to_datetime(self, offset: float) -> datetime:
+        return self.now + timedelta(seconds=float(offset))
+
+    def current_mood(self, time: Optional[datetime] = None) -> np.ndarray:
+        return self.forecast([0 if time is None else self.offset(time)])[0]
+
+    def moods(self, time: Optional[datetime] = None) -> dict[str, float]:
+        return dict(zip(self.names, self.current_mood(time).tolist()))
+
+    def forecast(self, offsets) -> np.ndarray:
+        """预测一组时刻（相对 now 的秒数）的心情，返回 (时刻数, 干员数) 的数组"""
+        offsets = np.asarray(offsets, dtype=np.float64)[:, None]
+        elapsed = np.where(np.isnan(self.time_stamp), 0.0, offsets - self.time_stamp)
+        predict = self.mood - self.depletion_rate * elapsed / 3600
+        return np.where((predict >= 0) & (predict <= 24), predict, self.mood)
+
+    def predict_exhaust(self) -> np.ndarray:
+        """心情用尽的时刻（相对 now 的秒数）"""
+        remaining = self.mood - self.lower_limit
+        # time_stamp 为 nan 或掉率不为正时不按掉率预测
+        with np.errstate(divide="ignore", invalid="ignore"):
+            predict = self.time_stamp + (remaining / self.depletion_rate - 0.5) * 3600
+        predict = np.fmin(predict, self.exhaust_time)
+        by_rate = ~np.isnan(self.time_stamp) & (self.depletion_rate > 0)
+        result = np.where(by_rate, predict, np.where(remaining <= 0, 0.0, float(DAY)))
+        result[self.no_exhaust] = DAY
+        return result
+
+    def rested(self, time: Optional[datetime] = None) -> np.ndarray:
+        """宿舍休息是否已经结束"""
+        with np.errstate(invalid="ignore"):
+            return self.rest_until < (0 if time is None else self.offset(time))
+
+    def average_mood(self, time: Optional[datetime] = None) -> float:
+        """工作中的高效干员的平均心情百分比，同 Operators.average_mood"""
+        mask = ~self.resting & ~self.low_type & ~self.workaholic
+        lower = self.lower_limit[mask]
+        total = (self.upper_limit[mask] - lower).sum()
+        if total == 0:
+            return 0
+        return float((self.current_mood(time)[mask] - lower).sum() / total)
+
+    def fia_timeline(self, names, fia_mood, hours=240):
+        """以当前心情模拟菲亚梅塔给 names 轮流充能，见 simulate_fia"""
+        idx = [self.index[name] for name in names]
+        return simulate_fia(
+            self.current_mood()[idx],
+            self.depletion_rate[idx],
+            self.lower_limit[idx],
+            self.upper_limit[idx],
+            fia_mood,
+            hours,
+        )
+
+
+def simulate_fia(mood, depletion_rate, lower_limit, upper_limit, fia_mood, hours=240):
+    """模拟菲亚梅塔轮流充能，返回 (能否维持, 充能记录)
+
+    每轮菲亚休息 (24 - 心情) / 2 小时，期间所有干员按掉率消耗心情，
+    之后给心情比例最低的干员充满，菲亚的心情变为该干员充能前的心情。
+    充能记录是 (经过的小时数, 干员下标, 充能前心情) 的列表。
+    菲亚充能的干员一般只有几个，直接用列表比 numpy 更快。
+    """
+    mood = [float(m) for m in mood]
+    depletion_rate = [float(r) for r in depletion_rate]
+    lower_limit = [float(low) for low in lower_limit]
+    span = [float(up) - low for up, low in zip(upper_limit, lower_limit)]
+    agents = range(len(mood))
+    timeline = []
+    elapsed = 0.0
+    while True:
+        recover_hours = (24 - fia_mood) / 2
+        for i in agents:
+            mood[i] -= depletion_rate[i] * recover_hours
+            if mood[i] < 0.0:
+                return False, timeline
+        if recover_hours >= hours or 0 < recover_hours < 1:
+            return True, timeline
+        # 菲亚心情已满或没有可以充能的干员，无法继续轮换
+        if recover_hours <= 0 or not mood:
+            return False, timeline
+        elapsed += recover_hours
+        hours -= recover_hours
+        target = min(agents, key=lambda i: (mood[i] - lower_limit[i]) / span[i])
+        fia_mood = mood[target]
+        timeline.append((elapsed, target, fia_mood))
+        mood[target] = 24
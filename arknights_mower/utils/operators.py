@@ -5,6 +5,7 @@ from itertools import product
 from evalidate import Expr, base_eval_model
 
 from arknights_mower.utils import config
+from arknights_mower.utils.mood import MoodTable, simulate_fia
 from arknights_mower.utils.plan import BaseProduct, Plan, PlanConfig
 
 from ..data import agent_arrange_order, agent_list, base_room_list
@@ -115,7 +116,6 @@ class SkillUpgradeSupport:
 
 class Operators:
     config = None
-    operators = None
     groups = None
     dorm = []
     plan = None
@@ -128,6 +128,11 @@ class Operators:
     skill_upgrade_supports = []
 
     def __init__(self, plan):
+        # 按所在房间、所在位置索引干员，由 Operator 的 current_room/current_index 更新
+        self._by_room = {}
+        self._by_position = {}
+        # 宿舍位置 -> (下标, Dormitory)
+        self._dorm_index = None
         self.operators = {}
         self.groups = {}
         self.exhaust_agent = set()
@@ -163,6 +168,60 @@ class Operators:
     def __repr__(self):
         return f"Operators(operators={self.operators})"
 
+    def __setstate__(self, state):
+        # 复制出的干员不再属于原对象，重新接管并重建索引
+        self.__dict__.update(state)
+        self._dorm_index = None
+        self.operators = self._operators
+
+    @property
+    def operators(self) -> dict[str, "Operator"]:
+        return self._operators
+
+    @operators.setter
+    def operators(self, value):
+        for operator in getattr(self, "_operators", {}).values():
+            if operator._owner is self:
+                operator._owner = None
+        self._operators = value
+        self._by_room = {}
+        self._by_position = {}
+        for operator in value.values():
+            operator._owner = self
+            self._place(operator)
+
+    def _place(self, operator):
+        room, index = operator.current_room, operator.current_index
+        self._by_room.setdefault(room, {})[operator.name] = operator
+        self._by_position.setdefault((room, index), {})[operator.name] = operator
+
+    def _unplace(self, operator, room, index):
+        for table, key in ((self._by_room, room), (self._by_position, (room, index))):
+            bucket = table.get(key)
+            if bucket is not None and bucket.get(operator.name) is operator:
+                del bucket[operator.name]
+                if not bucket:
+                    del table[key]
+
+    def moved(self, operator, room, index):
+        """干员的 current_room 或 current_index 从 (room, index) 变化后更新索引"""
+        self._unplace(operator, room, index)
+        self._place(operator)
+
+    def operators_in(self, room) -> list["Operator"]:
+        """当前在 room 中的干员"""
+        return list(self._by_room.get(room, {}).values())
+
+    def dorm_at(self, room, index):
+        """宿舍位置对应的 (下标, Dormitory)，self.dorm 被替换或增加后重建"""
+        cache = self._dorm_index
+        if cache is None or cache[0] is not self.dorm or cache[1] != len(self.dorm):
+            positions = {}
+            for idx, dorm in enumerate(self.dorm):
+                positions.setdefault(tuple(dorm.position), (idx, dorm))
+            cache = self._dorm_index = self.dorm, len(self.dorm), positions
+        return cache[2].get((room, index), (None, None))
+
     def calculate_switch_time(self, support: SkillUpgradeSupport):
         hour = 0
         half_off = support.half_off
@@ -469,16 +528,11 @@ class Operators:
             return None
 
     def get_current_room(self, room, bypass=False, current_index=None):
-        room_data = {
-            v.current_index: v
-            for k, v in self.operators.items()
-            if v.current_room == room
-        }
         res = [obj.agent for obj in self.plan[room]]
         not_found = False
         for idx, op in enumerate(res):
-            if idx in room_data:
-                res[idx] = room_data[idx].name
+            if (agent := self.get_current_operator(room, idx, last=True)) is not None:
+                res[idx] = agent.name
             else:
                 res[idx] = ""
                 if current_index is not None and idx not in current_index:
@@ -490,20 +544,14 @@ class Operators:
             return res
 
     def predict_fia(self, operators, fia_mood, hours=240):
-        recover_hours = (24 - fia_mood) / 2
-        for agent in operators:
-            agent.mood -= agent.depletion_rate * recover_hours
-            if agent.mood < 0.0:
-                return False
-        if recover_hours >= hours or 0 < recover_hours < 1:
-            return True
-        operators.sort(
-            key=lambda x: (x.mood - x.lower_limit) / (x.upper_limit - x.lower_limit),
-            reverse=False,
-        )
-        fia_mood = operators[0].mood
-        operators[0].mood = 24
-        return self.predict_fia(operators, fia_mood, hours - recover_hours)
+        return simulate_fia(
+            [op.mood for op in operators],
+            [op.depletion_rate for op in operators],
+            [op.lower_limit for op in operators],
+            [op.upper_limit for op in operators],
+            fia_mood,
+            hours,
+        )[0]
 
     def reset_dorm_time(self):
         for name in self.operators.keys():
@@ -573,22 +621,21 @@ class Operators:
 
     def refresh_dorm_time(self, room, index, agent):
         _name = agent["agent"]
-        for idx, dorm in enumerate(self.dorm):
-            if dorm.position[0] == room and dorm.position[1] == index:
-                if _name in self.operators.keys() or _name in agent_list:
-                    _agent = self.operators[_name]
-                    dorm.name = _name
-                    # 如果干员有心情上限，则按比例修改休息时间
-                    if _agent.mood != 24 and _agent.time_stamp:
-                        sec_remaining = (
-                            (_agent.upper_limit - _agent.mood)
-                            * ((agent["time"] - _agent.time_stamp).total_seconds())
-                            / (24 - _agent.mood)
-                        )
-                        dorm.time = _agent.time_stamp + timedelta(seconds=sec_remaining)
-                    else:
-                        dorm.time = agent["time"]
-                break
+        idx, dorm = self.dorm_at(room, index)
+        if dorm is not None:
+            if _name in self.operators.keys() or _name in agent_list:
+                _agent = self.operators[_name]
+                dorm.name = _name
+                # 如果干员有心情上限，则按比例修改休息时间
+                if _agent.mood != 24 and _agent.time_stamp:
+                    sec_remaining = (
+                        (_agent.upper_limit - _agent.mood)
+                        * ((agent["time"] - _agent.time_stamp).total_seconds())
+                        / (24 - _agent.mood)
+                    )
+                    dorm.time = _agent.time_stamp + timedelta(seconds=sec_remaining)
+                else:
+                    dorm.time = agent["time"]
         # 记录真实用尽时间
         if room in self.true_exhaust_room and _name in self.operators.keys():
             _agent = self.operators[_name]
@@ -628,11 +675,8 @@ class Operators:
                         )
 
     def get_train_support(self):
-        for name in self.operators.keys():
-            agent = self.operators[name]
-            if agent.current_room == "train" and agent.current_index == 0:
-                return agent.name
-        return None
+        agent = self.get_current_operator("train", 0)
+        return agent.name if agent is not None else None
 
     def get_refresh_index(self, room, plan):
         ret = []
@@ -656,15 +700,11 @@ class Operators:
     def get_dorm_by_name(self, name):
         _op = self.operators[name]
         logger.debug(name)
-        for idx, dorm in enumerate(self.dorm):
-            if (
-                dorm.position[0] == _op.current_room
-                and dorm.position[1] == _op.current_index
-            ):
-                logger.debug(idx)
-                logger.debug(dorm)
-                return idx, dorm
-        return None, None
+        idx, dorm = self.dorm_at(_op.current_room, _op.current_index)
+        if dorm is not None:
+            logger.debug(idx)
+            logger.debug(dorm)
+        return idx, dorm
 
     def add(self, operator):
         if operator.name not in agent_list:
@@ -689,7 +729,12 @@ class Operators:
             operator.depletion_rate = exist.depletion_rate
             operator.current_room = exist.current_room
             operator.current_index = exist.current_index
+        if (replaced := self.operators.get(operator.name)) not in (None, operator):
+            self._unplace(replaced, replaced.current_room, replaced.current_index)
+            replaced._owner = None
         self.operators[operator.name] = operator
+        operator._owner = self
+        self._place(operator)
         # 需要用尽心情干员逻辑
         if operator.exhaust_require:
             self.exhaust_agent.add(operator.name)
@@ -707,21 +752,15 @@ class Operators:
             if operator.group != "":
                 self.rest_in_full_group.add(operator.group)
 
-    def average_mood(self):
-        total_mood = 0
-        current_mood = 0
-        count = 0
-        for k, v in self.operators.items():
-            if not v.is_resting() and v.operator_type != "low" and not v.workaholic:
-                current_mood += v.current_mood() - v.lower_limit
-                total_mood += v.upper_limit - v.lower_limit
-                count += 1
-        if total_mood == 0:
-            return 0
-        logger.debug(
-            f"当前工作总计高效组：{count}, 当前平均心情百分比 {current_mood / total_mood}"
-        )
-        return current_mood / total_mood
+    def mood_table(self, time=None):
+        return MoodTable(self.operators.values(), self.dorm, time)
+
+    def average_mood(self, table=None):
+        if table is None:
+            table = self.mood_table()
+        average = table.average_mood()
+        logger.debug(f"当前平均心情百分比 {average}")
+        return average
 
     def available_free(self, free_type="high", time=None):
         if not time:
@@ -794,18 +833,23 @@ class Operators:
         _room.time = None
         return _room
 
-    def get_current_operator(self, room, index):
-        for key, value in self.operators.items():
-            if value.current_room == room and value.current_index == index:
-                return value
-        return None
+    def get_current_operator(self, room, index, last=False):
+        """当前在 room 的 index 号位的干员；数据有误出现多个时按 operators 的顺序取第一个或最后一个"""
+        bucket = self._by_position.get((room, index))
+        if not bucket:
+            return None
+        if len(bucket) == 1:
+            return next(iter(bucket.values()))
+        found = [v for v in self.operators.values() if v.name in bucket]
+        return found[-1] if last else found[0]
 
     def print(self):
         ret = "{"
         op = []
         dorm = []
         for k, v in self.operators.items():
-            op.append("'" + k + "': " + str(vars(v)))
+            state = {key: x for key, x in vars(v).items() if key != "_owner"}
+            op.append("'" + k + "': " + str(state))
         ret += "'operators': {" + ",".join(op) + "},"
         for v in self.dorm:
             dorm.append(str(vars(v)))
@@ -941,7 +985,9 @@ class Operator:
         self.group = group
         self.replacement = replacement
         self.resting_priority = resting_priority
+        self._owner = None
         self._current_room = None
+        self._current_index = -1
         self.current_room = current_room
         self.exhaust_require = exhaust_require
         self.upper_limit = upper_limit
@@ -962,7 +1008,10 @@ class Operator:
     @current_room.setter
     def current_room(self, value):
         if self._current_room != value:
+            room = self._current_room
             self._current_room = value
+            if self._owner is not None:
+                self._owner.moved(self, room, self._current_index)
             if Operators.current_room_changed_callback and (
                 self.refresh_order_room[0] or self.refresh_drained
             ):
@@ -971,6 +1020,31 @@ class Operator:
                     f"触发当前房间变更回调: {self.name} 现在在 {self._current_room}, 刷新交易所房间: {self.refresh_order_room}, 刷新疲劳: {self.refresh_drained}"
                 )
 
+    @property
+    def current_index(self):
+        return self._current_index
+
+    @current_index.setter
+    def current_index(self, value):
+        if self._current_index != value:
+            index = self._current_index
+            self._current_index = value
+            if self._owner is not None:
+                self._owner.moved(self, self._current_room, index)
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state["_owner"] = None
+        return state
+
+    def __setstate__(self, state):
+        # 旧版本保存的 current_index 是普通属性
+        if "current_index" in state:
+            state["_current_index"] = state.pop("current_index")
+        state.setdefault("_current_index", -1)
+        state["_owner"] = None
+        self.__dict__.update(state)
+
     def is_high(self):
         # 是否为高效组
         return self.operator_type == "high"
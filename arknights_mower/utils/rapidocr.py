@@ -1,9 +1,261 @@
+import hashlib
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+from pathlib import Path
+from threading import Lock, Thread
+from typing import Hashable, List, Optional, Tuple
+
+import cv2
+import numpy as np
+
+from arknights_mower.utils import config
+from arknights_mower.utils import typealias as tp
+from arknights_mower.utils.log import logger
+from arknights_mower.utils.path import get_path
+
 engine = None
+init_lock = Lock()
+
+MODULES = ("Det", "Cls", "Rec")
+
+
+def optimized_model_dir() -> Path:
+    import onnxruntime
+
+    level = config.conf.ocr.graph_optimization_level
+    return get_path(f"@app/tmp/ocr/{onnxruntime.__version__}-{level}")
+
+
+def session_options(cfg: dict):
+    """替换 rapidocr 默认的会话设置，图优化等级与模型缓存取自 conf.yml"""
+    import onnxruntime as ort
+
+    levels = {
+        "disable": ort.GraphOptimizationLevel.ORT_DISABLE_ALL,
+        "basic": ort.GraphOptimizationLevel.ORT_ENABLE_BASIC,
+        "extended": ort.GraphOptimizationLevel.ORT_ENABLE_EXTENDED,
+        "all": ort.GraphOptimizationLevel.ORT_ENABLE_ALL,
+    }
+    ocr_conf = config.conf.ocr
+    sess_opt = ort.SessionOptions()
+    sess_opt.log_severity_level = 4
+    sess_opt.enable_cpu_mem_arena = False
+    sess_opt.graph_optimization_level = levels.get(
+        ocr_conf.graph_optimization_level, levels["all"]
+    )
+    if ocr_conf.intra_op_num_threads > 0:
+        sess_opt.intra_op_num_threads = ocr_conf.intra_op_num_threads
+    if ocr_conf.inter_op_num_threads > 0:
+        sess_opt.inter_op_num_threads = ocr_conf.inter_op_num_threads
+    if ocr_conf.cache_optimized_model:
+        model_path = Path(cfg["model_path"])
+        cache_dir = optimized_model_dir()
+        if model_path.parent == cache_dir:
+            # 已经优化过的模型无需再次优化
+            sess_opt.graph_optimization_level = levels["disable"]
+        else:
+            cache_dir.mkdir(parents=True, exist_ok=True)
+            sess_opt.optimized_model_filepath = str(cache_dir / model_path.name)
+    return sess_opt
 
 
 def initialize_ocr(score=0.3):
     global engine
-    if not engine:
+    with init_lock:
+        if engine:
+            return
+        start_time = time.perf_counter()
         from rapidocr_onnxruntime import RapidOCR
+        from rapidocr_onnxruntime.main import DEFAULT_CFG_PATH, read_yaml
+        from rapidocr_onnxruntime.utils import OrtInferSession
+
+        OrtInferSession._init_sess_opts = staticmethod(session_options)
+        kwargs = {}
+        if config.conf.ocr.cache_optimized_model:
+            default_cfg = read_yaml(DEFAULT_CFG_PATH)
+            for module in MODULES:
+                name = Path(default_cfg[module]["model_path"]).name
+                cached = optimized_model_dir() / name
+                if cached.is_file():
+                    kwargs[f"{module.lower()}_model_path"] = str(cached)
+        ocr = RapidOCR(text_score=score, **kwargs)
+        warm_up(ocr)
+        engine = ocr
+        logger.debug(f"OCR 初始化用时 {time.perf_counter() - start_time:.3f}s")
+
+
+def initialize_ocr_async(score=0.3) -> Thread:
+    """在后台线程中初始化并预热 OCR，之后调用 initialize_ocr 会等待其完成"""
+    thread = Thread(target=initialize_ocr, args=(score,), daemon=True)
+    thread.start()
+    return thread
+
+
+def warm_up(ocr) -> None:
+    """用空白图跑一遍检测与识别，让首次推理不再承担图优化与内存分配的开销"""
+    blank = np.full((64, 256, 3), 255, np.uint8)
+    ocr.text_det(blank)
+    ocr.text_rec([blank[:48]])
+
+
+class OCRCache:
+    """识别结果的 LRU 缓存，键为二值化截图的哈希与识别参数，条目超过 ttl 秒后失效"""
+
+    def __init__(self, maxsize: int = 256, ttl: float = 600) -> None:
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.data: OrderedDict[Hashable, Tuple[float, Tuple[str, float]]] = (
+            OrderedDict()
+        )
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def key(img: tp.Image, params: Hashable) -> Hashable:
+        """大津法二值化后按位打包求哈希，截图压缩带来的轻微噪声不影响结果"""
+        if img.ndim == 3:
+            img = cv2.cvtColor(img, cv2.COLOR_RGB2GRAY)
+        _, bw = cv2.threshold(img, 0, 255, cv2.THRESH_BINARY | cv2.THRESH_OTSU)
+        digest = hashlib.blake2b(np.packbits(bw > 0).tobytes(), digest_size=16)
+        return params, bw.shape, digest.digest()
+
+    def get(self, key: Hashable) -> Optional[Tuple[str, float]]:
+        item = self.data.get(key)
+        if item is not None and time.monotonic() - item[0] > self.ttl:
+            del self.data[key]
+            item = None
+        if item is None:
+            self.misses += 1
+            return None
+        self.data.move_to_end(key)
+        self.hits += 1
+        return item[1]
+
+    def put(self, key: Hashable, value: Tuple[str, float]) -> None:
+        self.data[key] = (time.monotonic(), value)
+        self.data.move_to_end(key)
+        while len(self.data) > self.maxsize:
+            self.data.popitem(last=False)
+
+    def clear(self) -> None:
+        self.data.clear()
+        self.hits = 0
+        self.misses = 0
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "size": len(self.data),
+            "hit_rate": self.hits / total if total else 0.0,
+        }
+
+
+cache = OCRCache()
+
+
+def rec(imgs: List[tp.Image], tag: Hashable = None) -> List[Tuple[str, float]]:
+    """批量识别文字（不做文字检测），一次送入识别模型，结果顺序与输入一致
+
+    tag 区分调用方对结果的解析方式，不同 tag 之间不共享缓存
+    """
+    if not imgs:
+        return []
+    params = ("rec", engine.text_score, tag)
+    keys = [cache.key(img, params) for img in imgs]
+    results = [cache.get(key) for key in keys]
+    # 同一批内相同的截图只识别一次
+    missed = {keys[i]: i for i, result in enumerate(results) if result is None}
+    if missed:
+        batch = [engine.load_img(imgs[i]) for i in missed.values()]
+        rec_res, _ = engine.text_rec(batch)
+        for key, (text, score) in zip(missed, rec_res):
+            cache.put(key, (text, score))
+        results = [result or cache.data[key][1] for key, result in zip(keys, results)]
+    logger.debug(f"OCR 缓存：{cache.stats()}")
+    return results
+
+
+def ocr(imgs: List[tp.Image], tag: Hashable = None) -> List[List[list]]:
+    """批量检测并识别文字：逐张检测文字框，所有文字框一次送入识别模型
+
+    每张图的结果同 engine(img, use_det=True, use_cls=False, use_rec=True)[0]，
+    为 [文字框, 文字, 置信度] 的列表，没有文字时为空列表；
+    同批的文字框会被填充到相同宽高比，置信度与逐张识别略有差异
+    """
+    if not imgs:
+        return []
+    params = ("ocr", engine.text_score, tag)
+    keys = [cache.key(img, params) for img in imgs]
+    results = [cache.get(key) for key in keys]
+    missed = {keys[i]: i for i, result in enumerate(results) if result is None}
+    if missed:
+        crops, owners, boxes = [], [], []
+        for n, i in enumerate(missed.values()):
+            img, padding_h = engine.maybe_add_letterbox(engine.load_img(imgs[i]))
+            dt_boxes, _ = engine.auto_text_det(img)
+            if dt_boxes is None:
+                continue
+            crops.extend(engine.get_crop_img_list(img, dt_boxes))
+            for box in dt_boxes:
+                box[:, 1] -= padding_h
+                owners.append(n)
+                boxes.append(box)
+        found = [[] for _ in missed]
+        if crops:
+            rec_res, _ = engine.text_rec(crops)
+            for n, box, (text, score) in zip(owners, boxes, rec_res):
+                if float(score) >= engine.text_score:
+                    found[n].append([box.tolist(), text, score])
+        done = dict(zip(missed, found))
+        for key, value in done.items():
+            cache.put(key, value)
+        results = [
+            done[key] if result is None else result
+            for key, result in zip(keys, results)
+        ]
+    logger.debug(f"OCR 缓存：{cache.stats()}")
+    return results
+
+
+class OCRBatch:
+    """收集同一帧的多个 ROI，flush 时一次性批量识别并填充 Future
+
+    det 为 True 时先检测文字框，结果同 ocr，否则同 rec
+
+    with OCRBatch() as batch:
+        f1 = batch.submit(img1)
+        f2 = batch.submit(img2)
+    text, score = f1.result()
+    """
+
+    def __init__(self, tag: Hashable = None, det: bool = False) -> None:
+        self.tag = tag
+        self.det = det
+        self.pending: List[Tuple[tp.Image, Future]] = []
+
+    def submit(self, img: tp.Image) -> Future:
+        future = Future()
+        self.pending.append((img, future))
+        return future
+
+    def flush(self) -> None:
+        if not self.pending:
+            return
+        pending, self.pending = self.pending, []
+        try:
+            results = (ocr if self.det else rec)([img for img, _ in pending], self.tag)
+        except Exception as e:
+            for _, future in pending:
+                future.set_exception(e)
+            return
+        for (_, future), result in zip(pending, results):
+            future.set_result(result)
+
+    def __enter__(self) -> "OCRBatch":
+        return self
 
-        engine = RapidOCR(text_score=score)
+    def __exit__(self, *args) -> None:
+        self.flush()
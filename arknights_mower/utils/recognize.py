@@ -7,7 +7,7 @@ import numpy as np
 from skimage.metrics import structural_similarity
 
 from arknights_mower import __rootdir__
-from arknights_mower.utils import config
+from arknights_mower.utils import config, rapidocr
 from arknights_mower.utils import typealias as tp
 from arknights_mower.utils.csleep import MowerExit
 from arknights_mower.utils.device.device import Device
@@ -97,6 +97,26 @@ class Recognizer:
         """get the color of the pixel"""
         return self.img[y][x]
 
+    def ocr_many(
+        self, rois: List[tp.Scope | tp.Image], tag=None, det: bool = False
+    ) -> List[Tuple[str, float]] | List[List[list]]:
+        """batch OCR of several ROIs in the current frame
+
+        each roi is either a scope on the current screenshot or a preprocessed image,
+        tag separates cached results of callers that parse the text differently.
+        without det every roi is one line of text and gives (text, score),
+        with det text boxes are detected first and every roi gives a list of
+        [box, text, score] like rapidocr.engine
+        """
+        with rapidocr.OCRBatch(tag, det) as batch:
+            futures = [
+                batch.submit(
+                    roi if isinstance(roi, np.ndarray) else cropimg(self.img, roi)
+                )
+                for roi in rois
+            ]
+        return [f.result() for f in futures]
+
     def save_screencap(self, folder):
         # del folder  # 兼容2024.05旧版接口
         save_screenshot(self.screencap, folder)
@@ -0,0 +1,97 @@
+"""公招标签计算
+
+每个标签表示为可公招干员的位掩码（第 i 位为 recruit.json 中的第 i 个干员），
+标签组合的结果用整数与运算求得；所有 1~3 个标签的组合预先算好，
+通过 data 的索引机制按 recruit.json 的哈希缓存
+"""
+
+from itertools import combinations
+from typing import Optional
+
+from arknights_mower import data
+
+SENIOR = "高级资深干员"
+STARS = range(1, 7)
+
+
+@data.index("recruit_agent")
+def _recruit_masks(recruit_agent: dict) -> dict:
+    """干员列表、每个标签与每个星级对应的位掩码"""
+    agents = []
+    tags = {}
+    stars = {star: 0 for star in STARS}
+    for i, (agent, info) in enumerate(recruit_agent.items()):
+        agents.append({"id": agent, "name": info["name"], "star": info["stars"]})
+        stars[info["stars"]] |= 1 << i
+        # 与 agent_with_tags 一致，只有一个标签的干员不参与组合
+        if len(set(info["tags"])) < 2:
+            continue
+        for tag in set(info["tags"]):
+            tags[tag] = tags.get(tag, 0) | 1 << i
+    return {"agents": agents, "tags": tags, "stars": stars}
+
+
+def combo_result(
+    combo: tuple[str, ...], tags: dict[str, int], stars: dict[int, int]
+) -> Optional[tuple[int, int, int]]:
+    """计算一个标签组合的结果
+
+    Returns:
+        (排序用星级, 结果星级, 结果干员的位掩码)，没有结果时返回 None；
+        排序用星级沿用旧实现：两个标签取最低星级，一个或三个标签取最高星级
+    """
+    mask = -1
+    for tag in combo:
+        mask &= tags.get(tag, 0)
+    if not mask:
+        return None
+    present = [star for star in STARS if mask & stars[star]]
+    sort_star = present[0] if len(combo) == 2 else present[-1]
+
+    # 没有高级资深干员标签时，六星不参与最高星级的判断
+    effective = mask if SENIOR in combo else mask & ~stars[6]
+    max_star = max((star for star in present if effective & stars[star]), default=-1)
+    kept = mask
+    if max_star > 1:
+        kept &= ~(stars[1] | stars[2])
+    if max_star < 6:
+        kept &= ~stars[6]
+    if not kept:
+        return None
+    min_star = next(star for star in STARS if kept & stars[star])
+    return sort_star, min_star, kept & stars[min_star]
+
+
+@data.index("recruit_agent")
+def _recruit_combos(recruit_agent: dict) -> dict[frozenset, tuple[int, int, list]]:
+    """所有 1~3 个标签组合的结果表：标签集合 -> (排序用星级, 结果星级, 干员下标)"""
+    masks = _recruit_masks(recruit_agent)
+    tags, stars = masks["tags"], masks["stars"]
+    table = {}
+    for n in (1, 2, 3):
+        for combo in combinations(sorted(tags), n):
+            result = combo_result(combo, tags, stars)
+            if result is None:
+                continue
+            sort_star, star, mask = result
+            ids = [i for i in range(mask.bit_length()) if mask >> i & 1]
+            table[frozenset(combo)] = (sort_star, star, ids)
+    return table
+
+
+def recruit_cal(tags: list[str], recruit_order: list[int]) -> dict[int, list[dict]]:
+    """查表得到各标签组合的结果，按星级分组，同一星级内按 recruit_order 与组合顺序排列"""
+    agents = data.load("recruit_masks")["agents"]
+    table = data.load("recruit_combos")
+    index = {k: i for i, k in enumerate(recruit_order)}
+    found = []
+    for n in (1, 2, 3):
+        for combo in combinations(tags, n):
+            if (entry := table.get(frozenset(combo))) is not None:
+                found.append((combo, entry))
+    found.sort(key=lambda x: index[x[1][0]])
+
+    result = {star: [] for star in reversed(STARS)}
+    for combo, (_, star, ids) in found:
+        result[star].append({"tag": combo, "result": [agents[i] for i in ids]})
+    return result
@@ -0,0 +1,80 @@
+from functools import cache
+from typing import Iterable
+
+from arknights_mower.utils import segment
+
+# 基建首页一屏的宽度
+VIEW_WIDTH = 1920
+# 进入基建首页时控制中枢的标准位置，以此为原点计算各房间的横坐标
+NOMINAL_CENTRAL = ((830, 300), (1090, 460))
+
+
+@cache
+def room_spans() -> dict[str, tuple[float, float]]:
+    """各房间在基建首页上的横向范围，与 segment.base 的布局一致"""
+    rooms = segment.base(None, NOMINAL_CENTRAL)
+    return {
+        room: (float(poly[:, 0].min()), float(poly[:, 0].max()))
+        for room, poly in rooms.items()
+    }
+
+
+def move_view(room: str, view: float = 0) -> tuple[float, bool]:
+    """进入房间前视野的移动，同 BaseMixin.adjust_room
+
+    房间有一部分在屏幕内时不滑动，否则滑到房间刚好露出的位置。
+    返回 (新的视野左边界, 是否滑动)
+    """
+    spans = room_spans()
+    if room not in spans:
+        return view, False
+    left, right = spans[room]
+    if view <= left <= view + VIEW_WIDTH or view <= right <= view + VIEW_WIDTH:
+        return view, False
+    if left < view:
+        return left, True
+    return right - VIEW_WIDTH, True
+
+
+def count_swipes(rooms: Iterable[str], view: float = 0) -> int:
+    """按顺序进入 rooms 需要滑动基建首页的次数"""
+    swipes = 0
+    for room in rooms:
+        view, swiped = move_view(room, view)
+        swipes += swiped
+    return swipes
+
+
+def plan_visits(rooms: Iterable[str], view: float = 0) -> list[str]:
+    """安排读取房间的顺序，使基建首页的滑动次数最少
+
+    屏幕内的房间直接进入，不改变视野；每次滑动都停在某个房间刚好露出的位置，
+    按滑动次数逐层搜索这些位置即可找到最少的方案。不在布局中的房间放在最后。
+    """
+    spans = room_spans()
+    rooms = list(dict.fromkeys(rooms))
+    unknown = [r for r in rooms if r not in spans]
+    known = sorted((r for r in rooms if r in spans), key=lambda r: spans[r])
+
+    def visit(view, remaining, order):
+        # 屏幕内的房间直接进入，返回 (剩下的房间, 新的顺序)
+        visible = [r for r in remaining if not move_view(r, view)[1]]
+        return [r for r in remaining if r not in visible], order + visible
+
+    layer = [(view, *visit(view, known, []))]
+    seen = set()
+    while True:
+        for _, remaining, order in layer:
+            if not remaining:
+                return order + unknown
+        next_layer = []
+        for view, remaining, order in layer:
+            for room in remaining:
+                new_view = move_view(room, view)[0]
+                others = [r for r in remaining if r != room]
+                left, order_after = visit(new_view, others, order + [room])
+                key = (new_view, tuple(left))
+                if key not in seen:
+                    seen.add(key)
+                    next_layer.append((new_view, left, order_after))
+        layer = next_layer
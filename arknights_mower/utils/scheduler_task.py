@@ -1,9 +1,11 @@
 import copy
 import heapq
+from bisect import bisect_right
 from collections import defaultdict
 from datetime import datetime, timedelta
 from enum import Enum
 from typing import Literal
+from weakref import WeakValueDictionary
 
 from arknights_mower.solvers.record import get_inventory_counts
 from arknights_mower.utils import config
@@ -53,6 +55,8 @@ def find_next_task(
         tasks: 任务列表
         compare_time: 截止时间
     """
+    if isinstance(tasks, TaskQueue):
+        return tasks.find(compare_time, task_type, compare_type, meta_data)
     if compare_type == "=":
         return next(
             (
@@ -88,93 +92,120 @@ def find_next_task(
         )
 
 
-def scheduling(tasks, run_order_delay=5, execution_time=0.75, time_now=None):
-    # execution_time per room
-    if time_now is None:
-        time_now = datetime.now()
-    if len(tasks) > 0:
+def task_minutes(task, execution_time=0.75):
+    """估计任务执行的分钟数：菲亚充能/派对内置3分钟，其他任务按每个房间 execution_time 分钟，没有换班计划的任务1分钟"""
+    if task.type in [TaskTypes.FIAMMETTA, TaskTypes.CLUE_PARTY]:
+        return 3
+    if len(task.plan) > 0:
+        return len(task.plan) * execution_time
+    return 1
+
+
+def check_window(window, next_time, time_now, execution_time=0.75):
+    """按 scheduling 的规则检查两个跑单任务之间的任务是否会拖到下一次跑单之后
+
+    Returns:
+        (需要移到跑单之后的第一个任务的下标，没有则为 None；
+        time_now 推迟不超过该时长时结果不变，需要移动时为 None)
+    """
+    total_execution_time = 0
+    stable = timedelta.max
+    for i in range(len(window)):
+        for task in window[i:]:
+            estimate_time = task_minutes(task, execution_time)
+            finish = timedelta(minutes=total_execution_time + estimate_time) + time_now
+            if finish < task.time:
+                total_execution_time = 0
+                stable = min(stable, task.time - finish)
+            else:
+                total_execution_time += estimate_time
+        finish = timedelta(minutes=total_execution_time) + time_now
+        if finish > next_time:
+            return i, None
+        stable = min(stable, next_time - finish)
+    return None, stable
+
+
+class Rescheduler:
+    """增量版的 scheduling，参数与结果都相同
+
+    任务按跑单任务分成若干段，每段的检查结果按段内任务的时间、类型、房间数与下一个跑单的时间缓存，
+    检查时记下 time_now 最多推迟多久结果不变；任务新增、移动或完成后只有变化的段需要重新检查
+    """
+
+    def __init__(self) -> None:
+        self.windows = {}
+
+    def __call__(self, tasks, run_order_delay=5, execution_time=0.75, time_now=None):
+        if time_now is None:
+            time_now = datetime.now()
+        if len(tasks) == 0:
+            return
         adjust_run_order_for_maintenance(tasks, run_order_delay)
         tasks.sort(key=lambda x: x.time)
-
-        # 任务间隔最小时间（5分钟）
         min_time_interval = timedelta(minutes=run_order_delay)
 
-        # 初始化变量以跟踪上一个优先级0任务和计划执行时间总和
+        windows = {}
+        window = []
         last_priority_0_task = None
-        total_execution_time = 0
-
-        # 遍历任务列表
-        for i, task in enumerate(tasks):
-            current_time = time_now
-            # 判定任务堆积，如果第一个任务已经超时，则认为任务堆积
-            if task.type.priority == 1 and current_time > task.time:
-                total_execution_time += (current_time - task.time).total_seconds() / 60
-
-            if task.type.priority == 1:
-                if last_priority_0_task is not None:
-                    time_difference = task.time - last_priority_0_task.time
-                    if (
-                        config.conf.run_order_grandet_mode.enable
-                        and time_difference < min_time_interval
-                        and time_now < last_priority_0_task.time
-                    ) and not task.adjusted:
-                        logger.info("检测到跑单任务过于接近，准备修正跑单时间")
-                        return last_priority_0_task, task
-                # 更新上一个优先级0任务和总执行时间
-                last_priority_0_task = task
-                total_execution_time = 0
+        for task in tasks:
+            if task.type.priority != 1:
+                window.append(task)
+                continue
+            key = (
+                execution_time,
+                task.time,
+                tuple((t.time, t.type, len(t.plan)) for t in window),
+            )
+            start = None
+            cached = self.windows.get(key)
+            if cached and timedelta(0) <= time_now - cached[0] < cached[1]:
+                windows[key] = cached
             else:
-                # 找到下一个优先级0任务的位置
-                next_priority_0_index = -1
-                for j in range(i + 1, len(tasks)):
-                    if tasks[j].type.priority == 1:
-                        next_priority_0_index = j
-                        break
-                # 如果其他任务的总执行时间超过了下一个优先级0任务的执行时间，调整它们的时间
-                if next_priority_0_index > -1:
-                    for j in range(i, next_priority_0_index):
-                        # 菲亚充能/派对内置3分钟，线索购物内置1分钟
-                        task_time = (
-                            0
-                            if len(tasks[j].plan) > 0
-                            and tasks[j].type
-                            not in [TaskTypes.FIAMMETTA, TaskTypes.CLUE_PARTY]
-                            else (
-                                3
-                                if tasks[j].type
-                                in [TaskTypes.FIAMMETTA, TaskTypes.CLUE_PARTY]
-                                else 1
-                            )
-                        )
-                        # 其他任务按照 每个房间*预设执行时间算 默认 45秒
-                        estimate_time = (
-                            len(tasks[j].plan) * execution_time
-                            if task_time == 0
-                            else task_time
-                        )
-                        if (
-                            timedelta(minutes=total_execution_time + estimate_time)
-                            + time_now
-                            < tasks[j].time
-                        ):
-                            total_execution_time = 0
-                        else:
-                            total_execution_time += estimate_time
-                    if (
-                        timedelta(minutes=total_execution_time) + time_now
-                        > tasks[next_priority_0_index].time
-                    ):
-                        logger.info("检测到任务可能影响到下次跑单修改任务至跑单之后")
-                        logger.debug("||".join([str(t) for t in tasks]))
-                        next_priority_0_time = tasks[next_priority_0_index].time
-                        for j in range(i, next_priority_0_index):
-                            tasks[j].time = next_priority_0_time + timedelta(seconds=1)
-                            next_priority_0_time = tasks[j].time
-                        logger.debug("||".join([str(t) for t in tasks]))
-                        break
+                start, stable = check_window(
+                    window, task.time, time_now, execution_time
+                )
+                if start is None:
+                    windows[key] = (time_now, stable)
+            if start is not None:
+                logger.info("检测到任务可能影响到下次跑单修改任务至跑单之后")
+                logger.debug("||".join([str(t) for t in tasks]))
+                next_priority_0_time = task.time
+                for t in window[start:]:
+                    t.time = next_priority_0_time + timedelta(seconds=1)
+                    next_priority_0_time = t.time
+                logger.debug("||".join([str(t) for t in tasks]))
+                self.windows.update(windows)
+                break
+            if last_priority_0_task is not None:
+                time_difference = task.time - last_priority_0_task.time
+                if (
+                    config.conf.run_order_grandet_mode.enable
+                    and time_difference < min_time_interval
+                    and time_now < last_priority_0_task.time
+                ) and not task.adjusted:
+                    logger.info("检测到跑单任务过于接近，准备修正跑单时间")
+                    self.windows.update(windows)
+                    return last_priority_0_task, task
+            last_priority_0_task = task
+            window = []
+        else:
+            self.windows = windows
         tasks.sort(key=lambda x: x.time)
 
 
+rescheduler = Rescheduler()
+
+
+def scheduling(tasks, run_order_delay=5, execution_time=0.75, time_now=None):
+    """按时间排序任务，把会拖到下一次跑单之后的任务移到跑单之后
+
+    Returns:
+        开启葛朗台跑单且两个跑单任务过于接近时，返回这两个任务
+    """
+    return rescheduler(tasks, run_order_delay, execution_time, time_now)
+
+
 def adjust_run_order_for_maintenance(tasks, run_order_delay=5):
     """
     将维护期附近的 RUN_ORDER 任务提前到维护前，避免维护期冲突。
@@ -308,22 +339,15 @@ def plan_metadata(op_data, tasks):
     _plan = {}
     _type = []
     # 第一个心情低的且小于3 则只休息半小时
-    total_agent = sorted(
-        (
-            v
-            for v in op_data.operators.values()
-            if v.is_high() and not v.room.startswith("dorm") and not v.is_resting()
-        ),
-        key=lambda x: x.current_mood() - x.lower_limit,
-    )
+    table = op_data.mood_table()
+    working = table.high & ~table.dorm_room & ~table.resting
 
     # 计算最低休息时间
-    for agent in total_agent:
+    if working.any():
         # 如果全红脸，使用急救模式
-        predicted_rest_time = max(
-            agent.predict_exhaust(), datetime.now() + timedelta(minutes=30)
+        min_resting_time = table.to_datetime(
+            max(table.predict_exhaust()[working].min(), 30 * 60)
         )
-        min_resting_time = min(min_resting_time, predicted_rest_time)
 
     logger.debug(f"预测最低休息时间为: {min_resting_time}")
     grouped_dorms = defaultdict(list)
@@ -691,15 +715,7 @@ def check_dorm_ordering(tasks, op_data):
                     # 如果当前位置为VIP，且有人员变动，则清除后续人员
                     if pass_first_free and clear:
                         if agent == "Current":
-                            current = next(
-                                (
-                                    obj
-                                    for obj in op_data.operators.values()
-                                    if obj.current_room == room
-                                    and obj.current_index == idx
-                                ),
-                                None,
-                            )
+                            current = op_data.get_current_operator(room, idx)
                             if current:
                                 if current.name not in working_agent:
                                     v[idx] = current.name
@@ -774,6 +790,20 @@ class SchedulerTask:
     type = ""
     plan = {}
     meta_data = ""
+    # 索引了该任务的 TaskQueue，time、type、meta_data 变化时令它们的索引失效
+    _queues = None
+
+    def __setattr__(self, name, value):
+        super().__setattr__(name, value)
+        if name in ("time", "type", "meta_data") and self._queues:
+            for queue in list(self._queues.values()):
+                queue._changed()
+
+    def __getstate__(self):
+        # 复制与序列化得到的任务不属于任何队列
+        state = self.__dict__.copy()
+        state.pop("_queues", None)
+        return state
 
     def __init__(
         self, time=None, task_plan={}, task_type="", meta_data="", adjusted=False
@@ -806,3 +836,140 @@ class SchedulerTask:
                 and the_same_time(self.time, other.time)
             )
         return False
+
+
+class TaskBucket:
+    """按 (时间, 列表位置) 排好序的一组任务"""
+
+    def __init__(self) -> None:
+        self.times = []
+        self.tasks = []
+
+    def add(self, task) -> None:
+        self.times.append(task.time)
+        self.tasks.append(task)
+
+
+class TaskQueue(list):
+    """缓存了按时间排序视图的任务列表，不是堆
+
+    列表本身的用法与顺序与 list 相同。列表按时间排好序时，首次 find 缓存全部任务与
+    各任务类型的任务时间，之后在缓存上二分查找；列表或其中任务的 time、type、meta_data
+    变化后缓存整体失效。列表未排序时 find 退回逐个比较的 find_next_task
+    """
+
+    def __init__(self, tasks=()) -> None:
+        super().__init__(tasks)
+        self._index = None
+        self._tracked = []
+
+    def __reduce__(self):
+        return TaskQueue, (list(self),)
+
+    def _changed(self) -> None:
+        self._index = None
+
+    def _build(self) -> dict:
+        if self._index is not None:
+            return self._index
+        # 只关注当前列表中任务的变化
+        for task in self._tracked:
+            task._queues.pop(id(self), None)
+        for task in self:
+            if task._queues is None:
+                task._queues = WeakValueDictionary()
+            task._queues[id(self)] = self
+        self._tracked = list(self)
+        index = {
+            "all": TaskBucket(),
+            "type": defaultdict(TaskBucket),
+            "ordered": all(a.time <= b.time for a, b in zip(self, self[1:])),
+        }
+        if index["ordered"]:
+            for task in self:
+                index["all"].add(task)
+                index["type"][task.type].add(task)
+        self._index = index
+        return index
+
+    def find(
+        self,
+        compare_time: datetime | None = None,
+        task_type="",
+        compare_type: Literal["<", "=", ">"] = "<",
+        meta_data="",
+    ):
+        """与 find_next_task 相同；列表未按时间排序时退回到逐个比较"""
+        index = self._build()
+        if not index["ordered"]:
+            return find_next_task(
+                list(self), compare_time, task_type, compare_type, meta_data
+            )
+        if task_type == "":
+            bucket = index["all"]
+        elif (bucket := index["type"].get(task_type)) is None:
+            return None
+        lo, end = 0, None
+        if compare_type == "=":
+            if compare_time is None:
+                return None
+            tolerance = timedelta(seconds=1.5)
+            lo = bisect_right(bucket.times, compare_time - tolerance)
+            end = compare_time + tolerance
+        elif compare_type == ">":
+            if compare_time is not None:
+                lo = bisect_right(bucket.times, compare_time)
+        else:
+            end = compare_time
+        for i in range(lo, len(bucket.tasks)):
+            if end is not None and bucket.times[i] >= end:
+                break
+            if meta_data == "" or meta_data in bucket.tasks[i].meta_data:
+                return bucket.tasks[i]
+        return None
+
+    def sort(self, *, key=None, reverse=False) -> None:
+        super().sort(key=key or (lambda task: task.time), reverse=reverse)
+        self._changed()
+
+    # 以下为 list 的修改操作，调用后索引失效
+
+    def append(self, task) -> None:
+        super().append(task)
+        self._changed()
+
+    def extend(self, tasks) -> None:
+        super().extend(tasks)
+        self._changed()
+
+    def insert(self, i, task) -> None:
+        super().insert(i, task)
+        self._changed()
+
+    def remove(self, task) -> None:
+        super().remove(task)
+        self._changed()
+
+    def pop(self, i=-1):
+        self._changed()
+        return super().pop(i)
+
+    def clear(self) -> None:
+        super().clear()
+        self._changed()
+
+    def reverse(self) -> None:
+        super().reverse()
+        self._changed()
+
+    def __setitem__(self, i, value) -> None:
+        super().__setitem__(i, value)
+        self._changed()
+
+    def __delitem__(self, i) -> None:
+        super().__delitem__(i)
+        self._changed()
+
+    def __iadd__(self, tasks):
+        self._changed()
+        return super().__iadd__(tasks)
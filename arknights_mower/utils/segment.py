@@ -22,28 +22,24 @@ def credit(img: tp.Image, draw: bool = False) -> list[tp.Scope]:
     """
     try:
         height, width, _ = img.shape
+        col_max = img.max(axis=0).max(axis=1)
 
         left, right = 0, width
-        while np.max(img[:, right - 1]) < 100:
+        while col_max[right - 1] < 100:
             right -= 1
-        while np.max(img[:, left]) < 100:
+        while col_max[left] < 100:
             left += 1
 
+        # 每行中灰色像素（三通道相等）的个数与亮度和
+        band = img[:, left:right]
+        gray_mask = (band[..., 0] == band[..., 1]) & (band[..., 1] == band[..., 2])
+        gray_num = gray_mask.sum(axis=1)
+        gray_sum = np.where(gray_mask, band[..., 0], 0).sum(axis=1, dtype=np.int64)
+
         def average(i: int) -> int:
-            num, sum = 0, 0
-            for j in range(left, right):
-                if img[i, j, 0] == img[i, j, 1] and img[i, j, 1] == img[i, j, 2]:
-                    num += 1
-                    sum += img[i, j, 0]
-            return sum // num
-
-        def ptp(j: int) -> int:
-            maxval = -999999
-            minval = 999999
-            for i in range(up_1, up_2):
-                minval = min(minval, img[i, j, 0])
-                maxval = max(maxval, img[i, j, 0])
-            return maxval - minval
+            if gray_num[i] == 0:
+                raise ZeroDivisionError("integer division or modulo by zero")
+            return gray_sum[i] // gray_num[i]
 
         up_1 = 0
         flag = False
@@ -61,12 +57,15 @@ def credit(img: tp.Image, draw: bool = False) -> list[tp.Scope]:
         while average(down) < 150:
             down -= 1
 
+        # 每列在 up_1 与 up_2 之间的极差
+        col_ptp = np.ptp(img[up_1:up_2, :, 0], axis=0)
+
         right = width - 1
-        while ptp(right) < 50:
+        while col_ptp[right] < 50:
             right -= 1
 
         left = 0
-        while ptp(left) < 50:
+        while col_ptp[left] < 50:
             left += 1
 
         split_x = [left + (right - left) // 5 * i for i in range(0, 6)]
@@ -103,56 +102,39 @@ def recruit(img: tp.Image, draw: bool = False) -> list[tp.Scope]:
     """
     try:
         height, width, _ = img.shape
+        col_max = img.max(axis=0).max(axis=1)
         left, right = width // 2 - 100, width // 2 - 50
 
-        def adj_x(i: int) -> int:
-            if i == 0:
-                return 0
-            sum = 0
-            for j in range(left, right):
-                for k in range(3):
-                    sum += abs(int(img[i, j, k]) - int(img[i - 1, j, k]))
-            return sum // (right - left)
-
-        def adj_y(j: int) -> int:
-            if j == 0:
-                return 0
-            sum = 0
-            for i in range(up_2, down_2):
-                for k in range(3):
-                    sum += abs(int(img[i, j, k]) - int(img[i, j - 1, k]))
-            return int(sum / (down_2 - up_2))
-
-        def average(i: int) -> int:
-            sum = 0
-            for j in range(left, right):
-                sum += np.sum(img[i, j, :3])
-            return sum // (right - left) // 3
-
-        def minus(i: int) -> int:
-            s = 0
-            for j in range(left, right):
-                s += int(img[i, j, 2]) - int(img[i, j, 0])
-            return s // (right - left)
+        # 按行计算中间一段的相邻行差、平均亮度与蓝红差
+        band = img[:, left:right, :3].astype(np.int64)
+        adj_x = np.abs(np.diff(band, axis=0)).sum(axis=(1, 2)) // (right - left)
+        adj_x = np.concatenate(([0], adj_x))
+        average = band.sum(axis=(1, 2)) // (right - left) // 3
+        minus = (band[..., 2] - band[..., 0]).sum(axis=1) // (right - left)
 
         up = 0
-        while minus(up) > -100:
+        while minus[up] > -100:
             up += 1
-        while not (adj_x(up) > 80 and minus(up) > -10 and average(up) > 210):
+        while not (adj_x[up] > 80 and minus[up] > -10 and average[up] > 210):
             up += 1
         up_2, down_2 = up - 90, up - 40
 
+        # 按列计算 up_2 与 down_2 之间的相邻列差，行号为负时与下标取值一致
+        band = img[np.arange(up_2, down_2), :, :3].astype(np.int64)
+        adj_y = np.abs(np.diff(band, axis=1)).sum(axis=(0, 2)) // (down_2 - up_2)
+        adj_y = np.concatenate(([0], adj_y))
+
         left = 0
-        while np.max(img[:, left]) < 100:
+        while col_max[left] < 100:
             left += 1
         left += 1
-        while adj_y(left) < 50:
+        while adj_y[left] < 50:
             left += 1
 
         right = width - 1
-        while np.max(img[:, right]) < 100:
+        while col_max[right] < 100:
             right -= 1
-        while adj_y(right) < 50:
+        while adj_y[right] < 50:
             right -= 1
 
         split_x = [left, (left + right) // 2, right]
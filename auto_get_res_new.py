@@ -11,6 +11,7 @@ from PIL import Image, ImageDraw, ImageFont
 from skimage.feature import hog
 from sklearn.neighbors import KNeighborsClassifier
 
+from arknights_mower.utils.depot_index import 物品分类索引
 from arknights_mower.utils.image import loadimg, thres2
 
 
@@ -593,6 +594,8 @@ class Arknights数据处理器:
         模板特征点, 模板标签 = 加载图片特征点_标签(模板文件夹)
         knn模型 = 训练knn模型(模板特征点, 模板标签)
         保存knn模型(knn模型, 模型保存路径)
+        # 运行时使用的降维索引，可以内存映射加载
+        物品分类索引.导出(模板特征点, 模板标签, 模型保存路径.removesuffix(".pkl"))
 
     def 批量训练并保存扫仓库模型(self):
         self.训练仓库的knn模型("NORMAL", "./arknights_mower/models/NORMAL.pkl")
@@ -872,7 +875,7 @@ class Arknights数据处理器:
                     干员技能字典["span"] = len(干员技能字典["child_skill"])
                 skill_key += 1
             干员技能列表.append(干员技能字典.copy())
-        干员技能列表 = sorted(干员技能列表, key=lambda x: (-x["key"]))
+        干员技能列表 = sorted(干员技能列表, key=lambda x: -x["key"])
         # print(干员技能列表)
         with open(
             "./ui/src/pages/basement_skill/skill.json", "w", encoding="utf-8"
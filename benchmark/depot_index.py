@@ -0,0 +1,30 @@
+"""仓库物品分类：lzma 压缩的 kNN 模型与内存映射索引的加载加预测耗时对比
+
+python -m benchmark.depot_index
+"""
+
+import lzma
+import pickle
+import time
+
+import numpy as np
+
+from arknights_mower import __rootdir__
+from arknights_mower.utils.depot_index import 物品分类索引
+
+
+def main():
+    start = time.perf_counter()
+    with lzma.open(f"{__rootdir__}/models/NORMAL.pkl", "rb") as pkl:
+        knn = pickle.load(pkl)
+    测试集 = np.random.default_rng(0).random((24, knn.n_features_in_))
+    knn.predict(测试集)
+    pkl_time = time.perf_counter() - start
+    start = time.perf_counter()
+    物品分类索引(f"{__rootdir__}/models/NORMAL").predict(测试集)
+    index_time = time.perf_counter() - start
+    print(f"NORMAL: kNN 模型 {pkl_time:.3f}s，索引 {index_time:.4f}s")
+
+
+if __name__ == "__main__":
+    main()
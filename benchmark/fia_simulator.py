@@ -0,0 +1,52 @@
+"""菲亚梅塔充能模拟：递归的 predict_fia 与迭代的 simulate_fia 的耗时对比
+
+python -m benchmark.fia_simulator
+旧实现取自单元测试中的对照函数。
+"""
+
+import copy
+import random
+import sys
+import time
+
+from arknights_mower.tests.fia_simulator_tests import (
+    predict_fia_recursive,
+    random_operators,
+)
+from arknights_mower.utils.mood import simulate_fia
+
+
+def main():
+    rng = random.Random(1)
+    cases = []
+    for _ in range(200):
+        operators = random_operators(rng, 5)
+        for op in operators:
+            op.depletion_rate /= 4
+        cases.append((operators, rng.uniform(0, 23)))
+    # 递归实现每轮充能一层，2400 小时需要放宽递归深度
+    limit = sys.getrecursionlimit()
+    sys.setrecursionlimit(max(limit, 10000))
+    try:
+        start = time.perf_counter()
+        for operators, fia_mood in cases:
+            predict_fia_recursive(copy.deepcopy(operators), fia_mood, 2400)
+        recursive_time = time.perf_counter() - start
+    finally:
+        sys.setrecursionlimit(limit)
+    start = time.perf_counter()
+    for operators, fia_mood in cases:
+        simulate_fia(
+            [op.mood for op in operators],
+            [op.depletion_rate for op in operators],
+            [op.lower_limit for op in operators],
+            [op.upper_limit for op in operators],
+            fia_mood,
+            2400,
+        )
+    loop_time = time.perf_counter() - start
+    print(f"菲亚充能模拟：递归 {recursive_time:.3f}s，迭代 {loop_time:.3f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,30 @@
+"""关卡定位：全屏模板匹配与横条搜索的耗时对比
+
+python -m benchmark.level_locator
+旧实现取自单元测试中的对照函数。
+"""
+
+import time
+
+import numpy as np
+
+from arknights_mower.solvers.navigation import LevelLocator
+from arknights_mower.tests.level_locator_tests import level_screen, locate_loop
+
+
+def main():
+    rng = np.random.default_rng(1)
+    gray = level_screen(rng, 8, (-1200, 400))
+    locator = LevelLocator(8)
+    locator.locate(gray)
+    start = time.perf_counter()
+    locate_loop(gray, 8)
+    loop_time = time.perf_counter() - start
+    start = time.perf_counter()
+    locator.locate(gray)
+    locator_time = time.perf_counter() - start
+    print(f"关卡定位：全屏搜索 {loop_time:.3f}s，横条搜索 {locator_time:.4f}s")
+
+
+if __name__ == "__main__":
+    main()
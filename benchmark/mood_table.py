@@ -0,0 +1,38 @@
+"""心情预测：逐个干员计算与 MoodTable 数组计算的耗时对比
+
+python -m benchmark.mood_table
+排班数据与随机心情取自单元测试。
+"""
+
+import random
+import time
+from datetime import datetime, timedelta
+
+from arknights_mower.tests.mood_table_tests import randomize_moods
+from arknights_mower.tests.operators_index_tests import init_opdata
+from arknights_mower.utils.mood import MoodTable
+
+
+def main():
+    op_data = init_opdata()
+    now = datetime.now()
+    randomize_moods(random.Random(1), op_data, now)
+    # 模拟完整干员列表的规模
+    ops = list(op_data.operators.values()) * 20
+    grid = [now + timedelta(minutes=10 * i) for i in range(144)]
+    start = time.perf_counter()
+    for t in grid:
+        [op.current_mood(t) for op in ops]
+    loop_time = time.perf_counter() - start
+    start = time.perf_counter()
+    table = MoodTable(ops, now=now)
+    table.forecast([table.offset(t) for t in grid])
+    table_time = time.perf_counter() - start
+    print(
+        f"心情预测：{len(ops)}名干员 x {len(grid)}个时刻，"
+        f"逐个计算 {loop_time:.3f}s，数组 {table_time:.4f}s"
+    )
+
+
+if __name__ == "__main__":
+    main()
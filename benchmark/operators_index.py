@@ -0,0 +1,43 @@
+"""干员位置查询：遍历全部干员与按房间、位置索引的耗时对比
+
+python -m benchmark.operators_index
+旧实现与排班数据取自单元测试。
+"""
+
+import random
+import time
+
+from arknights_mower.tests.operators_index_tests import (
+    get_current_room_loop,
+    get_dorm_by_name_loop,
+    init_opdata,
+    shuffle_positions,
+)
+
+
+def main():
+    op_data = init_opdata()
+    shuffle_positions(random.Random(2), op_data, 50)
+    names = list(op_data.operators)
+    start = time.perf_counter()
+    for _ in range(200):
+        for room in op_data.plan:
+            get_current_room_loop(op_data, room)
+        for name in names:
+            get_dorm_by_name_loop(op_data, name)
+    loop_time = time.perf_counter() - start
+    start = time.perf_counter()
+    for _ in range(200):
+        for room in op_data.plan:
+            op_data.get_current_room(room, bypass=True)
+        for name in names:
+            op_data.dorm_at(
+                op_data.operators[name].current_room,
+                op_data.operators[name].current_index,
+            )
+    index_time = time.perf_counter() - start
+    print(f"干员位置查询：逐个比较 {loop_time:.3f}s，索引 {index_time:.3f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,44 @@
+"""心情曲线：旧表结构逐条查询与迁移后按索引查询的耗时对比
+
+python -m benchmark.record_history
+旧表结构与查询取自单元测试中的对照函数。
+"""
+
+import tempfile
+import time
+from pathlib import Path
+from unittest.mock import patch
+
+from arknights_mower.solvers import record
+from arknights_mower.solvers.record import RecordWriter
+from arknights_mower.tests.record_history_tests import (
+    legacy_history,
+    legacy_mood_ratios,
+)
+
+
+def main():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "data.db"
+        # 一年的心情记录
+        count = legacy_history(path, 365, 24, seed=2)
+        start = time.perf_counter()
+        legacy_mood_ratios(path)
+        legacy_time = time.perf_counter() - start
+        writer = RecordWriter(path)
+        start = time.perf_counter()
+        writer.flush()
+        migrate_time = time.perf_counter() - start
+        with patch.object(record, "recorder", writer):
+            start = time.perf_counter()
+            record.get_mood_ratios()
+            indexed_time = time.perf_counter() - start
+        writer.close()
+    print(
+        f"心情曲线：{count}条记录，旧查询 {legacy_time:.3f}s，"
+        f"迁移 {migrate_time:.3f}s，索引查询 {indexed_time:.3f}s"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,40 @@
+"""记录写入：每条记录新建连接与 RecordWriter 后台批量写入的耗时对比
+
+python -m benchmark.record_writer
+旧实现取自单元测试中的对照函数。
+"""
+
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+
+from arknights_mower.solvers.record import RecordWriter
+from arknights_mower.tests.record_writer_tests import save_log_connect
+
+
+def main():
+    rounds = 200
+    with tempfile.TemporaryDirectory() as tmp:
+        start = time.perf_counter()
+        for i in range(rounds):
+            save_log_connect(Path(tmp) / "legacy.db", str(i))
+        connect_time = (time.perf_counter() - start) / rounds
+        writer = RecordWriter(Path(tmp) / "data.db")
+        writer.flush()
+        start = time.perf_counter()
+        for i in range(rounds):
+            writer.submit(
+                "INSERT INTO log VALUES (?, ?, ?, ?)",
+                (int(datetime.now().timestamp()), "{}", "INFO", str(i)),
+            )
+        submit_time = (time.perf_counter() - start) / rounds
+        writer.close()
+    print(
+        f"记录写入：每次连接 {connect_time * 1000:.3f}ms/条，"
+        f"写入线程 {submit_time * 1000:.3f}ms/条"
+    )
+
+
+if __name__ == "__main__":
+    main()
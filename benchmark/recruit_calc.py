@@ -0,0 +1,33 @@
+"""公招组合计算：逐个比较标签列表与位掩码实现的耗时对比
+
+python -m benchmark.recruit_calc
+旧实现取自单元测试中的对照函数。
+"""
+
+import time
+from itertools import combinations, islice
+
+from arknights_mower import data
+from arknights_mower.tests.recruit_calc_tests import recruit_cal_loop
+from arknights_mower.utils import recruit_calc
+
+
+def main():
+    tags = sorted(recruit_calc._recruit_masks(data.recruit_agent)["tags"])
+    draws = list(islice(combinations(tags, 5), 2000))
+    order = [6, 5, 1, 4, 3, 2]
+    start = time.perf_counter()
+    for draw in draws:
+        recruit_cal_loop(list(draw), order)
+    loop_time = time.perf_counter() - start
+    start = time.perf_counter()
+    for draw in draws:
+        recruit_calc.recruit_cal(list(draw), order)
+    mask_time = time.perf_counter() - start
+    print(
+        f"公招计算：{len(draws)} 组标签，列表 {loop_time:.3f}s，位掩码 {mask_time:.3f}s"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,31 @@
+"""公招标签识别：逐个模板匹配与矩阵乘法实现的耗时对比
+
+python -m benchmark.recruit_tag
+旧实现取自单元测试中的对照函数。
+"""
+
+import time
+
+import numpy as np
+
+from arknights_mower import models
+from arknights_mower.solvers.recruit import match_tags
+from arknights_mower.tests.recruit_tag_tests import match_tag_loop, tag_crop
+
+
+def main():
+    rng = np.random.default_rng(1)
+    names = list(models.recruit)[:5]
+    crops = [tag_crop(rng, models.recruit[name]) for name in names]
+    match_tags(crops)
+    start = time.perf_counter()
+    [match_tag_loop(crop) for crop in crops]
+    loop_time = time.perf_counter() - start
+    start = time.perf_counter()
+    match_tags(crops)
+    stacked_time = time.perf_counter() - start
+    print(f"公招标签：逐个匹配 {loop_time:.3f}s，矩阵乘法 {stacked_time:.4f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,45 @@
+"""任务调度：每次完整重算与 Rescheduler 增量调整的耗时对比
+
+python -m benchmark.rescheduler
+旧实现取自单元测试中的对照函数。
+"""
+
+import copy
+import random
+import time
+from datetime import timedelta
+from unittest.mock import patch
+
+from arknights_mower.tests.rescheduler_tests import (
+    START,
+    random_task,
+    scheduling_loop,
+)
+from arknights_mower.utils.news_checker import NewsChecker
+from arknights_mower.utils.scheduler_task import Rescheduler
+
+
+def main():
+    rng = random.Random(2)
+    tasks = [random_task(rng, START) for _ in range(60)]
+    for t in tasks:
+        t.adjusted = True
+    expected = copy.deepcopy(tasks)
+    rescheduler = Rescheduler()
+    # 不联网查询游戏更新时间
+    with patch.object(NewsChecker, "get_update_time", return_value=(None, None)):
+        rescheduler(tasks, time_now=START)
+        scheduling_loop(expected, time_now=START)
+        start = time.perf_counter()
+        for i in range(200):
+            scheduling_loop(expected, time_now=START + timedelta(seconds=i))
+        loop_time = time.perf_counter() - start
+        start = time.perf_counter()
+        for i in range(200):
+            rescheduler(tasks, time_now=START + timedelta(seconds=i))
+        incremental_time = time.perf_counter() - start
+    print(f"任务调度：完整重算 {loop_time:.3f}s，增量 {incremental_time:.3f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,27 @@
+"""房间读取顺序：按原顺序与 plan_visits 规划后的滑动次数及规划耗时
+
+python -m benchmark.room_order
+"""
+
+import random
+import time
+
+from arknights_mower.tests.room_order_tests import ROOMS
+from arknights_mower.utils.room_order import count_swipes, plan_visits
+
+
+def main():
+    rng = random.Random(1)
+    cases = [rng.sample(ROOMS, rng.randrange(1, len(ROOMS))) for _ in range(500)]
+    before = sum(count_swipes(rooms) for rooms in cases)
+    start = time.perf_counter()
+    after = sum(count_swipes(plan_visits(rooms)) for rooms in cases)
+    plan_time = time.perf_counter() - start
+    print(
+        f"房间读取顺序：{len(cases)}轮，滑动 {before} -> {after} 次，"
+        f"规划耗时 {plan_time:.3f}s"
+    )
+
+
+if __name__ == "__main__":
+    main()
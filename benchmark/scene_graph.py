@@ -0,0 +1,38 @@
+"""场景跳转：逐次 Dijkstra 与预先计算的路由表的耗时对比
+
+python -m benchmark.scene_graph
+"""
+
+import time
+
+import networkx as nx
+
+from arknights_mower.utils import graph
+from arknights_mower.utils.graph import DG, routing_table
+
+
+def main():
+    pairs = [(s, t) for s in DG.nodes for t in DG.nodes if s != t][:2000]
+    start = time.perf_counter()
+    for s, t in pairs:
+        try:
+            nx.shortest_path(DG, s, t, weight="weight")
+        except nx.NetworkXNoPath:
+            pass
+    dijkstra_time = time.perf_counter() - start
+    graph.invalidate_routes()
+    start = time.perf_counter()
+    routing_table()
+    build_time = time.perf_counter() - start
+    start = time.perf_counter()
+    for s, t in pairs:
+        routing_table()[s].get(t)
+    lookup_time = time.perf_counter() - start
+    print(
+        f"场景图：{len(pairs)}次最短路径 {dijkstra_time:.3f}s，"
+        f"建表 {build_time:.3f}s，查表 {lookup_time:.4f}s"
+    )
+
+
+if __name__ == "__main__":
+    main()
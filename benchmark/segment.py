@@ -0,0 +1,37 @@
+"""信用商店与公招界面分割：逐像素循环与 NumPy 实现的耗时对比
+
+python -m benchmark.segment
+旧实现取自单元测试中的对照函数。
+"""
+
+import time
+
+import numpy as np
+
+from arknights_mower.tests.segment_tests import (
+    credit_loop,
+    credit_screen,
+    recruit_loop,
+    recruit_screen,
+)
+from arknights_mower.utils import segment
+
+
+def main():
+    rng = np.random.default_rng(3)
+    for name, screen, ref in (
+        ("credit", credit_screen, credit_loop),
+        ("recruit", recruit_screen, recruit_loop),
+    ):
+        img = screen(rng, 1080, 1920)
+        start = time.perf_counter()
+        ref(img)
+        loop_time = time.perf_counter() - start
+        start = time.perf_counter()
+        getattr(segment, name)(img)
+        numpy_time = time.perf_counter() - start
+        print(f"segment.{name}: 循环 {loop_time:.3f}s，NumPy {numpy_time:.4f}s")
+
+
+if __name__ == "__main__":
+    main()
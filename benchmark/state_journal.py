@@ -0,0 +1,59 @@
+"""状态保存：整体 pickle 写入与增量状态日志的耗时对比
+
+python -m benchmark.state_journal
+旧实现与调度器数据取自单元测试。
+"""
+
+import pickle
+import random
+import tempfile
+import time
+from pathlib import Path
+
+from arknights_mower.solvers.record import StateJournal, build_state, state_items
+from arknights_mower.tests.state_journal_tests import (
+    init_scheduler,
+    legacy_save,
+    mutate,
+)
+
+
+def main():
+    rng = random.Random(2)
+    scheduler = init_scheduler()
+    # 模拟完整干员列表的规模
+    for i in range(300):
+        scheduler.op_data.operators[f"op{i}"] = pickle.loads(
+            pickle.dumps(scheduler.op_data.operators["夕"])
+        )
+    for _ in range(20):
+        mutate(rng, scheduler)
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "data.db"
+        journal = StateJournal(path)
+        journal.record(state_items(scheduler), compact=True)
+        rounds = 20
+        start = time.perf_counter()
+        for _ in range(rounds):
+            mutate(rng, scheduler)
+            legacy_save(Path(tmp) / "legacy.db", scheduler)
+        pickle_time = (time.perf_counter() - start) / rounds
+        start = time.perf_counter()
+        for _ in range(rounds):
+            mutate(rng, scheduler)
+            journal.record(state_items(scheduler))
+        journal_time = (time.perf_counter() - start) / rounds
+        journal.close()
+        start = time.perf_counter()
+        journal = StateJournal(path)
+        build_state(journal.load())
+        load_time = time.perf_counter() - start
+        journal.close()
+    print(
+        f"状态保存：整体序列化 {pickle_time * 1000:.2f}ms/次，"
+        f"增量日志 {journal_time * 1000:.2f}ms/次，恢复 {load_time * 1000:.2f}ms"
+    )
+
+
+if __name__ == "__main__":
+    main()
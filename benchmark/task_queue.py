@@ -0,0 +1,32 @@
+"""查找任务：逐个比较的 find_next_task 与 TaskQueue 排序视图的耗时对比
+
+python -m benchmark.task_queue
+随机任务与查询取自单元测试。
+"""
+
+import random
+import time
+
+from arknights_mower.tests.task_queue_tests import random_queries, random_tasks
+from arknights_mower.utils.scheduler_task import TaskQueue, find_next_task
+
+
+def main():
+    rng = random.Random(5)
+    tasks = random_tasks(rng, 60)
+    tasks.sort(key=lambda t: t.time)
+    queue = TaskQueue(tasks)
+    queries = random_queries(rng, 20000)
+    start = time.perf_counter()
+    for query in queries:
+        find_next_task(tasks, *query)
+    list_time = time.perf_counter() - start
+    start = time.perf_counter()
+    for query in queries:
+        queue.find(*query)
+    queue_time = time.perf_counter() - start
+    print(f"查找任务：逐个比较 {list_time:.3f}s，索引 {queue_time:.3f}s")
+
+
+if __name__ == "__main__":
+    main()